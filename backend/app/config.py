@@ -1,4 +1,6 @@
 """Configuration settings for HistLink backend"""
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -13,10 +15,45 @@ class Settings(BaseSettings):
     db_user: str = "histlink_user"
     db_password: str = ""
 
+    # Connection pool（同期・非同期エンジンそれぞれが持つ。ワーカー数 × 2 × (pool_size + max_overflow)
+    # が Postgres の max_connections に収まるようにする）
+    db_pool_size: int = 5  # 常時保持する接続数
+    db_max_overflow: int = 10  # pool_size を超えて一時的に開ける接続数
+    db_pool_timeout: float = 30.0  # 空き接続を待つ秒数。超えたら TimeoutError
+    db_pool_recycle: int = 1800  # この秒数を超えた接続は作り直す（-1で無効）
+    db_pool_pre_ping: bool = True  # チェックアウトごとに疎通確認する（recycle で足りるなら False に）
+    db_pool_warn_wait_ms: float = 200.0  # チェックアウトがこれ以上かかったら警告ログ
+
     # API
     api_v1_prefix: str = "/api/v1"
     project_name: str = "HistLink API"
 
+    # Cache
+    # 用語グラフの隣接インデックス形式: "dict"（dict + set/list）または "csr"（連続配列、省メモリ）
+    cache_graph_backend: Literal["dict", "csr"] = "dict"
+
+    # Route pool（/games/start 用の事前生成）
+    route_pool_watermark: int = 2  # (難易度, 問題数) ごとに貯めておく件数。0で無効
+    route_pool_refill_interval: float = 1.0  # 補充ループの最大待機秒数
+
+    # Route generation
+    # 探索方式: "backtrack"（深さ優先 + 後戻り）または "walk"（ランダムウォークのやり直し）
+    route_engine: Literal["walk", "backtrack"] = "backtrack"
+    route_max_expansions: int = 2000  # backtrack で1スタートあたりに展開するノード数の上限
+    route_lookahead_depth: int = 4  # 候補の先に何ノード続けられるかを見る深さ（1 = 行き止まり回避のみ）
+    route_deadline_ms: float = 0.0  # 1回のルート生成の時間上限（ミリ秒）。超えたら最長ルートで打ち切る。0で無制限
+
+    # Generation workers（ルート・ダミー生成をイベントループ外で実行するスレッドプール）
+    generation_workers: int = 4  # 同時実行数
+    generation_max_pending: int = 64  # 実行中 + 待機中の上限。超えたら503
+
+    # Rank index（順位・上位ランキングをメモリから返す）
+    rank_index_capacity: int = 100  # ランキングごとに保持する上位件数
+    rank_index_refresh_interval: float = 60.0  # DBから読み直す秒数（他ワーカーの更新を取り込む）。0で読み直さない
+
+    # Admin
+    admin_bulk_max_items: int = 5000  # POST /admin/bulk で1回に受け付ける変更の上限
+
     # CORS（環境変数 CORS_ORIGINS で上書き可能。JSON配列形式: '["http://localhost","https://example.com"]'）
     cors_origins: list[str] = [
         "http://localhost:5173",           # ローカル開発 (frontend)
@@ -1,20 +1,151 @@
 """Database connection and session management"""
+import logging
+import threading
+import time
+from typing import Any, Dict
+
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
+
+class PoolMetrics:
+    """Cumulative checkout counters for one connection pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, wait: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": (self.wait_total / attempts * 1000) if attempts else 0.0,
+                "max_wait_ms": self.wait_max * 1000,
+            }
+
+
+class _TimedPoolMixin:
+    """Measure how long each checkout takes (queue wait + connect + pre-ping)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        # Keep counters across dispose() / recreate()
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def connect(self):
+        started_at = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            wait = time.perf_counter() - started_at
+            self.metrics.record(wait, timed_out=True)
+            logger.warning("DB pool exhausted after %.0f ms: %s", wait * 1000, self.status())
+            raise
+
+        wait = time.perf_counter() - started_at
+        self.metrics.record(wait)
+        if wait * 1000 >= settings.db_pool_warn_wait_ms:
+            logger.warning("Slow DB pool checkout (%.0f ms): %s", wait * 1000, self.status())
+        return connection
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    """QueuePool with checkout metrics"""
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool with checkout metrics"""
+
+
+def _pool_options() -> Dict[str, Any]:
+    """Pool sizing shared by the sync and async engines (see Settings.db_pool_*)"""
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
 # Create database engine
+# Sync engine: cache loading at startup and other non-request code paths
 engine = create_engine(
     settings.database_url,
-    pool_pre_ping=True,  # Check connection health before using
+    poolclass=TimedQueuePool,
     echo=False,  # Set to True for SQL query logging
+    **_pool_options(),
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def async_database_url(database_url: str) -> URL:
+    """Rewrite a postgresql:// URL to use the async psycopg (v3) driver"""
+    return make_url(database_url).set(drivername="postgresql+psycopg")
+
+
+# Async engine: used by the API routers so DB round trips don't block the event loop
+async_engine = create_async_engine(
+    async_database_url(settings.database_url),
+    poolclass=TimedAsyncAdaptedQueuePool,
+    echo=False,
+    **_pool_options(),
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+def pool_status(pool: QueuePool) -> Dict[str, Any]:
+    """Current occupancy and cumulative checkout metrics of a pool"""
+    status = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+        "timeout": pool.timeout(),
+    }
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status.update(metrics.snapshot())
+    return status
+
+
 # Create base class for models
 Base = declarative_base()
 
@@ -26,3 +157,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
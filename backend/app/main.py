@@ -3,22 +3,33 @@ from contextlib import asynccontextmanager
 from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
-from app.database import get_db
+from app.database import async_engine, get_async_db
 from app.routes import games, admin
 # routes.py は routesテーブル依存のため削除
 from app.services.cache import get_cache
+from app.services.generation_executor import shutdown_generation_executor
+from app.services.rank_index import get_rank_index
+from app.services.route_pool import get_route_pool
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """アプリケーション起動時にキャッシュを初期化"""
-    # 起動時: キャッシュを初期化
+    # 起動時: キャッシュとランキングを読み込み、ルート事前生成の補充タスクを開始
     get_cache()
+    rank_index = get_rank_index()
+    await rank_index.start()
+    route_pool = get_route_pool()
+    route_pool.start()
     yield
-    # 終了時: 特に何もしない
+    # 終了時: 補充タスクと生成ワーカーを止め、非同期DBの接続を閉じる
+    await route_pool.stop()
+    await rank_index.stop()
+    shutdown_generation_executor()
+    await async_engine.dispose()
 
 
 app = FastAPI(
@@ -49,10 +60,10 @@ async def root():
 
 
 @app.api_route("/health", methods=["GET", "HEAD"])
-async def health(db: Session = Depends(get_db)):
+async def health(db: AsyncSession = Depends(get_async_db)):
     """Health check endpoint（DB疎通確認付き）"""
     try:
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         return {"status": "healthy", "database": "connected"}
     except Exception:
         raise HTTPException(status_code=503, detail="Database connection failed")
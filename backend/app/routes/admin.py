@@ -1,14 +1,19 @@
 """Admin API endpoints for HistLink Studio"""
 
 import logging
+from typing import Callable, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
 from sqlalchemy import text
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.config import settings
+from app.database import async_engine, engine, get_async_db, pool_status
 from app.dependencies import verify_admin_token
 from app.schemas.admin import (
+    BulkEdgeCreate,
+    BulkRequest,
+    BulkResponse,
     EdgeCreate,
     EdgeResponse,
     EdgeUpdate,
@@ -17,24 +22,32 @@ from app.schemas.admin import (
     TermResponse,
     TermUpdate,
 )
-from app.services.cache import get_cache
+from app.services.cache import CacheSnapshot, Edge, Term, get_cache
+from app.services.generation_executor import get_generation_executor
+from app.services.precompressed import PrecompressedBody, precompressed_response
+from app.services.rank_index import get_rank_index
+from app.services.sorted_index import Page, SortedIndex, SortKey, decode_cursor
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(verify_admin_token)])
 
-# Sort column allowlists: query param name -> actual SQL column reference
-_TERM_SORT_COLUMNS: dict[str, str] = {
-    "id": "id",
-    "name": "name",
-    "category": "category",
-    "tier": "tier",
+# Sort column allowlists for the cache-served lists: query param name -> sort key
+# (ties broken by id so every order is total and usable as a keyset cursor).
+# Strings compare by code point, which is the same order as ORDER BY under the
+# C collation the database is initialized with (docker-compose / CI: --locale=C).
+_TERM_SORT_KEYS: dict[str, Callable[[Term], SortKey]] = {
+    "id": lambda t: (t.id, t.id),
+    "name": lambda t: (t.name, t.id),
+    "category": lambda t: (t.category, t.id),
+    "tier": lambda t: (t.tier, t.id),
 }
-_EDGE_SORT_COLUMNS: dict[str, str] = {
-    "id": "e.id",
-    "keyword": "e.keyword",
-    "difficulty": "e.difficulty",
+_EDGE_SORT_KEYS: dict[str, Callable[[Edge], SortKey]] = {
+    "id": lambda e: (e.id, e.id),
+    "keyword": lambda e: (e.keyword, e.id),
+    "difficulty": lambda e: (e.difficulty, e.id),
 }
+# Sort column allowlist for SQL lists: query param name -> actual SQL column reference
 _GAME_SORT_COLUMNS: dict[str, str] = {
     "id": "id",
     "score": "score",
@@ -51,21 +64,68 @@ def build_order_clause(sort_by: str, order: str, allowed: dict[str, str]) -> str
     return f"ORDER BY {allowed[sort_by]} {direction}"
 
 
-def refresh_cache():
-    """Refresh the data cache after CRUD operations"""
-    cache = get_cache()
-    cache.load_from_db()
+def _cached_page(
+    kind: str,
+    sort_keys: dict[str, Callable],
+    sort_by: str,
+    sort_order: str,
+    skip: int,
+    limit: int,
+    cursor: Optional[str],
+    snapshot: Optional[CacheSnapshot] = None,
+) -> Page:
+    """Slice one page of cached terms or edges from a sorted index built once per cache version"""
+    if sort_by not in sort_keys:
+        raise HTTPException(status_code=400, detail=f"Invalid sort field: {sort_by}")
+    snapshot = snapshot or get_cache().snapshot()
+    key = sort_keys[sort_by]
 
+    def build(s: CacheSnapshot) -> SortedIndex:
+        items = s.terms.values() if kind == "terms" else s.edges
+        return SortedIndex(items, key)
 
-# ========== Terms CRUD ==========
+    index = snapshot.get_derived(f"admin_{kind}_by_{sort_by}", build)
+    try:
+        after = decode_cursor(cursor) if cursor else None
+        return index.page(limit, skip, descending=sort_order.upper() == "DESC", after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
 
 
-@router.get("/terms/all")
-async def list_all_terms():
-    """Get all terms from cache (for client-side caching)"""
-    cache = get_cache()
+def _normalize_tier(tier: int) -> int:
+    """Clamp a requested tier to 1-3 (anything other than 1 or 3 becomes 2)"""
+    return 1 if tier == 1 else 3 if tier == 3 else 2
 
-    return [
+
+def _term_from_row(row) -> Term:
+    """Build a cache Term from an `id, name, tier, category, description` row"""
+    return Term(
+        id=row[0],
+        name=row[1],
+        tier=row[2],
+        category=row[3],
+        description=row[4] or "",
+    )
+
+
+def _edge_from_row(row) -> Edge:
+    """Build a cache Edge from an `id, term_a, term_b, difficulty, keyword, description` row"""
+    return Edge(
+        id=row[0],
+        term_a=row[1],
+        term_b=row[2],
+        difficulty=row[3],
+        keyword=row[4] or "",
+        description=row[5] or "",
+    )
+
+
+# ========== Terms CRUD ==========
+
+
+def _all_terms_body(snapshot: CacheSnapshot) -> PrecompressedBody:
+    """Encode the full term list once per cache version"""
+    return PrecompressedBody.encode([
         {
             "id": term.id,
             "name": term.name,
@@ -73,8 +133,22 @@ async def list_all_terms():
             "category": term.category,
             "description": term.description,
         }
-        for term in sorted(cache.terms.values(), key=lambda t: t.tier)
-    ]
+        for term in sorted(snapshot.terms.values(), key=lambda t: t.tier)
+    ])
+
+
+@router.get("/terms/all")
+async def list_all_terms(
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """Get all terms from cache (for client-side caching)
+
+    The body is encoded and gzipped once per cache version; a matching
+    If-None-Match returns 304.
+    """
+    payload = get_cache().snapshot().get_derived("admin_terms_all", _all_terms_body)
+    return precompressed_response(payload, if_none_match, accept_encoding)
 
 
 @router.get("/terms", response_model=PaginatedResponse)
@@ -83,42 +157,33 @@ async def list_terms(
     limit: int = Query(10, ge=1, le=100),
     sort_by: str = Query("id"),
     sort_order: str = Query("asc"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None),
 ):
-    """Get paginated list of terms"""
-    order_clause = build_order_clause(sort_by, sort_order, _TERM_SORT_COLUMNS)
-
-    count_result = db.execute(text("SELECT COUNT(*) FROM terms"))
-    total = count_result.scalar()
-
-    query = text(f"""
-        SELECT id, name, tier, category, description
-        FROM terms
-        {order_clause}
-        LIMIT :limit OFFSET :skip
-    """)
-    result = db.execute(query, {"limit": limit, "skip": skip})
-    rows = result.fetchall()
+    """Get paginated list of terms (served from the cache)
 
+    Pass `next_cursor` from the previous page as `cursor` for keyset paging;
+    `skip` is then counted from the cursor position.
+    """
+    page = _cached_page("terms", _TERM_SORT_KEYS, sort_by, sort_order, skip, limit, cursor)
     items = [
         {
-            "id": row[0],
-            "name": row[1],
-            "tier": row[2],
-            "category": row[3],
-            "description": row[4],
+            "id": term.id,
+            "name": term.name,
+            "tier": term.tier,
+            "category": term.category,
+            "description": term.description,
         }
-        for row in rows
+        for term in page.items
     ]
 
-    return {"items": items, "total": total}
+    return {"items": items, "total": page.total, "next_cursor": page.next_cursor}
 
 
 @router.get("/terms/{term_id}", response_model=TermResponse)
-async def get_term(term_id: int, db: Session = Depends(get_db)):
+async def get_term(term_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a single term by ID"""
     query = text("SELECT id, name, tier, category, description FROM terms WHERE id = :id")
-    result = db.execute(query, {"id": term_id})
+    result = await db.execute(query, {"id": term_id})
     row = result.fetchone()
 
     if not row:
@@ -134,7 +199,7 @@ async def get_term(term_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/terms/{term_id}/edges")
-async def get_term_edges(term_id: int, db: Session = Depends(get_db)):
+async def get_term_edges(term_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get all edges connected to a term"""
     query = text("""
         SELECT
@@ -146,7 +211,7 @@ async def get_term_edges(term_id: int, db: Session = Depends(get_db)):
         WHERE e.term_a = :term_id OR e.term_b = :term_id
         ORDER BY e.id
     """)
-    result = db.execute(query, {"term_id": term_id})
+    result = await db.execute(query, {"term_id": term_id})
     rows = result.fetchall()
 
     return [
@@ -165,16 +230,16 @@ async def get_term_edges(term_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/terms", response_model=TermResponse)
-async def create_term(term: TermCreate, db: Session = Depends(get_db)):
+async def create_term(term: TermCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new term"""
-    tier = 1 if term.tier == 1 else 3 if term.tier == 3 else 2
+    tier = _normalize_tier(term.tier)
 
     query = text("""
         INSERT INTO terms (name, tier, category, description)
         VALUES (:name, :tier, :category, :description)
         RETURNING id, name, tier, category, description
     """)
-    result = db.execute(
+    result = await db.execute(
         query,
         {
             "name": term.name,
@@ -183,10 +248,10 @@ async def create_term(term: TermCreate, db: Session = Depends(get_db)):
             "description": term.description,
         },
     )
-    db.commit()
+    await db.commit()
     row = result.fetchone()
 
-    refresh_cache()
+    get_cache().upsert_term(_term_from_row(row))
 
     return {
         "id": row[0],
@@ -198,9 +263,9 @@ async def create_term(term: TermCreate, db: Session = Depends(get_db)):
 
 
 @router.put("/terms/{term_id}", response_model=TermResponse)
-async def update_term(term_id: int, term: TermUpdate, db: Session = Depends(get_db)):
+async def update_term(term_id: int, term: TermUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update an existing term"""
-    tier = 1 if term.tier == 1 else 3 if term.tier == 3 else 2
+    tier = _normalize_tier(term.tier)
 
     query = text("""
         UPDATE terms
@@ -208,7 +273,7 @@ async def update_term(term_id: int, term: TermUpdate, db: Session = Depends(get_
         WHERE id = :id
         RETURNING id, name, tier, category, description
     """)
-    result = db.execute(
+    result = await db.execute(
         query,
         {
             "id": term_id,
@@ -218,13 +283,13 @@ async def update_term(term_id: int, term: TermUpdate, db: Session = Depends(get_
             "description": term.description,
         },
     )
-    db.commit()
+    await db.commit()
     row = result.fetchone()
 
     if not row:
         raise HTTPException(status_code=404, detail="Term not found")
 
-    refresh_cache()
+    get_cache().upsert_term(_term_from_row(row))
 
     return {
         "id": row[0],
@@ -236,17 +301,17 @@ async def update_term(term_id: int, term: TermUpdate, db: Session = Depends(get_
 
 
 @router.delete("/terms/{term_id}")
-async def delete_term(term_id: int, db: Session = Depends(get_db)):
+async def delete_term(term_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a term"""
-    check = db.execute(text("SELECT id FROM terms WHERE id = :id"), {"id": term_id})
+    check = await db.execute(text("SELECT id FROM terms WHERE id = :id"), {"id": term_id})
     if not check.fetchone():
         raise HTTPException(status_code=404, detail="Term not found")
 
-    db.execute(text("DELETE FROM edges WHERE term_a = :id OR term_b = :id"), {"id": term_id})
-    db.execute(text("DELETE FROM terms WHERE id = :id"), {"id": term_id})
-    db.commit()
+    await db.execute(text("DELETE FROM edges WHERE term_a = :id OR term_b = :id"), {"id": term_id})
+    await db.execute(text("DELETE FROM terms WHERE id = :id"), {"id": term_id})
+    await db.commit()
 
-    refresh_cache()
+    get_cache().delete_term(term_id)
 
     return {"message": "Term deleted"}
 
@@ -254,26 +319,38 @@ async def delete_term(term_id: int, db: Session = Depends(get_db)):
 # ========== Edges CRUD ==========
 
 
+def _edge_row(snapshot: CacheSnapshot, edge: Edge) -> dict:
+    """Edge list row with term names (empty if a term is missing from the snapshot)"""
+    from_term = snapshot.get_term(edge.term_a)
+    to_term = snapshot.get_term(edge.term_b)
+    return {
+        "id": edge.id,
+        "from_term_id": edge.term_a,
+        "to_term_id": edge.term_b,
+        "keyword": edge.keyword,
+        "description": edge.description,
+        "difficulty": edge.difficulty,
+        "from_term_name": from_term.name if from_term else "",
+        "to_term_name": to_term.name if to_term else "",
+    }
+
+
+def _all_edges_body(snapshot: CacheSnapshot) -> PrecompressedBody:
+    """Encode the full edge list (with term names) once per cache version"""
+    return PrecompressedBody.encode([_edge_row(snapshot, edge) for edge in snapshot.edges])
+
+
 @router.get("/edges/all")
-async def list_all_edges():
-    """Get all edges from cache (for client-side caching)"""
-    cache = get_cache()
-
-    def _edge_row(edge):
-        from_term = cache.get_term(edge.term_a)
-        to_term = cache.get_term(edge.term_b)
-        return {
-            "id": edge.id,
-            "from_term_id": edge.term_a,
-            "to_term_id": edge.term_b,
-            "keyword": edge.keyword,
-            "description": edge.description,
-            "difficulty": edge.difficulty,
-            "from_term_name": from_term.name if from_term else "",
-            "to_term_name": to_term.name if to_term else "",
-        }
+async def list_all_edges(
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    """Get all edges from cache (for client-side caching)
 
-    return [_edge_row(edge) for edge in cache.edges]
+    Same caching as /terms/all: precompressed per cache version, ETag/304.
+    """
+    payload = get_cache().snapshot().get_derived("admin_edges_all", _all_edges_body)
+    return precompressed_response(payload, if_none_match, accept_encoding)
 
 
 @router.get("/edges", response_model=PaginatedResponse)
@@ -282,46 +359,21 @@ async def list_edges(
     limit: int = Query(10, ge=1, le=100),
     sort_by: str = Query("id"),
     sort_order: str = Query("asc"),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None),
 ):
-    """Get paginated list of edges with term names"""
-    order_clause = build_order_clause(sort_by, sort_order, _EDGE_SORT_COLUMNS)
-
-    count_result = db.execute(text("SELECT COUNT(*) FROM edges"))
-    total = count_result.scalar()
+    """Get paginated list of edges with term names (served from the cache)
 
-    query = text(f"""
-        SELECT
-            e.id, e.term_a, e.term_b, e.keyword, e.description, e.difficulty,
-            t1.name as from_name, t2.name as to_name
-        FROM edges e
-        JOIN terms t1 ON e.term_a = t1.id
-        JOIN terms t2 ON e.term_b = t2.id
-        {order_clause}
-        LIMIT :limit OFFSET :skip
-    """)
-    result = db.execute(query, {"limit": limit, "skip": skip})
-    rows = result.fetchall()
-
-    items = [
-        {
-            "id": row[0],
-            "from_term_id": row[1],
-            "to_term_id": row[2],
-            "keyword": row[3],
-            "description": row[4],
-            "difficulty": row[5],
-            "from_term_name": row[6],
-            "to_term_name": row[7],
-        }
-        for row in rows
-    ]
+    Paging works as in list_terms.
+    """
+    snapshot = get_cache().snapshot()
+    page = _cached_page("edges", _EDGE_SORT_KEYS, sort_by, sort_order, skip, limit, cursor, snapshot)
+    items = [_edge_row(snapshot, edge) for edge in page.items]
 
-    return {"items": items, "total": total}
+    return {"items": items, "total": page.total, "next_cursor": page.next_cursor}
 
 
 @router.get("/edges/{edge_id}", response_model=EdgeResponse)
-async def get_edge(edge_id: int, db: Session = Depends(get_db)):
+async def get_edge(edge_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a single edge by ID"""
     query = text("""
         SELECT
@@ -332,7 +384,7 @@ async def get_edge(edge_id: int, db: Session = Depends(get_db)):
         JOIN terms t2 ON e.term_b = t2.id
         WHERE e.id = :id
     """)
-    result = db.execute(query, {"id": edge_id})
+    result = await db.execute(query, {"id": edge_id})
     row = result.fetchone()
 
     if not row:
@@ -351,7 +403,7 @@ async def get_edge(edge_id: int, db: Session = Depends(get_db)):
 
 
 @router.post("/edges", response_model=EdgeResponse)
-async def create_edge(edge: EdgeCreate, db: Session = Depends(get_db)):
+async def create_edge(edge: EdgeCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new edge"""
     term_a = min(edge.from_term_id, edge.to_term_id)
     term_b = max(edge.from_term_id, edge.to_term_id)
@@ -362,10 +414,10 @@ async def create_edge(edge: EdgeCreate, db: Session = Depends(get_db)):
     query = text("""
         INSERT INTO edges (term_a, term_b, keyword, description, difficulty)
         VALUES (:term_a, :term_b, :keyword, :description, :difficulty)
-        RETURNING id
+        RETURNING id, term_a, term_b, difficulty, keyword, description
     """)
     try:
-        result = db.execute(
+        result = await db.execute(
             query,
             {
                 "term_a": term_a,
@@ -375,9 +427,9 @@ async def create_edge(edge: EdgeCreate, db: Session = Depends(get_db)):
                 "difficulty": edge.difficulty,
             },
         )
-        db.commit()
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         # 内部例外詳細はサーバーログへ。クライアントには固定メッセージで返す
         logger.exception("Failed to create edge (term_a=%s, term_b=%s)", term_a, term_b)
         raise HTTPException(
@@ -385,14 +437,14 @@ async def create_edge(edge: EdgeCreate, db: Session = Depends(get_db)):
             detail="Failed to create edge (duplicate or invalid term reference)",
         ) from e
 
-    edge_id = result.fetchone()[0]
-    refresh_cache()
+    row = result.fetchone()
+    get_cache().upsert_edge(_edge_from_row(row))
 
-    return await get_edge(edge_id, db)
+    return await get_edge(row[0], db)
 
 
 @router.put("/edges/{edge_id}", response_model=EdgeResponse)
-async def update_edge(edge_id: int, edge: EdgeUpdate, db: Session = Depends(get_db)):
+async def update_edge(edge_id: int, edge: EdgeUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update an existing edge"""
     term_a = min(edge.from_term_id, edge.to_term_id)
     term_b = max(edge.from_term_id, edge.to_term_id)
@@ -402,9 +454,9 @@ async def update_edge(edge_id: int, edge: EdgeUpdate, db: Session = Depends(get_
         SET term_a = :term_a, term_b = :term_b, keyword = :keyword,
             description = :description, difficulty = :difficulty
         WHERE id = :id
-        RETURNING id
+        RETURNING id, term_a, term_b, difficulty, keyword, description
     """)
-    result = db.execute(
+    result = await db.execute(
         query,
         {
             "id": edge_id,
@@ -415,32 +467,398 @@ async def update_edge(edge_id: int, edge: EdgeUpdate, db: Session = Depends(get_
             "difficulty": edge.difficulty,
         },
     )
-    db.commit()
+    await db.commit()
     row = result.fetchone()
 
     if not row:
         raise HTTPException(status_code=404, detail="Edge not found")
 
-    refresh_cache()
+    get_cache().upsert_edge(_edge_from_row(row))
 
     return await get_edge(edge_id, db)
 
 
 @router.delete("/edges/{edge_id}")
-async def delete_edge(edge_id: int, db: Session = Depends(get_db)):
+async def delete_edge(edge_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete an edge"""
-    check = db.execute(text("SELECT id FROM edges WHERE id = :id"), {"id": edge_id})
+    check = await db.execute(text("SELECT id FROM edges WHERE id = :id"), {"id": edge_id})
     if not check.fetchone():
         raise HTTPException(status_code=404, detail="Edge not found")
 
-    db.execute(text("DELETE FROM edges WHERE id = :id"), {"id": edge_id})
-    db.commit()
+    await db.execute(text("DELETE FROM edges WHERE id = :id"), {"id": edge_id})
+    await db.commit()
 
-    refresh_cache()
+    get_cache().delete_edge(edge_id)
 
     return {"message": "Edge deleted"}
 
 
+# ========== Bulk changes ==========
+
+
+class _BulkErrors:
+    """Per-item validation errors, reported in FastAPI's 422 `loc`/`msg` shape"""
+
+    def __init__(self):
+        self.items: list[dict] = []
+
+    def add(self, target: str, op: str, index: int, msg: str):
+        self.items.append({"loc": ["body", target, op, index], "msg": msg})
+
+
+def _resolve_endpoints(
+    edge: BulkEdgeCreate,
+    refs: set[str],
+    errors: _BulkErrors,
+    op: str,
+    index: int,
+) -> Optional[tuple[int | str, int | str]]:
+    """Return (from, to) as term ids or batch refs, recording an error if unusable"""
+    endpoints = []
+    for term_id, ref in ((edge.from_term_id, edge.from_term_ref), (edge.to_term_id, edge.to_term_ref)):
+        if (term_id is None) == (ref is None):
+            errors.add("edges", op, index, "Give exactly one of term id or term ref for each endpoint")
+            return None
+        if ref is not None and ref not in refs:
+            errors.add("edges", op, index, f"Unknown term ref: {ref}")
+            return None
+        endpoints.append(ref if ref is not None else term_id)
+    if endpoints[0] == endpoints[1]:
+        errors.add("edges", op, index, "Cannot create edge between same terms")
+        return None
+    return endpoints[0], endpoints[1]
+
+
+def _pair_key(pair: tuple[int | str, int | str]) -> tuple:
+    """Order-independent key for an edge's endpoints (ids ascending, then refs)"""
+    return (*sorted(e for e in pair if isinstance(e, int)), *sorted(e for e in pair if isinstance(e, str)))
+
+
+async def _validate_bulk(changes: BulkRequest, db: AsyncSession) -> list[dict]:
+    """Check every item against the current DB state without writing anything"""
+    errors = _BulkErrors()
+    terms, edges = changes.terms, changes.edges
+
+    refs: set[str] = set()
+    for i, term in enumerate(terms.create):
+        if term.ref is not None:
+            if term.ref in refs:
+                errors.add("terms", "create", i, f"Duplicate term ref: {term.ref}")
+            refs.add(term.ref)
+
+    edge_endpoints = {
+        op: [_resolve_endpoints(edge, refs, errors, op, i) for i, edge in enumerate(items)]
+        for op, items in (("create", edges.create), ("update", edges.update))
+    }
+
+    # Look up every referenced term and edge with one query each
+    term_ids = {t.id for t in terms.update} | set(terms.delete) | {
+        endpoint
+        for pairs in edge_endpoints.values()
+        for pair in pairs if pair is not None
+        for endpoint in pair if isinstance(endpoint, int)
+    }
+    existing_terms: set[int] = set()
+    if term_ids:
+        result = await db.execute(
+            text("SELECT id FROM terms WHERE id = ANY(CAST(:ids AS integer[]))"),
+            {"ids": sorted(term_ids)},
+        )
+        existing_terms = {row[0] for row in result}
+
+    edge_ids = {e.id for e in edges.update} | set(edges.delete)
+    existing_edges: dict[int, tuple[int, int]] = {}
+    if edge_ids:
+        result = await db.execute(
+            text("SELECT id, term_a, term_b FROM edges WHERE id = ANY(CAST(:ids AS integer[]))"),
+            {"ids": sorted(edge_ids)},
+        )
+        existing_edges = {row[0]: (row[1], row[2]) for row in result}
+
+    deleted_terms = set(terms.delete)
+    for op, ids in (("update", [t.id for t in terms.update]), ("delete", terms.delete)):
+        seen: set[int] = set()
+        for i, term_id in enumerate(ids):
+            if term_id not in existing_terms:
+                errors.add("terms", op, i, f"Term {term_id} not found")
+            elif term_id in seen:
+                errors.add("terms", op, i, f"Term {term_id} appears more than once")
+            elif op == "update" and term_id in deleted_terms:
+                errors.add("terms", op, i, f"Term {term_id} is also being deleted")
+            seen.add(term_id)
+
+    # Edges that will be gone before creates/updates run: explicit deletes
+    # plus edges attached to deleted terms
+    removed_edges = set(edges.delete) | {
+        edge_id for edge_id, (a, b) in existing_edges.items()
+        if a in deleted_terms or b in deleted_terms
+    }
+    seen_edges: set[int] = set()
+    for i, edge_id in enumerate(edges.delete):
+        if edge_id not in existing_edges:
+            errors.add("edges", "delete", i, f"Edge {edge_id} not found")
+        elif edge_id in seen_edges:
+            errors.add("edges", "delete", i, f"Edge {edge_id} appears more than once")
+        seen_edges.add(edge_id)
+    seen_edges = set()
+    for i, edge in enumerate(edges.update):
+        if edge.id not in existing_edges:
+            errors.add("edges", "update", i, f"Edge {edge.id} not found")
+            edge_endpoints["update"][i] = None
+        elif edge.id in seen_edges:
+            errors.add("edges", "update", i, f"Edge {edge.id} appears more than once")
+            edge_endpoints["update"][i] = None
+        elif edge.id in removed_edges:
+            errors.add("edges", "update", i, f"Edge {edge.id} is also being deleted")
+            edge_endpoints["update"][i] = None
+        seen_edges.add(edge.id)
+
+    # Endpoint terms must exist and survive the batch; pairs must stay unique
+    pairs: dict[tuple, tuple[str, int]] = {}
+    id_pairs: set[tuple[int, int]] = set()
+    for op, endpoints in edge_endpoints.items():
+        for i, pair in enumerate(endpoints):
+            if pair is None:
+                continue
+            missing = [
+                e for e in pair
+                if isinstance(e, int) and (e not in existing_terms or e in deleted_terms)
+            ]
+            if missing:
+                errors.add("edges", op, i, f"Term {missing[0]} not found or being deleted")
+                continue
+            key = _pair_key(pair)
+            if key in pairs:
+                other_op, other_index = pairs[key]
+                errors.add("edges", op, i, f"Same terms as edges.{other_op}[{other_index}]")
+                continue
+            pairs[key] = (op, i)
+            if all(isinstance(e, int) for e in key):
+                id_pairs.add(key)
+
+    if id_pairs:
+        term_a, term_b = zip(*sorted(id_pairs))
+        result = await db.execute(
+            text("""
+                SELECT id, term_a, term_b FROM edges
+                WHERE (term_a, term_b) IN (
+                    SELECT * FROM unnest(CAST(:term_a AS integer[]), CAST(:term_b AS integer[]))
+                )
+            """),
+            {"term_a": list(term_a), "term_b": list(term_b)},
+        )
+        for edge_id, a, b in result:
+            op, i = pairs[(a, b)]
+            updating_self = op == "update" and edges.update[i].id == edge_id
+            if edge_id not in removed_edges and not updating_self:
+                errors.add("edges", op, i, f"Edge between terms {a} and {b} already exists")
+
+    return sorted(errors.items, key=lambda e: e["loc"][1:])
+
+
+def _edge_columns(items, term_ids: dict) -> dict[str, list]:
+    """Column arrays for an unnest() of edges, resolving refs to the new term ids"""
+    term_a, term_b = [], []
+    for edge in items:
+        ends = [
+            term_ids[ref] if ref is not None else term_id
+            for term_id, ref in ((edge.from_term_id, edge.from_term_ref), (edge.to_term_id, edge.to_term_ref))
+        ]
+        term_a.append(min(ends))
+        term_b.append(max(ends))
+    return {
+        "term_a": term_a,
+        "term_b": term_b,
+        "difficulty": [e.difficulty for e in items],
+        "keyword": [e.keyword for e in items],
+        "description": [e.description for e in items],
+    }
+
+
+def _term_columns(items) -> dict[str, list]:
+    """Column arrays for an unnest() of terms"""
+    return {
+        "name": [t.name for t in items],
+        "tier": [_normalize_tier(t.tier) for t in items],
+        "category": [t.category for t in items],
+        "description": [t.description for t in items],
+    }
+
+
+@router.post("/bulk", response_model=BulkResponse)
+async def bulk_changes(changes: BulkRequest, db: AsyncSession = Depends(get_async_db)):
+    """Apply a batch of term and edge creates, updates and deletes in one transaction
+
+    All items are validated up front; if any is invalid nothing is written and
+    the response is 422 with one `{loc, msg}` entry per failing item. Otherwise
+    each kind of change runs as a single multi-row statement, in the same order
+    as DataCache.apply_changes (edge deletes, term deletes, term upserts, edge
+    upserts), and the cache is updated once after commit.
+
+    Edges may reference terms created in the same batch through `ref`.
+    """
+    terms, edges = changes.terms, changes.edges
+    total = sum(len(items) for group in (terms, edges) for items in (group.create, group.update, group.delete))
+    if total > settings.admin_bulk_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many changes ({total} > {settings.admin_bulk_max_items})",
+        )
+
+    errors = await _validate_bulk(changes, db)
+    if errors:
+        raise HTTPException(status_code=422, detail=errors)
+
+    upserted_terms: list[Term] = []
+    upserted_edges: list[Edge] = []
+    deleted_edges = 0
+    created_term_ids: list[int] = []
+    created_edge_ids: list[int] = []
+    try:
+        if edges.delete or terms.delete:
+            result = await db.execute(
+                text("""
+                    DELETE FROM edges
+                    WHERE id = ANY(CAST(:edge_ids AS integer[]))
+                       OR term_a = ANY(CAST(:term_ids AS integer[]))
+                       OR term_b = ANY(CAST(:term_ids AS integer[]))
+                    RETURNING id
+                """),
+                {"edge_ids": edges.delete, "term_ids": terms.delete},
+            )
+            deleted_edges = len(result.fetchall())
+        if terms.delete:
+            await db.execute(
+                text("DELETE FROM terms WHERE id = ANY(CAST(:ids AS integer[]))"),
+                {"ids": terms.delete},
+            )
+
+        if terms.update:
+            result = await db.execute(
+                text("""
+                    UPDATE terms t
+                    SET name = v.name, tier = v.tier, category = v.category, description = v.description
+                    FROM unnest(
+                        CAST(:id AS integer[]), CAST(:name AS varchar[]), CAST(:tier AS integer[]),
+                        CAST(:category AS varchar[]), CAST(:description AS text[])
+                    ) AS v(id, name, tier, category, description)
+                    WHERE t.id = v.id
+                    RETURNING t.id, t.name, t.tier, t.category, t.description
+                """),
+                {"id": [t.id for t in terms.update], **_term_columns(terms.update)},
+            )
+            upserted_terms += [_term_from_row(row) for row in result]
+
+        if terms.create:
+            # Reserve ids first so request order maps to ids (and refs) deterministically
+            result = await db.execute(
+                text("SELECT nextval(pg_get_serial_sequence('terms', 'id')) FROM generate_series(1, :n)"),
+                {"n": len(terms.create)},
+            )
+            created_term_ids = [row[0] for row in result]
+            result = await db.execute(
+                text("""
+                    INSERT INTO terms (id, name, tier, category, description)
+                    SELECT * FROM unnest(
+                        CAST(:id AS integer[]), CAST(:name AS varchar[]), CAST(:tier AS integer[]),
+                        CAST(:category AS varchar[]), CAST(:description AS text[])
+                    )
+                    RETURNING id, name, tier, category, description
+                """),
+                {"id": created_term_ids, **_term_columns(terms.create)},
+            )
+            upserted_terms += [_term_from_row(row) for row in result]
+
+        term_refs = {
+            term.ref: term_id
+            for term, term_id in zip(terms.create, created_term_ids)
+            if term.ref is not None
+        }
+
+        if edges.update:
+            result = await db.execute(
+                text("""
+                    UPDATE edges e
+                    SET term_a = v.term_a, term_b = v.term_b, difficulty = v.difficulty,
+                        keyword = v.keyword, description = v.description
+                    FROM unnest(
+                        CAST(:id AS integer[]), CAST(:term_a AS integer[]), CAST(:term_b AS integer[]),
+                        CAST(:difficulty AS varchar[]), CAST(:keyword AS varchar[]),
+                        CAST(:description AS text[])
+                    ) AS v(id, term_a, term_b, difficulty, keyword, description)
+                    WHERE e.id = v.id
+                    RETURNING e.id, e.term_a, e.term_b, e.difficulty, e.keyword, e.description
+                """),
+                {"id": [e.id for e in edges.update], **_edge_columns(edges.update, term_refs)},
+            )
+            upserted_edges += [_edge_from_row(row) for row in result]
+
+        if edges.create:
+            result = await db.execute(
+                text("SELECT nextval(pg_get_serial_sequence('edges', 'id')) FROM generate_series(1, :n)"),
+                {"n": len(edges.create)},
+            )
+            created_edge_ids = [row[0] for row in result]
+            result = await db.execute(
+                text("""
+                    INSERT INTO edges (id, term_a, term_b, difficulty, keyword, description)
+                    SELECT * FROM unnest(
+                        CAST(:id AS integer[]), CAST(:term_a AS integer[]), CAST(:term_b AS integer[]),
+                        CAST(:difficulty AS varchar[]), CAST(:keyword AS varchar[]),
+                        CAST(:description AS text[])
+                    )
+                    RETURNING id, term_a, term_b, difficulty, keyword, description
+                """),
+                {"id": created_edge_ids, **_edge_columns(edges.create, term_refs)},
+            )
+            upserted_edges += [_edge_from_row(row) for row in result]
+
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        # Validation passed, so this is a concurrent edit or an invalid value
+        logger.exception("Bulk changes failed (%d items)", total)
+        raise HTTPException(
+            status_code=409,
+            detail="Bulk changes failed (conflicting concurrent edit or invalid value)",
+        ) from e
+
+    get_cache().apply_changes(
+        upsert_terms=upserted_terms,
+        delete_terms=terms.delete,
+        upsert_edges=upserted_edges,
+        delete_edges=edges.delete,
+    )
+
+    return BulkResponse(
+        created_term_ids=created_term_ids,
+        term_refs=term_refs,
+        created_edge_ids=created_edge_ids,
+        updated_terms=len(terms.update),
+        updated_edges=len(edges.update),
+        deleted_terms=len(terms.delete),
+        deleted_edges=deleted_edges,
+    )
+
+
+# ========== Metrics ==========
+
+
+@router.get("/metrics/generation")
+async def generation_metrics():
+    """Route/distractor generation worker pool: concurrency, queue depth and wait times"""
+    return get_generation_executor().metrics()
+
+
+@router.get("/metrics/db-pool")
+async def db_pool_metrics():
+    """Connection pool occupancy and checkout wait times for both engines"""
+    return {
+        "async": pool_status(async_engine.pool),
+        "sync": pool_status(engine.pool),
+    }
+
+
 # ========== Games (Read-only) ==========
 
 
@@ -450,12 +868,12 @@ async def list_games(
     limit: int = Query(10, ge=1, le=100),
     sort_by: str = Query("created_at"),
     sort_order: str = Query("desc"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Get paginated list of games"""
     order_clause = build_order_clause(sort_by, sort_order, _GAME_SORT_COLUMNS)
 
-    count_result = db.execute(text("SELECT COUNT(*) FROM games"))
+    count_result = await db.execute(text("SELECT COUNT(*) FROM games"))
     total = count_result.scalar()
 
     query = text(f"""
@@ -465,7 +883,7 @@ async def list_games(
         {order_clause}
         LIMIT :limit OFFSET :skip
     """)
-    result = db.execute(query, {"limit": limit, "skip": skip})
+    result = await db.execute(query, {"limit": limit, "skip": skip})
     rows = result.fetchall()
 
     items = [
@@ -487,7 +905,7 @@ async def list_games(
 
 
 @router.get("/games/{game_id}")
-async def get_game(game_id: str, db: Session = Depends(get_db)):
+async def get_game(game_id: str, db: AsyncSession = Depends(get_async_db)):
     """Get a single game by ID"""
     query = text("""
         SELECT id, difficulty, score, terms, cleared_steps, lives,
@@ -495,7 +913,7 @@ async def get_game(game_id: str, db: Session = Depends(get_db)):
         FROM games
         WHERE id = :id
     """)
-    result = db.execute(query, {"id": game_id})
+    result = await db.execute(query, {"id": game_id})
     row = result.fetchone()
 
     if not row:
@@ -519,13 +937,31 @@ async def get_game(game_id: str, db: Session = Depends(get_db)):
 
 
 @router.delete("/games/{game_id}")
-async def delete_game(game_id: str, db: Session = Depends(get_db)):
+async def delete_game(game_id: str, db: AsyncSession = Depends(get_async_db)):
     """Delete a game"""
-    check = db.execute(text("SELECT id FROM games WHERE id = :id"), {"id": game_id})
+    check = await db.execute(text("SELECT id FROM games WHERE id = :id"), {"id": game_id})
     if not check.fetchone():
         raise HTTPException(status_code=404, detail="Game not found")
 
-    db.execute(text("DELETE FROM games WHERE id = :id"), {"id": game_id})
-    db.commit()
+    # leaderboard の行は外部キーで一緒に消える。載っていた場合はメモリ内のランキングからも外す
+    result = await db.execute(
+        text("""
+            WITH ranked AS (
+                SELECT total_steps, score FROM leaderboard WHERE game_id = :id
+            ),
+            deleted AS (
+                DELETE FROM games WHERE id = :id
+            )
+            SELECT total_steps, score, pg_current_xact_id()::text AS xid FROM ranked
+        """),
+        {"id": game_id},
+    )
+    ranked = result.fetchone()
+    await db.commit()
+
+    if ranked is not None:
+        get_rank_index().remove(
+            game_id, ranked.total_steps, ranked.score, xid=int(ranked.xid)
+        )
 
     return {"message": "Game deleted"}
@@ -1,36 +1,51 @@
 """ゲーム関連のAPIエンドポイント（キャッシュ版）"""
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from uuid import UUID, uuid4
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
 
-from app.database import get_db
+from app.database import get_async_db
 from app.schemas import (
     GameStartRequest,
-    TermResponse,
-    ChoiceResponse,
     GameResultRequest,
     GameResultResponse,
     GameUpdateRequest,
     OverallRankingResponse,
+    PeriodRankingResponse,
     RankingEntry,
-    RouteStepWithChoices,
+    RankingPeriod,
     FullRouteStartResponse,
+    CompactRouteStartResponse,
+    GameDictionaryResponse,
 )
-from app.services.route_generator import generate_route
-from app.services.distractor_generator import generate_distractors
 from app.services.cache import get_cache
-import random
+from app.services.game_generator import generate_game
+from app.services.generation_executor import GenerationOverloadedError, get_generation_executor
+from app.services.rank_index import get_rank_index
+from app.services.route_pool import get_route_pool
+from app.services.start_payload import (
+    build_compact_start_payload,
+    build_start_payload,
+    get_dictionary,
+)
+from app.services.precompressed import precompressed_response
 
 router = APIRouter(prefix="/games", tags=["games"])
 
 RANKING_LIMIT = 10  # 上位何件を返すか
+# 版付きURLの辞書は内容が変わらないので1年キャッシュさせる
+DICTIONARY_IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# 版なしURLの辞書は毎回検証させる（変わっていなければ304）
+DICTIONARY_CACHE_CONTROL = "public, no-cache"
 LIFE_BONUS = {"easy": 100, "normal": 200, "hard": 300}
+# 期間別ランキングの区切り（DBの leaderboard_period_start() と揃える）
+RANKING_TIMEZONE = ZoneInfo("Asia/Tokyo")
 
 
-def get_rankings_and_my_rank(
-    db: Session,
+async def get_rankings_and_my_rank(
+    db: AsyncSession,
     my_score: int,
     total_steps: int | None = None,
     limit: int = RANKING_LIMIT
@@ -47,15 +62,53 @@ def get_rankings_and_my_rank(
     Returns:
         (ランキングリスト, 自分の順位)
     """
-    ranking_result = db.execute(
-        text("""
+    # メモリ内のインデックスから引ける分はDBに問い合わせない
+    index = get_rank_index()
+    my_rank = index.rank(my_score, total_steps)
+    top = index.top(limit, total_steps)
+    if top is not None and my_rank is not None:
+        rankings = [
+            RankingEntry(
+                rank=i + 1,
+                user_name=entry.user_name,
+                score=entry.score,
+                cleared_steps=entry.cleared_steps
+            )
+            for i, entry in enumerate(top)
+        ]
+        return rankings, my_rank
+
+    # leaderboard テーブルから取得（結果送信時に反映済み）
+    # 問題数の有無でクエリを分け、どちらも (total_steps,) score DESC のインデックスで引けるようにする
+    if total_steps is None:
+        ranking_query = text("""
             SELECT user_name, score, cleared_steps
-            FROM games
-            WHERE (:total_steps IS NULL OR array_length(terms, 1) - 1 = :total_steps)
+            FROM leaderboard
             ORDER BY score DESC, created_at DESC
             LIMIT :limit
-        """),
-        {"total_steps": total_steps, "limit": limit}
+        """)
+        rank_query = text("""
+            SELECT COALESCE(SUM(games), 0) + 1 AS rank
+            FROM leaderboard_score_counts
+            WHERE score > :my_score
+        """)
+    else:
+        ranking_query = text("""
+            SELECT user_name, score, cleared_steps
+            FROM leaderboard
+            WHERE total_steps = :total_steps
+            ORDER BY score DESC, created_at DESC
+            LIMIT :limit
+        """)
+        rank_query = text("""
+            SELECT COALESCE(SUM(games), 0) + 1 AS rank
+            FROM leaderboard_score_counts
+            WHERE total_steps = :total_steps
+              AND score > :my_score
+        """)
+
+    ranking_result = await db.execute(
+        ranking_query, {"total_steps": total_steps, "limit": limit}
     )
     ranking_rows = ranking_result.fetchall()
 
@@ -69,25 +122,104 @@ def get_rankings_and_my_rank(
         for i, row in enumerate(ranking_rows)
     ]
 
-    # 自分の順位を取得（自分より高いスコアの数 + 1）
-    rank_result = db.execute(
-        text("""
-            SELECT COUNT(*) + 1 AS rank
-            FROM games
-            WHERE (:total_steps IS NULL OR array_length(terms, 1) - 1 = :total_steps)
+    # 自分の順位を取得（自分より高いスコアの数 + 1、スコア分布から集計）
+    if my_rank is None:
+        rank_result = await db.execute(
+            rank_query, {"total_steps": total_steps, "my_score": my_score}
+        )
+        my_rank = rank_result.fetchone().rank
+
+    return rankings, my_rank
+
+
+def get_period_start(period: RankingPeriod, now: datetime) -> date:
+    """
+    期間の開始日（日本時間で区切る。週は月曜始まり）
+
+    DBの leaderboard_period_start() と同じ区切りにする。
+    """
+    today = now.astimezone(RANKING_TIMEZONE).date()
+    if period == "daily":
+        return today
+    if period == "weekly":
+        return today - timedelta(days=today.weekday())
+    return today.replace(day=1)
+
+
+async def get_period_rankings_and_my_rank(
+    db: AsyncSession,
+    period: RankingPeriod,
+    period_start: date,
+    my_score: int,
+    total_steps: int | None = None,
+    limit: int = RANKING_LIMIT
+) -> tuple[list[RankingEntry], int]:
+    """
+    期間別ランキングと自分の順位を取得
+
+    leaderboard_periods / leaderboard_period_score_counts から
+    (period, period_start) で絞って引くので、過去の期間が増えても速度は変わらない。
+
+    Returns:
+        (ランキングリスト, 自分の順位)
+    """
+    if total_steps is None:
+        ranking_query = text("""
+            SELECT user_name, score, cleared_steps
+            FROM leaderboard_periods
+            WHERE period = :period AND period_start = :period_start
+            ORDER BY score DESC, created_at DESC
+            LIMIT :limit
+        """)
+        rank_query = text("""
+            SELECT COALESCE(SUM(games), 0) + 1 AS rank
+            FROM leaderboard_period_score_counts
+            WHERE period = :period AND period_start = :period_start
               AND score > :my_score
-        """),
-        {"total_steps": total_steps, "my_score": my_score}
-    )
-    my_rank = rank_result.fetchone().rank
+        """)
+    else:
+        ranking_query = text("""
+            SELECT user_name, score, cleared_steps
+            FROM leaderboard_periods
+            WHERE period = :period AND period_start = :period_start
+              AND total_steps = :total_steps
+            ORDER BY score DESC, created_at DESC
+            LIMIT :limit
+        """)
+        rank_query = text("""
+            SELECT COALESCE(SUM(games), 0) + 1 AS rank
+            FROM leaderboard_period_score_counts
+            WHERE period = :period AND period_start = :period_start
+              AND total_steps = :total_steps
+              AND score > :my_score
+        """)
+
+    params = {
+        "period": period,
+        "period_start": period_start,
+        "total_steps": total_steps,
+        "my_score": my_score,
+        "limit": limit,
+    }
+    ranking_rows = (await db.execute(ranking_query, params)).fetchall()
+    rankings = [
+        RankingEntry(
+            rank=i + 1,
+            user_name=row.user_name,
+            score=row.score,
+            cleared_steps=row.cleared_steps
+        )
+        for i, row in enumerate(ranking_rows)
+    ]
 
+    my_rank = (await db.execute(rank_query, params)).fetchone().rank
     return rankings, my_rank
 
 
-@router.post("/start", response_model=FullRouteStartResponse)
+@router.post("/start", response_model=FullRouteStartResponse | CompactRouteStartResponse)
 async def start_game(
     request: GameStartRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     新しいゲームを開始（キャッシュ版）
@@ -106,24 +238,38 @@ async def start_game(
 
     Returns:
         FullRouteStartResponse: 全ステップ+選択肢を含むゲーム開始レスポンス
+        （compact=True のときは IDだけの CompactRouteStartResponse）
 
     Raises:
-        HTTPException: スタート地点が見つからない場合（400）
+        HTTPException: スタート地点が見つからない・target_length が難易度のグラフで作れる長さを超える場合（400）、
+            生成待ちが混雑している場合（503）
     """
-    cache = get_cache()
+    # リクエスト中は同じ版のキャッシュを使う（途中で管理画面の更新が入っても一貫させる）
+    cache = get_cache().snapshot()
 
-    # ルートを生成（キャッシュから、DBアクセスなし）
+    # 事前生成プールから取り出す。なければその場で生成（キャッシュから、DBアクセスなし）
+    # 生成はCPU処理なのでワーカースレッドで実行し、イベントループを止めない
     # target_length回のゲーム = target_length+1ノード（target_lengthエッジ）が必要
-    try:
-        route = generate_route(
-            target_length=request.target_length + 1,
-            difficulty=request.difficulty,
-            max_start_retries=20,
-            max_same_start_retries=50
+    node_count = request.target_length + 1
+    # グラフ上どうやっても届かない長さは生成を試さずに断る（事前計算済みの上限との比較のみ）
+    max_nodes = cache.get_route_components(request.difficulty).max_route_length
+    if 0 < max_nodes < node_count:
+        raise HTTPException(
+            status_code=400,
+            detail=f"target_length too long for {request.difficulty} (max {max_nodes - 1})"
         )
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    game = get_route_pool().take(request.difficulty, node_count, cache)
+    if game is None:
+        try:
+            game = await get_generation_executor().run(
+                generate_game, request.difficulty, node_count, snapshot=cache
+            )
+        except GenerationOverloadedError:
+            raise HTTPException(status_code=503, detail="Server is busy, please retry")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
+    route = game.route
     if not route:
         raise HTTPException(status_code=400, detail="Failed to generate route")
 
@@ -132,7 +278,7 @@ async def start_game(
     created_at = datetime.now(timezone.utc)
 
     # gamesテーブルに保存（新設計: route_id不要、terms配列を保存）
-    db.execute(
+    await db.execute(
         text("""
             INSERT INTO games (id, difficulty, terms, cleared_steps, score, lives, created_at, updated_at)
             VALUES (:id, :difficulty, :terms, 0, 0, 3, :created_at, :created_at)
@@ -144,99 +290,56 @@ async def start_game(
             "created_at": created_at
         }
     )
-    db.commit()
-
-    # 全ステップ+選択肢を作成（キャッシュから）
-    steps: list[RouteStepWithChoices] = []
-    visited = set()
-
-    for step_no, term_id in enumerate(route):
-        # 用語情報をキャッシュから取得
-        term_data = cache.get_term(term_id)
-        if not term_data:
-            raise HTTPException(status_code=500, detail=f"Term {term_id} not found in cache")
-
-        term = TermResponse(
-            id=term_data.id,
-            name=term_data.name,
-            tier=term_data.tier,
-            category=term_data.category,
-            description=term_data.description
+    await db.commit()
+
+    # 全ステップ+選択肢のJSONを、キャッシュのエンコード済み断片から直接組み立てる
+    # （FullRouteStartResponse と同じ形。モデルの生成・検証を省くため Response で返す）
+    # compact=True なら用語・エッジをIDだけで返す（名前などは辞書から引かせる）
+    build = build_compact_start_payload if request.compact else build_start_payload
+    try:
+        body = build(
+            game_id, request.difficulty, route, game.distractors, created_at, cache
         )
+    except LookupError as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # 最後のステップ以外は選択肢を生成
-        if step_no < len(route) - 1:
-            correct_next_id = route[step_no + 1]
-            visited.add(term_id)
-
-            # エッジ情報をキャッシュから取得
-            edge = cache.get_edge(term_id, correct_next_id)
-
-            if not edge:
-                print(f"[WARNING] No edge found for term_a={min(term_id, correct_next_id)}, term_b={max(term_id, correct_next_id)}")
-                difficulty_value = "normal"
-                keyword = ""
-                edge_description = ""
-            else:
-                difficulty_value = edge.difficulty or "normal"
-                keyword = edge.keyword or ""
-                edge_description = edge.description or ""
-
-            # ダミーを3つ生成（キャッシュから）
-            distractors = generate_distractors(
-                correct_id=correct_next_id,
-                current_id=term_id,
-                visited=visited,
-                difficulty=request.difficulty,
-                count=3
-            )
+    return Response(content=body, media_type="application/json")
 
-            # 4択を作成
-            all_choice_ids = [correct_next_id] + distractors
-
-            # 選択肢の詳細をキャッシュから取得
-            choices = []
-            for choice_id in all_choice_ids:
-                choice_term = cache.get_term(choice_id)
-                if choice_term:
-                    choices.append(
-                        ChoiceResponse(
-                            term_id=choice_term.id,
-                            name=choice_term.name,
-                            tier=choice_term.tier
-                        )
-                    )
-
-            # シャッフル
-            random.shuffle(choices)
-
-            steps.append(RouteStepWithChoices(
-                step_no=step_no,
-                term=term,
-                correct_next_id=correct_next_id,
-                choices=choices,
-                difficulty=difficulty_value,
-                keyword=keyword,
-                edge_description=edge_description
-            ))
-        else:
-            # 最後のステップは選択肢なし
-            steps.append(RouteStepWithChoices(
-                step_no=step_no,
-                term=term,
-                correct_next_id=None,
-                choices=[],
-                difficulty="",
-                keyword="",
-                edge_description=""
-            ))
-
-    return FullRouteStartResponse(
-        game_id=game_id,
-        difficulty=request.difficulty,
-        total_steps=len(route),
-        steps=steps,
-        created_at=created_at
+
+@router.get("/dictionary", response_model=GameDictionaryResponse)
+async def get_current_dictionary(
+    if_none_match: str | None = Header(None),
+    accept_encoding: str | None = Header(None),
+):
+    """
+    現在の用語・エッジ辞書を取得
+
+    compact モードのゲーム開始レスポンスのIDを引くための辞書。
+    ETag 付きで、変わっていなければ304を返す。
+    """
+    dictionary = get_dictionary(get_cache().snapshot())
+    return precompressed_response(
+        dictionary.payload, if_none_match, accept_encoding, DICTIONARY_CACHE_CONTROL
+    )
+
+
+@router.get("/dictionary/{version}", response_model=GameDictionaryResponse)
+async def get_versioned_dictionary(
+    version: str,
+    if_none_match: str | None = Header(None),
+    accept_encoding: str | None = Header(None),
+):
+    """
+    版を指定して用語・エッジ辞書を取得（長期キャッシュ可）
+
+    サーバーは現在の版しか持たないため、古い版を指定された場合は404。
+    クライアントは GET /games/dictionary で現在の版を取り直す。
+    """
+    dictionary = get_dictionary(get_cache().snapshot())
+    if version != dictionary.version:
+        raise HTTPException(status_code=404, detail="Dictionary version not available")
+    return precompressed_response(
+        dictionary.payload, if_none_match, accept_encoding, DICTIONARY_IMMUTABLE_CACHE_CONTROL
     )
 
 
@@ -244,7 +347,7 @@ async def start_game(
 async def submit_game_result(
     game_id: UUID,
     request: GameResultRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     ゲーム結果を送信
@@ -253,7 +356,7 @@ async def submit_game_result(
     ライフボーナスの計算はサーバー側で行ってDBに保存する。
     """
     # ゲームが存在するか確認し、難易度とルート情報を取得
-    game_result = db.execute(
+    game_result = await db.execute(
         text("SELECT id, difficulty, terms FROM games WHERE id = :game_id"),
         {"game_id": str(game_id)}
     )
@@ -293,20 +396,38 @@ async def submit_game_result(
     life_bonus = request.final_lives * LIFE_BONUS[difficulty]
     final_score = request.base_score + life_bonus
 
-    # ゲーム結果をDBに保存
-    db.execute(
+    # ゲーム結果をDBに保存し、同じ文でランキング（leaderboard）にも反映
+    # 再送信の場合はメモリ内インデックスの更新用に旧スコアも返す
+    # （トランザクションIDは、コミット後に読み直したインデックスへ二重に反映しないため）
+    saved = await db.execute(
         text("""
-            UPDATE games
-            SET score = :score,
-                lives = :lives,
-                cleared_steps = :cleared_steps,
-                user_name = :user_name,
-                false_steps = :false_steps,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = :game_id
+            WITH previous AS (
+                SELECT score FROM leaderboard WHERE game_id = :game_id
+            ),
+            updated AS (
+                UPDATE games
+                SET score = :score,
+                    lives = :lives,
+                    cleared_steps = :cleared_steps,
+                    user_name = :user_name,
+                    false_steps = :false_steps,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = :game_id
+                RETURNING id, score, cleared_steps, user_name, created_at
+            )
+            INSERT INTO leaderboard (game_id, total_steps, score, cleared_steps, user_name, created_at)
+            SELECT id, :total_steps, score, cleared_steps, user_name, created_at
+            FROM updated
+            ON CONFLICT (game_id) DO UPDATE
+            SET score = EXCLUDED.score,
+                cleared_steps = EXCLUDED.cleared_steps,
+                user_name = EXCLUDED.user_name
+            RETURNING created_at, (SELECT score FROM previous) AS previous_score,
+                pg_current_xact_id()::text AS xid
         """),
         {
             "game_id": str(game_id),
+            "total_steps": total_steps,
             "score": final_score,
             "lives": request.final_lives,
             "cleared_steps": request.cleared_steps,
@@ -314,10 +435,22 @@ async def submit_game_result(
             "false_steps": false_steps
         }
     )
-    db.commit()
+    saved_row = saved.fetchone()
+    await db.commit()
+
+    get_rank_index().record(
+        game_id,
+        total_steps=total_steps,
+        score=final_score,
+        cleared_steps=request.cleared_steps,
+        user_name=request.user_name,
+        created_at=saved_row.created_at,
+        previous_score=saved_row.previous_score,
+        xid=int(saved_row.xid)
+    )
 
     # ランキング情報を取得（問題数でフィルタリング）
-    rankings, my_rank = get_rankings_and_my_rank(
+    rankings, my_rank = await get_rankings_and_my_rank(
         db, final_score, total_steps
     )
 
@@ -338,7 +471,7 @@ async def submit_game_result(
 async def update_game(
     game_id: UUID,
     request: GameUpdateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     ゲーム情報を更新（主にユーザー名変更用）
@@ -346,7 +479,7 @@ async def update_game(
     リザルト画面で名前を変更した場合などに使用。
     """
     # ゲームが存在するか確認し、現在の状態を取得
-    game_result = db.execute(
+    game_result = await db.execute(
         text("""
             SELECT id, difficulty, terms, score, lives, cleared_steps, user_name
             FROM games WHERE id = :game_id
@@ -358,26 +491,33 @@ async def update_game(
     if not game_row:
         raise HTTPException(status_code=404, detail="Game not found")
 
-    # ユーザー名を更新
-    db.execute(
+    # ユーザー名を更新（ランキングに載っていればそちらも）
+    await db.execute(
         text("""
-            UPDATE games
-            SET user_name = :user_name,
-                updated_at = CURRENT_TIMESTAMP
-            WHERE id = :game_id
+            WITH updated AS (
+                UPDATE games
+                SET user_name = :user_name,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = :game_id
+                RETURNING id
+            )
+            UPDATE leaderboard
+            SET user_name = :user_name
+            WHERE game_id IN (SELECT id FROM updated)
         """),
         {
             "game_id": str(game_id),
             "user_name": request.user_name
         }
     )
-    db.commit()
+    await db.commit()
 
     # total_steps = エッジ数 = termsの長さ - 1
     total_steps = len(game_row.terms) - 1 if game_row.terms else 0
+    get_rank_index().rename(game_id, total_steps, request.user_name)
 
     # ランキング情報を取得（問題数でフィルタリング）
-    rankings, my_rank = get_rankings_and_my_rank(
+    rankings, my_rank = await get_rankings_and_my_rank(
         db, game_row.score, total_steps
     )
 
@@ -397,7 +537,7 @@ async def update_game(
 @router.get("/rankings/overall", response_model=OverallRankingResponse)
 async def get_overall_ranking(
     my_score: int = 0,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     全体ランキングを取得（難易度問わず）
@@ -409,9 +549,43 @@ async def get_overall_ranking(
     Returns:
         OverallRankingResponse: 全体ランキングと自分の順位
     """
-    rankings, my_rank = get_rankings_and_my_rank(db, my_score)
+    rankings, my_rank = await get_rankings_and_my_rank(db, my_score)
 
     return OverallRankingResponse(
         my_rank=my_rank,
         rankings=rankings
     )
+
+
+@router.get("/rankings/{period}", response_model=PeriodRankingResponse)
+async def get_period_ranking(
+    period: RankingPeriod,
+    my_score: int = 0,
+    total_steps: int | None = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    期間別ランキングを取得（日間・週間・月間）
+
+    ゲーム開始日時が現在の期間（日本時間）に含まれる結果が対象。
+
+    Args:
+        period: 期間（daily, weekly, monthly）
+        my_score: 自分のスコア（順位計算用）
+        total_steps: 問題数フィルタ（省略時は問題数問わず）
+        db: データベースセッション
+
+    Returns:
+        PeriodRankingResponse: 期間の開始日、期間内ランキングと自分の順位
+    """
+    period_start = get_period_start(period, datetime.now(timezone.utc))
+    rankings, my_rank = await get_period_rankings_and_my_rank(
+        db, period, period_start, my_score, total_steps
+    )
+
+    return PeriodRankingResponse(
+        period=period,
+        period_start=period_start,
+        my_rank=my_rank,
+        rankings=rankings
+    )
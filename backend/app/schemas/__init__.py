@@ -3,11 +3,15 @@ from .term import TermResponse
 from .game import (
     GameStartRequest,
     ChoiceResponse,
+    CompactRouteStartResponse,
+    GameDictionaryResponse,
     GameResultRequest,
     GameResultResponse,
     GameUpdateRequest,
     OverallRankingResponse,
+    PeriodRankingResponse,
     RankingEntry,
+    RankingPeriod,
     RouteStepWithChoices,
     FullRouteStartResponse,
 )
@@ -16,11 +20,15 @@ __all__ = [
     "TermResponse",
     "GameStartRequest",
     "ChoiceResponse",
+    "CompactRouteStartResponse",
+    "GameDictionaryResponse",
     "GameResultRequest",
     "GameResultResponse",
     "GameUpdateRequest",
     "OverallRankingResponse",
+    "PeriodRankingResponse",
     "RankingEntry",
+    "RankingPeriod",
     "RouteStepWithChoices",
     "FullRouteStartResponse",
 ]
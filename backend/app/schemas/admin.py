@@ -1,5 +1,7 @@
 """Admin API schemas"""
-from pydantic import BaseModel
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
 
 
 class TermBase(BaseModel):
@@ -57,3 +59,69 @@ class EdgeResponse(BaseModel):
 class PaginatedResponse(BaseModel):
     items: list
     total: int
+    # Cursor for the next page (cache-served lists only; None on the last page)
+    next_cursor: Optional[str] = None
+
+
+# ========== Bulk changes ==========
+# Items carry the column limits of the terms/edges tables, so a value the DB
+# would reject is reported as a 422 entry for that item instead of failing
+# the whole batch at write time.
+
+EdgeDifficulty = Literal["easy", "normal", "hard"]
+
+
+class BulkTermFields(TermBase):
+    name: str = Field(max_length=100)
+    category: str = Field(max_length=50)
+
+
+class BulkTermCreate(BulkTermFields):
+    # Batch-local name that edges in the same request can use before the id exists
+    ref: Optional[str] = None
+
+
+class BulkTermUpdate(BulkTermFields):
+    id: int
+
+
+class BulkEdgeCreate(BaseModel):
+    """Edge endpoints are given as an existing term id or a `ref` of a term created in the batch"""
+    from_term_id: Optional[int] = None
+    to_term_id: Optional[int] = None
+    from_term_ref: Optional[str] = None
+    to_term_ref: Optional[str] = None
+    keyword: str = Field(default="", max_length=100)
+    description: str = ""
+    difficulty: EdgeDifficulty = "normal"
+
+
+class BulkEdgeUpdate(BulkEdgeCreate):
+    id: int
+
+
+class BulkTermChanges(BaseModel):
+    create: list[BulkTermCreate] = []
+    update: list[BulkTermUpdate] = []
+    delete: list[int] = []
+
+
+class BulkEdgeChanges(BaseModel):
+    create: list[BulkEdgeCreate] = []
+    update: list[BulkEdgeUpdate] = []
+    delete: list[int] = []
+
+
+class BulkRequest(BaseModel):
+    terms: BulkTermChanges = Field(default_factory=BulkTermChanges)
+    edges: BulkEdgeChanges = Field(default_factory=BulkEdgeChanges)
+
+
+class BulkResponse(BaseModel):
+    created_term_ids: list[int]  # in request order
+    term_refs: dict[str, int]
+    created_edge_ids: list[int]  # in request order
+    updated_terms: int
+    updated_edges: int
+    deleted_terms: int
+    deleted_edges: int  # includes edges removed with their terms
@@ -1,8 +1,8 @@
 """ゲーム関連のスキーマ"""
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Literal, Optional
 from uuid import UUID
-from datetime import datetime
+from datetime import date, datetime
 
 from .term import TermResponse
 
@@ -11,6 +11,9 @@ class GameStartRequest(BaseModel):
     """ゲーム開始リクエスト"""
     difficulty: str = Field(default="normal", pattern="^(easy|normal|hard)$")
     target_length: int = Field(default=20, ge=5, le=50)
+    # True なら用語・エッジをIDだけで返す（CompactRouteStartResponse）。
+    # 名前などは dictionary_version の辞書（GET /games/dictionary/{version}）から引く
+    compact: bool = False
 
 
 class ChoiceResponse(BaseModel):
@@ -65,6 +68,17 @@ class OverallRankingResponse(BaseModel):
     rankings: list[RankingEntry]
 
 
+RankingPeriod = Literal["daily", "weekly", "monthly"]
+
+
+class PeriodRankingResponse(BaseModel):
+    """期間別ランキングレスポンス（日間・週間・月間）"""
+    period: RankingPeriod
+    period_start: date  # 期間の開始日（日本時間、週は月曜始まり）
+    my_rank: int
+    rankings: list[RankingEntry]
+
+
 class RouteStepWithChoices(BaseModel):
     """ルートステップと選択肢のセット"""
     step_no: int
@@ -83,3 +97,41 @@ class FullRouteStartResponse(BaseModel):
     total_steps: int
     steps: list[RouteStepWithChoices]
     created_at: datetime
+
+
+class CompactRouteStartResponse(BaseModel):
+    """IDだけのゲーム開始レスポンス（compact=True のとき）"""
+    game_id: UUID
+    difficulty: str
+    total_steps: int
+    dictionary_version: str  # 用語・エッジ辞書の版（GET /games/dictionary/{version}）
+    route: list[int]  # 用語IDのルート
+    edges: list[int | None]  # ステップごとの正解エッジID（最後のステップ以外、len(route) - 1 件）
+    choices: list[list[int]]  # ステップごとの4択の用語ID（シャッフル済み、len(route) - 1 件）
+    created_at: datetime
+
+
+class DictionaryTerm(BaseModel):
+    """辞書の用語"""
+    id: int
+    name: str
+    tier: int
+    category: str
+    description: str
+
+
+class DictionaryEdge(BaseModel):
+    """辞書のエッジ"""
+    id: int
+    term_a: int
+    term_b: int
+    difficulty: str
+    keyword: str
+    description: str
+
+
+class GameDictionaryResponse(BaseModel):
+    """用語・エッジ辞書（compact レスポンスのIDを引く用）"""
+    version: str
+    terms: list[DictionaryTerm]
+    edges: list[DictionaryEdge]
@@ -0,0 +1,69 @@
+"""
+ビット集合で引く難易度別の用語グラフ（ルート探索用）
+
+難易度フィルタ済みの隣接を、用語の密インデックスと隣接ビットマスク
+（int）で持つ。探索側は訪問済みを「未訪問ノードのビットマスク」1つで表し、
+
+- 未訪問の隣接: masks[i] & unvisited
+- 残余次数（未訪問の隣接数）: (masks[i] & unvisited).bit_count()
+- 訪問: unvisited &= ~bit / 戻す: unvisited |= bit
+
+とすることで、候補ごとに set やリストを作らずに済む。
+neighbors[i] は隣接の密インデックス（並びは元の隣接と同じ）なので、
+乱数の消費順も元の term_id ベースの探索と変わらない。
+
+CacheSnapshot.get_bitset_graph で版・難易度ごとに1回だけ作る。
+"""
+
+from typing import Dict, Iterable, Mapping, Sequence, Tuple
+
+
+class BitsetGraph:
+    """密インデックス + 隣接ビットマスクのグラフ（構築後は変更しない）"""
+
+    __slots__ = ('term_ids', 'index', 'neighbors', 'masks', 'all_mask')
+
+    def __init__(self, term_ids: Iterable[int], adjacency: Mapping[int, Sequence[int]]):
+        """
+        Args:
+            term_ids: グラフに含める用語ID（隣接に現れる用語はすべて含めること）
+            adjacency: 難易度フィルタ済みの隣接（term_id -> 隣接ノードID）
+        """
+        self.term_ids: Tuple[int, ...] = tuple(term_ids)
+        self.index: Dict[int, int] = {term_id: i for i, term_id in enumerate(self.term_ids)}
+        index = self.index
+        self.neighbors: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(index[n] for n in adjacency.get(term_id, ()) if n in index)
+            for term_id in self.term_ids
+        )
+        masks = []
+        for row in self.neighbors:
+            mask = 0
+            for n in row:
+                mask |= 1 << n
+            masks.append(mask)
+        self.masks: Tuple[int, ...] = tuple(masks)
+        # 全ノードのビットが立ったマスク（未訪問集合の初期値）
+        self.all_mask: int = (1 << len(self.term_ids)) - 1
+
+    def __len__(self) -> int:
+        return len(self.term_ids)
+
+    def residual_degree(self, i: int, unvisited: int) -> int:
+        """密インデックス i の未訪問の隣接数"""
+        return (self.masks[i] & unvisited).bit_count()
+
+    def to_term_ids(self, indices: Iterable[int]) -> list:
+        """密インデックスの並びを用語IDのリストに戻す"""
+        term_ids = self.term_ids
+        return [term_ids[i] for i in indices]
+
+
+def build_bitset_graph(adjacency: Mapping[int, Sequence[int]]) -> BitsetGraph:
+    """隣接に現れるすべての用語（キーと隣接先）でグラフを作る"""
+    term_ids: Dict[int, None] = {}
+    for term_id, neighbors in adjacency.items():
+        term_ids[term_id] = None
+        for n in neighbors:
+            term_ids[n] = None
+    return BitsetGraph(term_ids, adjacency)
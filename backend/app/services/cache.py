@@ -3,29 +3,69 @@
 
 起動時にDBからterms/edgesを読み込み、メモリにキャッシュする。
 DBアクセスなしでルート生成・ダミー生成が可能になる。
+
+データは CacheSnapshot（構築後は変更しない）として保持し、
+再読み込みや差分更新では新しいスナップショットを別途構築してから
+参照を1回差し替えて公開する（copy-on-write）。
+読み手はリクエスト開始時に snapshot() で1つの版を固定して使えば、
+途中で更新が入っても構築途中のインデックスを見ることはない。
 """
 
+import json
+import sys
 import threading
-from typing import Dict, List, Set, Optional
-from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Sequence, Set, Optional, Tuple
+from dataclasses import dataclass, field
 from sqlalchemy import text
 
+from app.config import settings
 from app.database import SessionLocal
+from app.services.bitset_graph import BitsetGraph, build_bitset_graph
+from app.services.csr_graph import CsrGraph
+
+
+# 難易度ごとのデータ範囲: difficulty -> (max_tier, 許可されるエッジ難易度)
+# - Easy: Tier1のみ + easyエッジのみ
+# - Normal: Tier1-2 + easy/normalエッジ
+# - Hard: 全Tier + 全エッジ
+DIFFICULTY_FILTERS: Dict[str, Tuple[int, Tuple[str, ...]]] = {
+    'easy': (1, ('easy',)),
+    'normal': (2, ('easy', 'normal')),
+    'hard': (3, ('easy', 'normal', 'hard')),
+}
+
+# (max_tier, 許可エッジ難易度の集合) -> difficulty（任意フィルタから事前計算済みの隣接へ引き当てる用）
+_FILTER_LEVELS: Dict[tuple, str] = {
+    (max_tier, frozenset(allowed)): difficulty
+    for difficulty, (max_tier, allowed) in DIFFICULTY_FILTERS.items()
+}
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Term:
-    """用語データ"""
+    """
+    用語データ
+
+    件数が多いため __slots__ で __dict__ を持たせない。
+    category は語彙が少ないので intern して同じ文字列オブジェクトを共有する。
+    """
     id: int
     name: str
     tier: int
     category: str
     description: str
 
+    def __post_init__(self):
+        object.__setattr__(self, 'category', sys.intern(self.category))
+
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Edge:
-    """エッジデータ"""
+    """
+    エッジデータ
+
+    Term と同じく slots 化し、difficulty（easy/normal/hard）を intern する。
+    """
     id: int
     term_a: int
     term_b: int
@@ -33,120 +73,473 @@ class Edge:
     keyword: str
     description: str
 
-
-class DataCache:
-    """データキャッシュ（シングルトン）"""
-
-    _instance: Optional['DataCache'] = None
-    _initialized: bool = False
-
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
-
-    def __init__(self):
-        if self._initialized:
-            return
-
-        self.terms: Dict[int, Term] = {}
-        self.edges: List[Edge] = []
+    def __post_init__(self):
+        object.__setattr__(self, 'difficulty', sys.intern(self.difficulty))
+
+
+@dataclass(frozen=True)
+class RouteComponents:
+    """
+    難易度別の連結成分と、成分ごとの単純パスのノード数の上限
+
+    ルートは成分をまたげないので、目標のノード数に届かない成分から
+    スタートしても必ず失敗する。スタート候補を事前に絞るのに使う。
+    上限は「成分のノード数 − 端点になれない葉（次数1）の数」。
+    単純パスは葉を端点にしか含められないので、葉は最大2つしか通れない。
+    """
+    component_of: Mapping[int, int]  # term_id -> 成分番号
+    max_path: Tuple[int, ...]  # 成分番号 -> 単純パスのノード数の上限
+    pool: Tuple[int, ...]  # 対象の用語ID（get_term_pool と同じ順）
+    # target_length -> スタート候補（初回参照時に作る）
+    _starts: Dict[int, Tuple[int, ...]] = field(default_factory=dict, compare=False, repr=False)
+
+    @property
+    def max_route_length(self) -> int:
+        """作れる可能性のあるルートの最大ノード数（用語がなければ0）"""
+        return max(self.max_path, default=0)
+
+    def starts_for(self, target_length: int) -> Tuple[int, ...]:
+        """target_length ノードのルートが入りうる成分の用語ID（スタート候補）"""
+        starts = self._starts.get(target_length)
+        if starts is None:
+            starts = self._starts[target_length] = tuple(
+                term_id for term_id in self.pool
+                if self.max_path[self.component_of[term_id]] >= target_length
+            )
+        return starts
+
+
+def _build_route_components(pool: Tuple[int, ...], adjacency: Mapping[int, Sequence[int]]) -> RouteComponents:
+    """難易度フィルタ済みの隣接から連結成分と上限を求める（O(ノード数 + エッジ数)）"""
+    component_of: Dict[int, int] = {}
+    max_path: List[int] = []
+    for root in pool:
+        if root in component_of:
+            continue
+        index = len(max_path)
+        component_of[root] = index
+        stack = [root]
+        size = leaves = 0
+        while stack:
+            term_id = stack.pop()
+            neighbors = adjacency.get(term_id, ())
+            size += 1
+            if len(neighbors) == 1:
+                leaves += 1
+            for neighbor in neighbors:
+                if neighbor not in component_of:
+                    component_of[neighbor] = index
+                    stack.append(neighbor)
+        max_path.append(size - max(leaves - 2, 0))
+    return RouteComponents(component_of=component_of, max_path=tuple(max_path), pool=pool)
+
+
+def encode_json(value) -> bytes:
+    """レスポンス断片用のJSONエンコード（FastAPIの JSONResponse と同じ形式）"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class CacheSnapshot:
+    """
+    ある時点のterms/edgesと検索用インデックス（読み取り専用）
+
+    公開後のスナップショットは変更しない。差分更新は copy() で得た
+    未公開のコピーに対してのみ行う。
+
+    backend='csr' の場合、隣接インデックスは dict/set ではなく CsrGraph
+    （連続配列）で持つ。差分更新時は terms/edges を更新したうえで
+    finish_changes() でCSRを作り直す（DBアクセスなし、O(エッジ数)）。
+    """
+
+    def __init__(
+        self,
+        terms: Optional[Dict[int, Term]] = None,
+        edges: Optional[Dict[int, Edge]] = None,
+        version: int = 0,
+        backend: str = 'dict'
+    ):
+        if backend not in ('dict', 'csr'):
+            raise ValueError(f"Unknown graph backend: {backend}")
+        self.version = version
+        self.backend = backend
+        self.terms: Dict[int, Term] = terms if terms is not None else {}
+        self._edges_by_id: Dict[int, Edge] = edges if edges is not None else {}  # edge_id -> edge
 
         # 高速検索用インデックス
-        self._terms_by_tier: Dict[int, List[int]] = {}  # tier -> [term_ids]
+        self._terms_by_tier: Dict[int, Dict[int, None]] = {}  # tier -> {term_id: None}（順序付き集合）
         self._neighbors: Dict[int, Set[int]] = {}  # term_id -> {neighbor_ids}
         self._edges_by_term: Dict[int, List[Edge]] = {}  # term_id -> [edges]
         self._edge_map: Dict[tuple, Edge] = {}  # (min_id, max_id) -> edge
-
-        self._initialized = True
-
-    def load_from_db(self):
-        """DBからデータを読み込む"""
-        db = SessionLocal()
-        try:
-            # terms読み込み
-            terms_result = db.execute(text("SELECT id, name, tier, category, description FROM terms"))
-            for row in terms_result:
-                term = Term(
-                    id=row.id,
-                    name=row.name,
-                    tier=row.tier,
-                    category=row.category,
-                    description=row.description or ""
-                )
-                self.terms[term.id] = term
-
-            # edges読み込み
-            edges_result = db.execute(text("SELECT id, term_a, term_b, difficulty, keyword, description FROM edges"))
-            for row in edges_result:
-                edge = Edge(
-                    id=row.id,
-                    term_a=row.term_a,
-                    term_b=row.term_b,
-                    difficulty=row.difficulty,
-                    keyword=row.keyword or "",
-                    description=row.description or ""
-                )
-                self.edges.append(edge)
-
-            # インデックス構築
-            self._build_indexes()
-        finally:
-            db.close()
+        # difficulty -> term_id -> 難易度フィルタ済みの隣接ノード
+        self._filtered_neighbors: Dict[str, Dict[int, Tuple[int, ...]]] = {}
+        # backend='csr' のときの隣接インデックス
+        self._graph: Optional[CsrGraph] = None
+        # max_tier -> そのTier以下の用語ID（初回参照時に作る。Tierが変わったら破棄）
+        self._term_pools: Dict[int, Tuple[int, ...]] = {}
+        # レスポンス用のエンコード済みJSON断片（初回参照時に作る）
+        # 元の Term/Edge オブジェクトと組で持ち、同一オブジェクトのときだけ使い回す。
+        # 差分更新では Term/Edge を作り直すので、古い断片は自然に使われなくなる。
+        # このためコピー間で dict を共有してよい
+        self._term_fragments: Dict[int, Tuple[Term, bytes, bytes]] = {}
+        self._edge_fragments: Dict[int, Tuple[Edge, bytes]] = {}
+        # この版全体から作る派生データ（一覧のエンコード済みボディなど）。版ごとに作り直す
+        self._derived: Dict[str, Any] = {}
+
+        self._build_indexes()
+
+    @property
+    def edges(self) -> List[Edge]:
+        """全エッジ一覧（読み込み順）"""
+        return list(self._edges_by_id.values())
 
     def _build_indexes(self):
         """高速検索用インデックスを構築"""
-        # terms_by_tier: tier -> [term_ids]
+        # terms_by_tier: tier -> {term_ids}
         self._terms_by_tier = {}
+        self._term_pools = {}
         for term_id, term in self.terms.items():
-            if term.tier not in self._terms_by_tier:
-                self._terms_by_tier[term.tier] = []
-            self._terms_by_tier[term.tier].append(term_id)
+            self._terms_by_tier.setdefault(term.tier, {})[term_id] = None
+
+        if self.backend == 'csr':
+            self._graph = CsrGraph(self.terms, self._edges_by_id.values(), DIFFICULTY_FILTERS)
+            return
 
         # neighbors: term_id -> {neighbor_ids}
         # edges_by_term: term_id -> [edges]
-        # edge_map: (min_id, max_id) -> edge
+        # edge_map: (min_id, max_id) -> edge（同じ組のエッジが複数あればIDが最大のもの）
         self._neighbors = {term_id: set() for term_id in self.terms}
         self._edges_by_term = {term_id: [] for term_id in self.terms}
         self._edge_map = {}
 
-        for edge in self.edges:
-            # 隣接関係（双方向）
-            self._neighbors[edge.term_a].add(edge.term_b)
-            self._neighbors[edge.term_b].add(edge.term_a)
+        for edge in self._edges_by_id.values():
+            self._neighbors.setdefault(edge.term_a, set()).add(edge.term_b)
+            self._neighbors.setdefault(edge.term_b, set()).add(edge.term_a)
+            self._edges_by_term.setdefault(edge.term_a, []).append(edge)
+            self._edges_by_term.setdefault(edge.term_b, []).append(edge)
+            key = (min(edge.term_a, edge.term_b), max(edge.term_a, edge.term_b))
+            current = self._edge_map.get(key)
+            if current is None or edge.id > current.id:
+                self._edge_map[key] = edge
 
-            # term -> edges
-            self._edges_by_term[edge.term_a].append(edge)
-            self._edges_by_term[edge.term_b].append(edge)
+        # filtered_neighbors: difficulty -> term_id -> (neighbor_ids)
+        self._filtered_neighbors = {difficulty: {} for difficulty in DIFFICULTY_FILTERS}
+        for term_id in self._edges_by_term:
+            self._refresh_filtered_neighbors(term_id)
 
-            # (min, max) -> edge
-            key = (min(edge.term_a, edge.term_b), max(edge.term_a, edge.term_b))
+    def _refresh_filtered_neighbors(self, term_id: int):
+        """
+        1ノード分の難易度別隣接を作り直す
+
+        並びは _edges_by_term のエッジ順（get_neighbors_with_filter の走査順と同じ）。
+        """
+        edges = self._edges_by_term.get(term_id)
+        for difficulty, (max_tier, allowed) in DIFFICULTY_FILTERS.items():
+            adjacency = self._filtered_neighbors[difficulty]
+            if edges is None:
+                adjacency.pop(term_id, None)
+                continue
+            result = []
+            for edge in edges:
+                if edge.difficulty not in allowed:
+                    continue
+                neighbor_id = edge.term_b if edge.term_a == term_id else edge.term_a
+                neighbor = self.terms.get(neighbor_id)
+                if neighbor and neighbor.tier <= max_tier:
+                    result.append(neighbor_id)
+            adjacency[term_id] = tuple(result)
+
+    def copy(self, version: int) -> 'CacheSnapshot':
+        """
+        差分更新用の未公開コピーを作る
+
+        外側のdictだけを複製し、内側のset/list/dictは共有する。
+        差分更新メソッドは内側のコンテナを書き換えず必ず作り直すので、
+        コピー元（公開中のスナップショット）は変化しない。
+        """
+        snapshot = CacheSnapshot.__new__(CacheSnapshot)
+        snapshot.version = version
+        snapshot.backend = self.backend
+        snapshot._graph = self._graph
+        snapshot._term_fragments = self._term_fragments
+        snapshot._edge_fragments = self._edge_fragments
+        snapshot._derived = {}
+        snapshot.terms = dict(self.terms)
+        snapshot._edges_by_id = dict(self._edges_by_id)
+        snapshot._terms_by_tier = dict(self._terms_by_tier)
+        snapshot._term_pools = dict(self._term_pools)
+        snapshot._neighbors = dict(self._neighbors)
+        snapshot._edges_by_term = dict(self._edges_by_term)
+        snapshot._edge_map = dict(self._edge_map)
+        snapshot._filtered_neighbors = {
+            difficulty: dict(adjacency)
+            for difficulty, adjacency in self._filtered_neighbors.items()
+        }
+        return snapshot
+
+    def finish_changes(self):
+        """差分更新の後処理（CSRは部分更新できないので作り直す）"""
+        if self.backend == 'csr':
+            self._graph = CsrGraph(self.terms, self._edges_by_id.values(), DIFFICULTY_FILTERS)
+
+    # ========== 差分更新（未公開コピー専用） ==========
+    # いずれも影響するノードの次数に比例する計算量で済む。
+
+    def _index_edge(self, edge: Edge):
+        """エッジ1本分をインデックスに追加"""
+        # 隣接関係（双方向）
+        self._neighbors[edge.term_a] = self._neighbors.get(edge.term_a, set()) | {edge.term_b}
+        self._neighbors[edge.term_b] = self._neighbors.get(edge.term_b, set()) | {edge.term_a}
+
+        # term -> edges
+        self._edges_by_term[edge.term_a] = self._edges_by_term.get(edge.term_a, []) + [edge]
+        self._edges_by_term[edge.term_b] = self._edges_by_term.get(edge.term_b, []) + [edge]
+
+        # (min, max) -> edge（同じ組のエッジが複数あればIDが最大のもの、CSR版と同じ）
+        key = (min(edge.term_a, edge.term_b), max(edge.term_a, edge.term_b))
+        current = self._edge_map.get(key)
+        if current is None or edge.id >= current.id:
             self._edge_map[key] = edge
 
+        self._refresh_filtered_neighbors(edge.term_a)
+        self._refresh_filtered_neighbors(edge.term_b)
+
+    def _unindex_edge(self, edge: Edge):
+        """エッジ1本分をインデックスから除去"""
+        for term_id, other_id in ((edge.term_a, edge.term_b), (edge.term_b, edge.term_a)):
+            if term_id in self._neighbors:
+                self._neighbors[term_id] = self._neighbors[term_id] - {other_id}
+            if term_id in self._edges_by_term:
+                self._edges_by_term[term_id] = [
+                    e for e in self._edges_by_term[term_id] if e.id != edge.id
+                ]
+
+        key = (min(edge.term_a, edge.term_b), max(edge.term_a, edge.term_b))
+        if self._edge_map.get(key) is edge:
+            # 同じ組の別のエッジが残っていればそちらに付け替える
+            others = [
+                e for e in self._edges_by_term.get(edge.term_a, [])
+                if {e.term_a, e.term_b} == {edge.term_a, edge.term_b}
+            ]
+            if others:
+                self._edge_map[key] = max(others, key=lambda e: e.id)
+            else:
+                del self._edge_map[key]
+
+        self._refresh_filtered_neighbors(edge.term_a)
+        self._refresh_filtered_neighbors(edge.term_b)
+
+    def _set_tier_member(self, tier: int, term_id: int, present: bool):
+        """Tier索引の集合を作り直して用語を出し入れする"""
+        members = dict(self._terms_by_tier.get(tier, {}))
+        if present:
+            members[term_id] = None
+        else:
+            members.pop(term_id, None)
+        self._terms_by_tier[tier] = members
+        self._term_pools = {}
+
+    def _upsert_term(self, term: Term):
+        """用語を追加・更新"""
+        old = self.terms.get(term.id)
+        if old is not None and old.tier != term.tier:
+            self._set_tier_member(old.tier, term.id, False)
+
+        self.terms[term.id] = term
+        if old is None or old.tier != term.tier:
+            self._set_tier_member(term.tier, term.id, True)
+        if self.backend == 'csr':
+            return
+        self._neighbors.setdefault(term.id, set())
+        self._edges_by_term.setdefault(term.id, [])
+
+        # Tierが変わると、この用語を隣接に含むかどうかが隣接ノード側でも変わる
+        self._refresh_filtered_neighbors(term.id)
+        if old is None or old.tier != term.tier:
+            for neighbor_id in self._neighbors[term.id]:
+                self._refresh_filtered_neighbors(neighbor_id)
+
+    def _delete_terms(self, term_ids: Iterable[int]):
+        """
+        用語と、それに接続するエッジをまとめて削除
+
+        CSR版は用語→エッジの索引を持たないので、接続エッジは全エッジを
+        1回だけ走査して集める（用語ごとに走査すると O(削除数 × エッジ数)）。
+        """
+        term_ids = set(term_ids)
+        if not term_ids:
+            return
+        if self.backend == 'csr':
+            connected = [
+                e for e in self._edges_by_id.values()
+                if e.term_a in term_ids or e.term_b in term_ids
+            ]
+        else:
+            connected = {
+                e.id: e for term_id in term_ids for e in self._edges_by_term.get(term_id, [])
+            }.values()
+        for edge in list(connected):
+            self._delete_edge(edge.id)
+
+        for term_id in term_ids:
+            term = self.terms.pop(term_id, None)
+            if term is not None:
+                self._set_tier_member(term.tier, term_id, False)
+            if self.backend == 'csr':
+                continue
+            self._neighbors.pop(term_id, None)
+            self._edges_by_term.pop(term_id, None)
+            self._refresh_filtered_neighbors(term_id)
+
+    def _upsert_edge(self, edge: Edge):
+        """エッジを追加・更新（端点の付け替えにも対応）"""
+        old = self._edges_by_id.get(edge.id)
+        self._edges_by_id[edge.id] = edge
+        if self.backend == 'csr':
+            return
+
+        if old is not None:
+            self._unindex_edge(old)
+        self._index_edge(edge)
+
+    def _delete_edge(self, edge_id: int):
+        """エッジを削除"""
+        edge = self._edges_by_id.pop(edge_id, None)
+        if edge is not None and self.backend != 'csr':
+            self._unindex_edge(edge)
+
+    # ========== 読み取りAPI ==========
+
     def get_term(self, term_id: int) -> Optional[Term]:
         """用語を取得"""
         return self.terms.get(term_id)
 
+    def get_derived(self, key: str, build: Callable[['CacheSnapshot'], Any]) -> Any:
+        """
+        この版から作る派生データを取得（初回だけ build(self) を呼んで保持する）
+
+        差分更新・再読み込みでは新しい版になるので、古い派生データは使われない。
+        """
+        value = self._derived.get(key)
+        if value is None:
+            value = self._derived[key] = build(self)
+        return value
+
+    def get_term_fragments(self, term_id: int) -> Optional[Tuple[bytes, bytes]]:
+        """
+        用語のエンコード済みJSON断片を取得
+
+        Returns:
+            (TermResponse 形式, ChoiceResponse 形式) の組（用語がなければNone）
+        """
+        term = self.terms.get(term_id)
+        if term is None:
+            return None
+        cached = self._term_fragments.get(term_id)
+        if cached is None or cached[0] is not term:
+            cached = (
+                term,
+                encode_json({
+                    'id': term.id,
+                    'name': term.name,
+                    'tier': term.tier,
+                    'category': term.category,
+                    'description': term.description,
+                }),
+                encode_json({
+                    'term_id': term.id,
+                    'name': term.name,
+                    'tier': term.tier,
+                }),
+            )
+            self._term_fragments[term_id] = cached
+        return cached[1], cached[2]
+
+    def get_edge_fragment(self, edge: Edge) -> bytes:
+        """
+        エッジのエンコード済みJSON断片を取得
+
+        ステップのオブジェクトにそのまま埋め込む形
+        （"difficulty":…,"keyword":…,"edge_description":… の波括弧なし）。
+        """
+        cached = self._edge_fragments.get(edge.id)
+        if cached is None or cached[0] is not edge:
+            cached = (edge, encode_json({
+                'difficulty': edge.difficulty or 'normal',
+                'keyword': edge.keyword or '',
+                'edge_description': edge.description or '',
+            })[1:-1])
+            self._edge_fragments[edge.id] = cached
+        return cached[1]
+
     def get_terms_by_max_tier(self, max_tier: int) -> List[int]:
         """指定Tier以下の全用語IDを取得"""
-        result = []
-        for tier in range(1, max_tier + 1):
-            result.extend(self._terms_by_tier.get(tier, []))
-        return result
+        return list(self.get_term_pool(max_tier))
+
+    def get_term_pool(self, max_tier: int) -> Tuple[int, ...]:
+        """
+        指定Tier以下の全用語ID（コピーせずに共有する読み取り専用タプル）
+
+        ランダムに添字を引く用途向け。版ごとに1回だけ作る。
+        """
+        pool = self._term_pools.get(max_tier)
+        if pool is None:
+            ids: List[int] = []
+            for tier in range(1, max_tier + 1):
+                ids.extend(self._terms_by_tier.get(tier, ()))
+            pool = self._term_pools[max_tier] = tuple(ids)
+        return pool
+
+    def get_route_components(self, difficulty: str) -> RouteComponents:
+        """難易度別の連結成分（版ごとに1回だけ作る。不明な難易度は hard 扱い）"""
+        if difficulty not in DIFFICULTY_FILTERS:
+            difficulty = 'hard'
+        max_tier = DIFFICULTY_FILTERS[difficulty][0]
+        return self.get_derived(
+            f'route_components:{difficulty}',
+            lambda snapshot: _build_route_components(
+                snapshot.get_term_pool(max_tier), snapshot.get_adjacency(difficulty)
+            )
+        )
+
+    def get_bitset_graph(self, difficulty: str) -> BitsetGraph:
+        """難易度別の隣接をビットマスクで持つグラフ（ルート探索用、版ごとに1回だけ作る）"""
+        if difficulty not in DIFFICULTY_FILTERS:
+            difficulty = 'hard'
+        return self.get_derived(
+            f'bitset_graph:{difficulty}',
+            lambda snapshot: build_bitset_graph(snapshot.get_adjacency(difficulty))
+        )
 
     def get_neighbors(self, term_id: int) -> Set[int]:
         """隣接ノード（1hop）を取得"""
+        if self._graph is not None:
+            return set(self._graph.neighbors_of(term_id))
         return self._neighbors.get(term_id, set())
 
     def get_edge(self, term_a: int, term_b: int) -> Optional[Edge]:
         """2つの用語間のエッジを取得"""
+        if self._graph is not None:
+            edge_id = self._graph.edge_between(term_a, term_b)
+            return self._edges_by_id.get(edge_id) if edge_id is not None else None
         key = (min(term_a, term_b), max(term_a, term_b))
         return self._edge_map.get(key)
 
     def get_edges_for_term(self, term_id: int) -> List[Edge]:
         """用語に接続するエッジ一覧を取得"""
+        if self._graph is not None:
+            return [self._edges_by_id[edge_id] for edge_id in self._graph.edge_ids_of(term_id)]
         return self._edges_by_term.get(term_id, [])
 
+    def get_adjacency(self, difficulty: str) -> Mapping[int, Sequence[int]]:
+        """難易度別の事前計算済み隣接（term_id -> 隣接ノードID）を取得"""
+        if self._graph is not None:
+            return self._graph.adjacency(difficulty)
+        return self._filtered_neighbors[difficulty]
+
+    def get_filtered_neighbors(self, term_id: int, difficulty: str) -> Tuple[int, ...]:
+        """難易度の範囲内で到達できる隣接ノードを取得（事前計算済み）"""
+        return tuple(self.get_adjacency(difficulty).get(term_id, ()))
+
     def get_neighbors_with_filter(
         self,
         term_id: int,
@@ -156,6 +549,9 @@ class DataCache:
         """
         フィルタ付きで隣接ノードを取得
 
+        難易度定義（DIFFICULTY_FILTERS）と一致する条件なら事前計算済みの
+        隣接を返し、それ以外はエッジを走査して絞り込む。
+
         Args:
             term_id: 現在のノードID
             max_tier: 最大Tier
@@ -164,6 +560,13 @@ class DataCache:
         Returns:
             条件を満たす隣接ノードIDリスト
         """
+        difficulty = _FILTER_LEVELS.get((max_tier, frozenset(allowed_difficulties)))
+        if difficulty is not None:
+            return list(self.get_filtered_neighbors(term_id, difficulty))
+        if self._graph is not None:
+            # CSR版は _edges_by_term を持たないので行のエッジ難易度・Tierで絞る
+            return self._graph.neighbors_with_filter(term_id, max_tier, allowed_difficulties)
+
         result = []
         for edge in self._edges_by_term.get(term_id, []):
             # エッジ難易度チェック
@@ -181,6 +584,180 @@ class DataCache:
         return result
 
 
+class DataCache:
+    """
+    データキャッシュ（シングルトン）
+
+    現在公開中の CacheSnapshot への参照を持つ。読み取りメソッドは
+    呼び出し時点のスナップショットに委譲する。複数回の読み取りで
+    同じ版を見る必要がある処理は snapshot() で版を固定すること。
+    """
+
+    _instance: Optional['DataCache'] = None
+    _initialized: bool = False
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if self._initialized:
+            return
+
+        self._snapshot = CacheSnapshot()
+        # 書き込み（再読み込み・差分更新）同士を直列化する。読み手は取得しない。
+        self._write_lock = threading.Lock()
+
+        self._initialized = True
+
+    def snapshot(self) -> CacheSnapshot:
+        """現在公開中のスナップショットを取得（リクエスト内で版を固定する用）"""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """公開中スナップショットの版番号（更新のたびに増える）"""
+        return self._snapshot.version
+
+    @property
+    def terms(self) -> Dict[int, Term]:
+        return self._snapshot.terms
+
+    @property
+    def edges(self) -> List[Edge]:
+        return self._snapshot.edges
+
+    def load_from_db(self):
+        """DBからデータを読み込み、新しいスナップショットとして公開する"""
+        with self._write_lock:
+            db = SessionLocal()
+            try:
+                terms: Dict[int, Term] = {}
+                edges: Dict[int, Edge] = {}
+
+                # terms読み込み
+                terms_result = db.execute(text("SELECT id, name, tier, category, description FROM terms"))
+                for row in terms_result:
+                    term = Term(
+                        id=row.id,
+                        name=row.name,
+                        tier=row.tier,
+                        category=row.category,
+                        description=row.description or ""
+                    )
+                    terms[term.id] = term
+
+                # edges読み込み
+                edges_result = db.execute(text("SELECT id, term_a, term_b, difficulty, keyword, description FROM edges"))
+                for row in edges_result:
+                    edge = Edge(
+                        id=row.id,
+                        term_a=row.term_a,
+                        term_b=row.term_b,
+                        difficulty=row.difficulty,
+                        keyword=row.keyword or "",
+                        description=row.description or ""
+                    )
+                    edges[edge.id] = edge
+            finally:
+                db.close()
+
+            # インデックス構築まで済ませてから参照を差し替える
+            self._snapshot = CacheSnapshot(
+                terms, edges,
+                version=self._snapshot.version + 1,
+                backend=settings.cache_graph_backend
+            )
+
+    # ========== 差分更新（管理画面のCRUD用） ==========
+    # DBへの書き込み後に呼び出し、全件再読み込みせずにキャッシュへ反映する。
+
+    def apply_changes(
+        self,
+        upsert_terms: Iterable[Term] = (),
+        delete_terms: Iterable[int] = (),
+        upsert_edges: Iterable[Edge] = (),
+        delete_edges: Iterable[int] = ()
+    ):
+        """
+        複数の差分をまとめて1つの新しいスナップショットとして公開する
+
+        適用順: エッジ削除 → 用語削除 → 用語追加・更新 → エッジ追加・更新
+        CSR版のグラフは最後に1回だけ作り直す（finish_changes）。
+        """
+        with self._write_lock:
+            snapshot = self._snapshot.copy(version=self._snapshot.version + 1)
+            for edge_id in delete_edges:
+                snapshot._delete_edge(edge_id)
+            snapshot._delete_terms(delete_terms)
+            for term in upsert_terms:
+                snapshot._upsert_term(term)
+            for edge in upsert_edges:
+                snapshot._upsert_edge(edge)
+            snapshot.finish_changes()
+            self._snapshot = snapshot
+
+    def upsert_term(self, term: Term):
+        """用語を追加・更新"""
+        self.apply_changes(upsert_terms=[term])
+
+    def delete_term(self, term_id: int):
+        """用語と、それに接続するエッジを削除"""
+        self.apply_changes(delete_terms=[term_id])
+
+    def upsert_edge(self, edge: Edge):
+        """エッジを追加・更新（端点の付け替えにも対応）"""
+        self.apply_changes(upsert_edges=[edge])
+
+    def delete_edge(self, edge_id: int):
+        """エッジを削除"""
+        self.apply_changes(delete_edges=[edge_id])
+
+    # ========== 読み取りAPI（公開中スナップショットへ委譲） ==========
+
+    def get_term(self, term_id: int) -> Optional[Term]:
+        """用語を取得"""
+        return self._snapshot.get_term(term_id)
+
+    def get_terms_by_max_tier(self, max_tier: int) -> List[int]:
+        """指定Tier以下の全用語IDを取得"""
+        return self._snapshot.get_terms_by_max_tier(max_tier)
+
+    def get_term_pool(self, max_tier: int) -> Tuple[int, ...]:
+        """指定Tier以下の全用語ID（読み取り専用タプル）"""
+        return self._snapshot.get_term_pool(max_tier)
+
+    def get_route_components(self, difficulty: str) -> RouteComponents:
+        """難易度別の連結成分とルート長の上限"""
+        return self._snapshot.get_route_components(difficulty)
+
+    def get_neighbors(self, term_id: int) -> Set[int]:
+        """隣接ノード（1hop）を取得"""
+        return self._snapshot.get_neighbors(term_id)
+
+    def get_edge(self, term_a: int, term_b: int) -> Optional[Edge]:
+        """2つの用語間のエッジを取得"""
+        return self._snapshot.get_edge(term_a, term_b)
+
+    def get_edges_for_term(self, term_id: int) -> List[Edge]:
+        """用語に接続するエッジ一覧を取得"""
+        return self._snapshot.get_edges_for_term(term_id)
+
+    def get_filtered_neighbors(self, term_id: int, difficulty: str) -> Tuple[int, ...]:
+        """難易度の範囲内で到達できる隣接ノードを取得（事前計算済み）"""
+        return self._snapshot.get_filtered_neighbors(term_id, difficulty)
+
+    def get_neighbors_with_filter(
+        self,
+        term_id: int,
+        max_tier: int,
+        allowed_difficulties: List[str]
+    ) -> List[int]:
+        """フィルタ付きで隣接ノードを取得（CacheSnapshot.get_neighbors_with_filter 参照）"""
+        return self._snapshot.get_neighbors_with_filter(term_id, max_tier, allowed_difficulties)
+
+
 # グローバルキャッシュインスタンス
 _cache: Optional[DataCache] = None
 _lock = threading.Lock()
@@ -192,8 +769,10 @@ def get_cache() -> DataCache:
     if _cache is None:
         with _lock:
             if _cache is None:  # double-checked locking
-                _cache = DataCache()
-                _cache.load_from_db()
+                cache = DataCache()
+                cache.load_from_db()
+                # 読み込み完了後に公開する（空のキャッシュを他スレッドに見せない）
+                _cache = cache
     return _cache
 
 
@@ -202,10 +781,5 @@ def reset_cache():
     global _cache
     if _cache is not None:
         _cache._initialized = False
-        _cache.terms = {}
-        _cache.edges = []
-        _cache._terms_by_tier = {}
-        _cache._neighbors = {}
-        _cache._edges_by_term = {}
-        _cache._edge_map = {}
+        _cache._snapshot = CacheSnapshot()
     _cache = None
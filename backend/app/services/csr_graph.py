@@ -0,0 +1,190 @@
+"""
+CSR（圧縮疎行列）形式の用語グラフ
+
+DataCache の隣接インデックス（dict + set/list）の代わりに、
+連続した array('i') / array('b') で隣接関係を保持する。
+用語数が数万〜数十万規模になってもPythonオブジェクトをほぼ増やさずに済む。
+
+- offsets[i]..offsets[i+1] が密インデックス i の用語の行
+- neighbors / edge_ids / edge_codes は行ごとに並んだ並列配列
+- 難易度別の隣接も同じ形式で事前計算しておく
+
+行内の並びはエッジの読み込み順（dict版の _edges_by_term と同じ）。
+"""
+
+from array import array
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, Optional, Tuple
+
+if TYPE_CHECKING:
+    from app.services.cache import Edge, Term
+
+# エッジ難易度のコード（未知の値は -1）
+DIFFICULTY_CODES: Dict[str, int] = {'easy': 0, 'normal': 1, 'hard': 2}
+
+# 用語マスタにないIDのTier（どの難易度の max_tier も超える）
+_UNKNOWN_TIER = 127
+
+
+class CsrAdjacency(Mapping):
+    """難易度別の隣接（term_id -> 隣接ノードID配列）を dict と同じ感覚で引けるビュー"""
+
+    __slots__ = ('_graph', '_offsets', '_neighbors')
+
+    def __init__(self, graph: 'CsrGraph', offsets: array, neighbors: array):
+        self._graph = graph
+        self._offsets = offsets
+        self._neighbors = neighbors
+
+    def __getitem__(self, term_id: int) -> array:
+        i = self._graph.index[term_id]
+        return self._neighbors[self._offsets[i]:self._offsets[i + 1]]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._graph.term_ids)
+
+    def __len__(self) -> int:
+        return len(self._graph.term_ids)
+
+
+class CsrGraph:
+    """用語グラフのCSR表現（構築後は変更しない）"""
+
+    __slots__ = (
+        'index', 'term_ids', 'tiers',
+        'offsets', 'neighbors', 'edge_ids', 'edge_codes',
+        '_adjacency',
+    )
+
+    def __init__(
+        self,
+        terms: Dict[int, 'Term'],
+        edges: Iterable['Edge'],
+        levels: Dict[str, Tuple[int, Tuple[str, ...]]]
+    ):
+        """
+        Args:
+            terms: term_id -> Term
+            edges: エッジ一覧（この順で各行に並ぶ）
+            levels: 難易度 -> (max_tier, 許可エッジ難易度)
+        """
+        edges = list(edges)
+
+        # 密インデックス（エッジだけに現れるIDも行を持たせる）
+        self.index: Dict[int, int] = {term_id: i for i, term_id in enumerate(terms)}
+        for edge in edges:
+            for term_id in (edge.term_a, edge.term_b):
+                if term_id not in self.index:
+                    self.index[term_id] = len(self.index)
+
+        n = len(self.index)
+        self.term_ids = array('i', self.index)
+        self.tiers = array('b', [_UNKNOWN_TIER]) * n
+        for term_id, term in terms.items():
+            self.tiers[self.index[term_id]] = term.tier
+
+        # 次数を数えて行の開始位置を決める
+        degree = [0] * n
+        for edge in edges:
+            degree[self.index[edge.term_a]] += 1
+            degree[self.index[edge.term_b]] += 1
+
+        self.offsets = array('i', [0]) * (n + 1)
+        for i in range(n):
+            self.offsets[i + 1] = self.offsets[i] + degree[i]
+
+        total = self.offsets[n]
+        self.neighbors = array('i', [0]) * total
+        self.edge_ids = array('i', [0]) * total
+        self.edge_codes = array('b', [0]) * total
+
+        cursor = list(self.offsets[:n])
+        for edge in edges:
+            code = DIFFICULTY_CODES.get(edge.difficulty, -1)
+            for src, dst in ((edge.term_a, edge.term_b), (edge.term_b, edge.term_a)):
+                i = self.index[src]
+                pos = cursor[i]
+                self.neighbors[pos] = dst
+                self.edge_ids[pos] = edge.id
+                self.edge_codes[pos] = code
+                cursor[i] = pos + 1
+
+        # 難易度別の隣接（同じCSR形式）
+        self._adjacency: Dict[str, CsrAdjacency] = {}
+        for difficulty, (max_tier, allowed) in levels.items():
+            allowed_codes = {DIFFICULTY_CODES[d] for d in allowed if d in DIFFICULTY_CODES}
+            offsets = array('i', [0]) * (n + 1)
+            filtered = array('i')
+            for i in range(n):
+                for pos in range(self.offsets[i], self.offsets[i + 1]):
+                    if self.edge_codes[pos] not in allowed_codes:
+                        continue
+                    neighbor_id = self.neighbors[pos]
+                    if self.tiers[self.index[neighbor_id]] <= max_tier:
+                        filtered.append(neighbor_id)
+                offsets[i + 1] = len(filtered)
+            self._adjacency[difficulty] = CsrAdjacency(self, offsets, filtered)
+
+    def _row(self, term_id: int) -> Optional[Tuple[int, int]]:
+        """用語の行範囲 (start, end) を取得"""
+        i = self.index.get(term_id)
+        if i is None:
+            return None
+        return self.offsets[i], self.offsets[i + 1]
+
+    def neighbors_of(self, term_id: int) -> array:
+        """隣接ノードID（1hop）"""
+        row = self._row(term_id)
+        if row is None:
+            return array('i')
+        return self.neighbors[row[0]:row[1]]
+
+    def edge_ids_of(self, term_id: int) -> array:
+        """用語に接続するエッジID"""
+        row = self._row(term_id)
+        if row is None:
+            return array('i')
+        return self.edge_ids[row[0]:row[1]]
+
+    def neighbors_with_filter(self, term_id: int, max_tier: int, allowed: Iterable[str]) -> list:
+        """
+        任意の条件で絞り込んだ隣接ノードID（行を走査、O(次数)）
+
+        難易度定義にない条件用。並びは行内の並び（dict版の走査順と同じ）。
+        """
+        row = self._row(term_id)
+        if row is None:
+            return []
+        allowed_codes = {DIFFICULTY_CODES[d] for d in allowed if d in DIFFICULTY_CODES}
+        result = []
+        for pos in range(row[0], row[1]):
+            if self.edge_codes[pos] not in allowed_codes:
+                continue
+            neighbor_id = self.neighbors[pos]
+            if self.tiers[self.index[neighbor_id]] <= max_tier:
+                result.append(neighbor_id)
+        return result
+
+    def edge_between(self, term_a: int, term_b: int) -> Optional[int]:
+        """
+        2つの用語間のエッジIDを取得（行内を探索、O(次数)）
+
+        同じ組のエッジが複数あればIDが最大のもの（dict版の _edge_map と同じ）。
+        """
+        row = self._row(term_a)
+        if row is None:
+            return None
+        found = None
+        pos = row[0]
+        while True:
+            try:
+                pos = self.neighbors.index(term_b, pos, row[1])
+            except ValueError:
+                return found
+            if found is None or self.edge_ids[pos] > found:
+                found = self.edge_ids[pos]
+            pos += 1
+
+    def adjacency(self, difficulty: str) -> CsrAdjacency:
+        """難易度別の隣接ビュー"""
+        return self._adjacency[difficulty]
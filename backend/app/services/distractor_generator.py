@@ -9,10 +9,63 @@
 誤答条件: 正解と2hop以上離れている（直接繋がっていない）
 """
 
-from typing import List, Optional, Set
+from typing import List, Optional, Sequence, Set, Tuple
 import random
 
-from app.services.cache import get_cache
+from app.services.cache import CacheSnapshot, get_cache
+
+# 棄却サンプリングの試行回数（ダミー1件あたり）。超えたら全件走査に切り替える
+REJECTION_ATTEMPTS_PER_PICK = 8
+
+
+def _max_tier(difficulty: str) -> int:
+    """難易度に応じたTier範囲"""
+    if difficulty == 'easy':
+        return 1
+    elif difficulty == 'normal':
+        return 2
+    else:  # hard
+        return 3
+
+
+def _sample_distractors(
+    pool: Tuple[int, ...],
+    correct_id: int,
+    correct_neighbors: Set[int],
+    visited: Set[int],
+    count: int,
+    rng: random.Random
+) -> List[int]:
+    """候補プールから条件を満たすダミーを count 個選ぶ"""
+
+    def is_candidate(term_id: int) -> bool:
+        # 正解自体・訪問済み・1hop（直接繋がっている）を除外 → 2hop以上のみ残る
+        return (
+            term_id != correct_id
+            and term_id not in visited
+            and term_id not in correct_neighbors
+        )
+
+    # 棄却サンプリング: 全用語を走査せず、ランダムな添字を引いて条件を満たすものだけ採る
+    # 除外されるのは訪問済み・1hop程度なので、通常は count 回前後で埋まる
+    chosen: List[int] = []
+    if pool:
+        seen: Set[int] = set()
+        for _ in range(count * REJECTION_ATTEMPTS_PER_PICK):
+            term_id = pool[rng.randrange(len(pool))]
+            if term_id in seen:
+                continue
+            seen.add(term_id)
+            if is_candidate(term_id):
+                chosen.append(term_id)
+                if len(chosen) == count:
+                    return chosen
+
+    # 候補が少なく引き当てられなかった場合は全件を走査して選ぶ
+    candidates = [term_id for term_id in pool if is_candidate(term_id)]
+    if len(candidates) <= count:
+        return candidates
+    return rng.sample(candidates, count)
 
 
 def generate_distractors(
@@ -21,7 +74,8 @@ def generate_distractors(
     visited: Set[int],
     difficulty: str,
     count: int,
-    seed: Optional[int] = None
+    seed: Optional[int] = None,
+    snapshot: Optional[CacheSnapshot] = None
 ) -> List[int]:
     """
     ダミー候補を生成（キャッシュ版）
@@ -40,47 +94,57 @@ def generate_distractors(
         difficulty: 難易度 ('easy', 'normal', 'hard')
         count: 生成するダミー数
         seed: 乱数シード（決定性のため）
+        snapshot: 参照するキャッシュの版（省略時は現在の版）
 
     Returns:
         ダミー用語IDのリスト
     """
     rng = random.Random(seed)
+    cache = snapshot if snapshot is not None else get_cache().snapshot()
 
-    # 難易度に応じたTier範囲を決定
-    if difficulty == 'easy':
-        max_tier = 1
-    elif difficulty == 'normal':
-        max_tier = 2
-    else:  # hard
-        max_tier = 3
-
-    cache = get_cache()
-
-    # 該当Tier範囲の全用語を取得
-    all_candidates = cache.get_terms_by_max_tier(max_tier)
+    # 該当Tier範囲の全用語（版ごとに作り置きされたタプル、コピーしない）
+    pool = cache.get_term_pool(_max_tier(difficulty))
 
-    # 正解の隣接ノード（1hop）を取得
-    correct_neighbors = cache.get_neighbors(correct_id)
+    return _sample_distractors(
+        pool, correct_id, cache.get_neighbors(correct_id), visited, count, rng
+    )
 
-    # フィルタリング
-    candidates = []
-    for term_id in all_candidates:
-        # 正解自体を除外
-        if term_id == correct_id:
-            continue
 
-        # 訪問済みを除外
-        if term_id in visited:
-            continue
+def generate_route_distractors(
+    route: Sequence[int],
+    difficulty: str,
+    count: int,
+    seed: Optional[int] = None,
+    snapshot: Optional[CacheSnapshot] = None
+) -> List[List[int]]:
+    """
+    ルート全体のダミーをまとめて生成
 
-        # 1hop（直接繋がっている）を除外 → 2hop以上のみ残る
-        if term_id in correct_neighbors:
-            continue
+    各ステップの条件は generate_distractors と同じ
+    （そのステップまでの訪問済みと、正解の1hopを除外）。
+    乱数・候補プール・訪問済み集合はステップ間で使い回し、
+    訪問済みはステップごとに1件ずつ足していく。
 
-        candidates.append(term_id)
+    Args:
+        route: 用語IDのルート
+        difficulty: 難易度 ('easy', 'normal', 'hard')
+        count: 1ステップあたりのダミー数
+        seed: 乱数シード（決定性のため）
+        snapshot: 参照するキャッシュの版（省略時は現在の版）
 
-    # ランダムにcount個選択
-    if len(candidates) <= count:
-        return candidates
-    else:
-        return rng.sample(candidates, count)
+    Returns:
+        ステップごとのダミー用語IDのリスト（最後のステップ以外、len(route) - 1 件）
+    """
+    rng = random.Random(seed)
+    cache = snapshot if snapshot is not None else get_cache().snapshot()
+    pool = cache.get_term_pool(_max_tier(difficulty))
+
+    distractors: List[List[int]] = []
+    visited: Set[int] = set()
+    for step_no in range(len(route) - 1):
+        visited.add(route[step_no])
+        correct_id = route[step_no + 1]
+        distractors.append(_sample_distractors(
+            pool, correct_id, cache.get_neighbors(correct_id), visited, count, rng
+        ))
+    return distractors
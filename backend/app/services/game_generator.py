@@ -0,0 +1,86 @@
+"""
+ゲーム生成（ルート + 各ステップのダミー）
+
+/games/start と事前生成プール（route_pool）の両方から使う。
+結果はキャッシュの版（version）付きで返し、プール側で版が古くなった
+ものを捨てられるようにする。
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.config import settings
+from app.services.cache import CacheSnapshot, get_cache
+from app.services.distractor_generator import generate_route_distractors
+from app.services.route_generator import RouteStats, generate_route
+
+logger = logging.getLogger(__name__)
+
+# ルート生成のリトライ回数（walk: 最悪 20 × 50 回のランダムウォーク、
+# backtrack: 最悪 20 スタート × route_max_expansions 回の展開）
+MAX_START_RETRIES = 20
+MAX_SAME_START_RETRIES = 50
+# 1ステップあたりのダミー数（正解と合わせて4択）
+DISTRACTOR_COUNT = 3
+
+
+@dataclass(frozen=True)
+class GeneratedGame:
+    """生成済みのゲーム"""
+    version: int  # 生成に使ったキャッシュの版
+    route: List[int]  # 用語IDのルート
+    distractors: List[List[int]]  # ステップごとのダミー（最後のステップ以外、len(route) - 1 件）
+
+
+def generate_game(
+    difficulty: str,
+    node_count: int,
+    snapshot: Optional[CacheSnapshot] = None
+) -> GeneratedGame:
+    """
+    ルートと各ステップのダミーを生成する
+
+    Args:
+        difficulty: 難易度 ('easy', 'normal', 'hard')
+        node_count: ルートのノード数（問題数 + 1）
+        snapshot: 参照するキャッシュの版（省略時は現在の版を固定して使う）
+
+    settings.route_deadline_ms を超えたらルート生成を打ち切り、
+    それまでの最長ルートでゲームを作る（打ち切ったことはログに残す）。
+
+    Returns:
+        GeneratedGame（目標長に届かなかった場合は短いルート、空のこともある）
+
+    Raises:
+        ValueError: スタート地点が見つからない場合
+    """
+    if snapshot is None:
+        snapshot = get_cache().snapshot()
+
+    stats = RouteStats()
+    route = generate_route(
+        target_length=node_count,
+        difficulty=difficulty,
+        max_start_retries=MAX_START_RETRIES,
+        max_same_start_retries=MAX_SAME_START_RETRIES,
+        snapshot=snapshot,
+        engine=settings.route_engine,
+        max_expansions=settings.route_max_expansions,
+        lookahead_depth=settings.route_lookahead_depth,
+        stats=stats,
+        deadline_ms=settings.route_deadline_ms or None
+    )
+    if stats.timed_out:
+        logger.warning(
+            "Route generation timed out: %s %d/%d nodes in %.1f ms (starts=%d walks=%d expansions=%d)",
+            difficulty, len(route), node_count, stats.elapsed_ms,
+            stats.starts, stats.walks, stats.expansions
+        )
+
+    # ダミーは「現在までの訪問済み」と「正解の1hop」を除外して選ぶ
+    distractors = generate_route_distractors(
+        route, difficulty, count=DISTRACTOR_COUNT, snapshot=snapshot
+    )
+
+    return GeneratedGame(version=snapshot.version, route=route, distractors=distractors)
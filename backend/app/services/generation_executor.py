@@ -0,0 +1,149 @@
+"""
+生成処理用のワーカープール
+
+ルート生成・ダミー生成はCPU処理なので、async ハンドラ内で直接実行すると
+その間イベントループ（同じワーカーの他リクエスト）が止まる。
+ここではスレッドプールに投げて await し、イベントループを空けておく。
+
+- 同時実行数は max_workers で制限し、超えた分は待ち行列に入る
+- 待ち行列が max_pending を超えたら受け付けずに GenerationOverloadedError を送出する
+- 待ち時間・実行時間などを metrics() で参照できる
+
+プロセスプールは使わない（子プロセスごとにキャッシュを読み込み直し、
+管理画面の更新も届かなくなるため）。
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.config import settings
+
+
+class GenerationOverloadedError(Exception):
+    """待ち行列が上限に達していて受け付けられない"""
+
+
+class GenerationExecutor:
+    """同時実行数と待ち行列長を制限したスレッドプール"""
+
+    def __init__(self, max_workers: int, max_pending: int):
+        """
+        Args:
+            max_workers: 同時に生成処理を実行するスレッド数
+            max_pending: 実行中 + 待機中の上限（超えたら受け付けない）
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="generation"
+        )
+        self._lock = threading.Lock()
+
+        # メトリクス
+        self._queued = 0
+        self._running = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+        self._run_max = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        fn(*args, **kwargs) をワーカースレッドで実行して結果を待つ
+
+        Raises:
+            GenerationOverloadedError: 待ち行列が上限に達している場合
+        """
+        with self._lock:
+            if self._queued + self._running >= self.max_pending:
+                self._rejected += 1
+                raise GenerationOverloadedError("Generation queue is full")
+            self._queued += 1
+            self._submitted += 1
+
+        submitted_at = time.perf_counter()
+
+        def task():
+            started_at = time.perf_counter()
+            wait = started_at - submitted_at
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._wait_total += wait
+                self._wait_max = max(self._wait_max, wait)
+
+            ok = False
+            try:
+                result = fn(*args, **kwargs)
+                ok = True
+                return result
+            finally:
+                elapsed = time.perf_counter() - started_at
+                with self._lock:
+                    self._running -= 1
+                    self._run_total += elapsed
+                    self._run_max = max(self._run_max, elapsed)
+                    if ok:
+                        self._completed += 1
+                    else:
+                        self._failed += 1
+
+        return await asyncio.wrap_future(self._executor.submit(task))
+
+    def metrics(self) -> Dict[str, Any]:
+        """現在の状態と累計値"""
+        with self._lock:
+            started = self._completed + self._failed + self._running
+            finished = self._completed + self._failed
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "running": self._running,
+                "queued": self._queued,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_wait_ms": (self._wait_total / started * 1000) if started else 0.0,
+                "max_wait_ms": self._wait_max * 1000,
+                "avg_run_ms": (self._run_total / finished * 1000) if finished else 0.0,
+                "max_run_ms": self._run_max * 1000,
+            }
+
+    def shutdown(self):
+        """ワーカースレッドを停止（実行中の処理は完了を待つ）"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+# グローバルインスタンス
+_executor: Optional[GenerationExecutor] = None
+_lock = threading.Lock()
+
+
+def get_generation_executor() -> GenerationExecutor:
+    """ワーカープールを取得（初回に作成）"""
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = GenerationExecutor(
+                    max_workers=settings.generation_workers,
+                    max_pending=settings.generation_max_pending
+                )
+    return _executor
+
+
+def shutdown_generation_executor():
+    """ワーカープールを停止する（アプリ終了時）"""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
@@ -0,0 +1,106 @@
+"""
+エンコード・圧縮済みのレスポンスボディ
+
+キャッシュ全件を返す一覧（/admin/terms/all など）を、キャッシュの版ごとに
+1回だけJSONエンコード・gzip圧縮しておき、リクエストではそのまま返す。
+
+- ETag はボディの内容ハッシュ。再読み込みしても中身が同じなら変わらず、
+  ワーカー間でも一致する。gzip 版はバイト列が違うので別のタグ（-gz 付き）にする
+- If-None-Match が一致すれば 304（ボディなし）
+- Accept-Encoding に gzip があれば圧縮済みのボディを返す
+"""
+
+import gzip
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from fastapi import Response
+
+from app.services.cache import encode_json
+
+# gzip 版の ETag に付ける接尾辞
+GZIP_ETAG_SUFFIX = "-gz"
+
+# 毎回検証させる（304 なら転送量はほぼゼロ）。管理データなので共有キャッシュには置かせない
+CACHE_CONTROL = "private, no-cache"
+
+
+@dataclass(frozen=True)
+class PrecompressedBody:
+    """エンコード済みJSONと、その gzip 圧縮版・ETag"""
+    body: bytes
+    gzipped: bytes
+    etag: str  # body（無圧縮）のETag
+
+    @property
+    def gzip_etag(self) -> str:
+        """gzipped のETag（無圧縮と同じタグだと、キャッシュが同じバイト列とみなしてしまう）"""
+        return self.etag[:-1] + GZIP_ETAG_SUFFIX + '"'
+
+    @classmethod
+    def encode(cls, value: Any) -> "PrecompressedBody":
+        body = encode_json(value)
+        return cls(
+            body=body,
+            # mtime=0 で同じ内容なら同じバイト列にする
+            gzipped=gzip.compress(body, compresslevel=9, mtime=0),
+            etag='"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+        )
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match ヘッダ（カンマ区切り・弱いETag可）が etag に一致するか"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Accept-Encoding で gzip を受け付けているか（q=0 は除く）"""
+    if not accept_encoding:
+        return False
+    for coding in accept_encoding.split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+        q = params.strip().replace(" ", "")
+        if q.startswith("q="):
+            try:
+                if float(q[2:] or 0) <= 0:
+                    return False
+            except ValueError:
+                # 不正な q 値は受け付けないものとして扱う
+                return False
+        return True
+    return False
+
+
+def precompressed_response(
+    payload: PrecompressedBody,
+    if_none_match: Optional[str],
+    accept_encoding: Optional[str],
+    cache_control: str = CACHE_CONTROL
+) -> Response:
+    """条件付きGET・gzip に対応したレスポンスを作る（ETag は返す表現ごと）"""
+    gzipped = accepts_gzip(accept_encoding)
+    etag = payload.gzip_etag if gzipped else payload.etag
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=payload.gzipped, media_type="application/json", headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
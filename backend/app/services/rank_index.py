@@ -0,0 +1,509 @@
+"""
+ランキングのメモリ内インデックス
+
+結果送信・全体ランキングのたびに Postgres で順位を数えずに済むよう、
+問題数（total_steps）ごとと全体のランキングをメモリに持つ。
+
+- 順位: スコアごとの件数を Fenwick 木で持ち、「自分より高いスコアの件数 + 1」を O(log S) で求める
+  （S はスコアの上限。件数が増えても変わらない）
+- 上位N件: 上位 capacity 件だけを並べて保持する。削除・スコア変更で件数が
+  足りなくなったらNoneを返し、呼び出し側でDBから取得する（次の再読み込みで戻る）
+
+起動時に leaderboard / leaderboard_score_counts から読み込み、
+submit_game_result / update_game / ゲーム削除でその場で更新する。
+複数ワーカーで動かす場合は他ワーカーの更新が届かないので、
+refresh_interval ごとにDBから読み直して揃える。
+読み直している間の更新は控えておき、差し替えるときに当て直す（読み込み結果に
+含まれていたかどうかは同じスナップショットで確かめるので、二重に数えない）。
+差し替えた後に届いた更新は、コミットしたトランザクションIDが読み込んだ
+スナップショットに含まれていれば反映済みとして読み飛ばす。
+"""
+
+import asyncio
+import bisect
+import logging
+import threading
+from array import array
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# 読み直し中に控えておく更新の種類
+_RECORD = "record"
+_REMOVE = "remove"
+_RENAME = "rename"
+
+# Fenwick 木の初期サイズ（スコア上限: 50問 × 200点 + ライフボーナス 3 × 300点 に収まる）
+_INITIAL_SCORE_CAPACITY = 1 << 14
+
+
+class _ScoreCounts:
+    """スコアごとの件数（Fenwick 木、スコア上限を超えたら倍に広げる）"""
+
+    __slots__ = ('_tree', 'total')
+
+    def __init__(self, capacity: int = _INITIAL_SCORE_CAPACITY):
+        self._tree = array('q', [0]) * (capacity + 1)
+        self.total = 0
+
+    def _grow(self, score: int):
+        capacity = len(self._tree) - 1
+        while capacity <= score:
+            capacity *= 2
+        counts = [self.count_at(s) for s in range(len(self._tree) - 1)]
+        self._tree = array('q', [0]) * (capacity + 1)
+        self.total = 0
+        for s, count in enumerate(counts):
+            if count:
+                self.add(s, count)
+
+    def add(self, score: int, delta: int = 1):
+        """score の件数を delta だけ増減"""
+        score = max(score, 0)
+        if score >= len(self._tree) - 1:
+            self._grow(score)
+        self.total += delta
+        i = score + 1
+        tree = self._tree
+        size = len(tree)
+        while i < size:
+            tree[i] += delta
+            i += i & -i
+
+    def count_at_most(self, score: int) -> int:
+        """score 以下の件数"""
+        if score < 0:
+            return 0
+        i = min(score + 1, len(self._tree) - 1)
+        tree = self._tree
+        result = 0
+        while i > 0:
+            result += tree[i]
+            i -= i & -i
+        return result
+
+    def count_at(self, score: int) -> int:
+        """ちょうど score の件数"""
+        return self.count_at_most(score) - self.count_at_most(score - 1)
+
+    def count_greater(self, score: int) -> int:
+        """score より高い件数"""
+        return self.total - self.count_at_most(score)
+
+
+@dataclass(frozen=True, slots=True)
+class RankEntry:
+    """ランキングの1件"""
+    game_id: str
+    score: int
+    cleared_steps: int
+    user_name: str
+    created_at: datetime
+
+    @property
+    def sort_key(self) -> Tuple[int, float, str]:
+        # score DESC, created_at DESC（DB側の ORDER BY と同じ）
+        return (-self.score, -self.created_at.timestamp(), self.game_id)
+
+
+@dataclass(frozen=True, slots=True)
+class _TxSnapshot:
+    """読み込んだときのDBのスナップショット（pg_current_snapshot() の xmin:xmax:xip_list）"""
+    xmin: int
+    xmax: int
+    xip: frozenset
+
+    @classmethod
+    def parse(cls, value: str) -> "_TxSnapshot":
+        xmin, xmax, xip = value.split(":")
+        return cls(int(xmin), int(xmax), frozenset(int(x) for x in xip.split(",") if x))
+
+    def contains(self, xid: int) -> bool:
+        """コミット済みのトランザクション xid の変更がこのスナップショットから見えるか"""
+        if xid < self.xmin:
+            return True
+        return xid < self.xmax and xid not in self.xip
+
+
+class _Board:
+    """1つのランキング（問題数ごと、または全体）"""
+
+    __slots__ = ('counts', '_keys', '_entries', 'capacity')
+
+    def __init__(self, capacity: int):
+        self.counts = _ScoreCounts()
+        self.capacity = capacity
+        # 上位 capacity 件（sort_key 昇順 = 順位順）
+        self._keys: List[Tuple[int, float, str]] = []
+        self._entries: List[RankEntry] = []
+
+    def _find(self, game_id: str) -> int:
+        for i, entry in enumerate(self._entries):
+            if entry.game_id == game_id:
+                return i
+        return -1
+
+    def _discard_top(self, game_id: str):
+        i = self._find(game_id)
+        if i >= 0:
+            del self._keys[i]
+            del self._entries[i]
+
+    def _insert_top(self, entry: RankEntry):
+        key = entry.sort_key
+        i = bisect.bisect_left(self._keys, key)
+        self._keys.insert(i, key)
+        self._entries.insert(i, entry)
+        if len(self._keys) > self.capacity:
+            self._keys.pop()
+            self._entries.pop()
+
+    def load_top(self, entry: RankEntry):
+        """DBから読んだ上位の1件を追加（読み込み時のみ）"""
+        self._insert_top(entry)
+
+    def record(self, entry: RankEntry, previous_score: Optional[int]):
+        i = self._find(entry.game_id)
+        if i >= 0:
+            # 上位に保持している行は、保持しているスコアの分を外して置き換える
+            # （同じゲームを二重に数えたり並べたりしない）
+            self.counts.add(self._entries[i].score, -1)
+            del self._keys[i]
+            del self._entries[i]
+        elif previous_score is not None:
+            self.counts.add(previous_score, -1)
+
+        # 上位の外に保持していない行があり、新しい1件が保持分の最下位より下なら、
+        # 本当の順位がわからないので上位には入れない（件数だけ数える）
+        hidden = self.counts.total - len(self._entries)
+        if hidden == 0 or (self._keys and entry.sort_key < self._keys[-1]):
+            self._insert_top(entry)
+        self.counts.add(entry.score)
+
+    def rename(self, game_id: str, user_name: str):
+        i = self._find(game_id)
+        if i >= 0:
+            entry = self._entries[i]
+            self._entries[i] = RankEntry(
+                entry.game_id, entry.score, entry.cleared_steps, user_name, entry.created_at
+            )
+
+    def remove(self, game_id: str, score: int):
+        self.counts.add(score, -1)
+        self._discard_top(game_id)
+
+    def rank(self, score: int) -> int:
+        return self.counts.count_greater(score) + 1
+
+    def top(self, limit: int) -> Optional[List[RankEntry]]:
+        # 保持している上位が limit 未満で、かつその外にも行があるなら正しい上位を返せない
+        if len(self._entries) < min(limit, self.counts.total):
+            return None
+        return self._entries[:limit]
+
+
+class RankIndex:
+    """問題数ごと + 全体のランキング"""
+
+    def __init__(self, capacity: int, refresh_interval: float = 0.0):
+        """
+        Args:
+            capacity: ランキングごとに保持する上位件数
+            refresh_interval: DBから読み直す間隔（秒）。0で読み直さない
+        """
+        self.capacity = capacity
+        self.refresh_interval = refresh_interval
+        self._boards: Optional[Dict[Optional[int], _Board]] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        # 読み直し中の更新（game_id → (種類, total_steps, RankEntry または新しい名前)）
+        # 読み直し中以外はNone
+        self._journal: Optional[Dict[str, Tuple[str, int, object]]] = None
+        # _boards を読み込んだスナップショット
+        self._loaded: Optional[_TxSnapshot] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._boards is not None
+
+    def _board(self, total_steps: Optional[int]) -> _Board:
+        board = self._boards.get(total_steps)
+        if board is None:
+            board = self._boards[total_steps] = _Board(self.capacity)
+        return board
+
+    def load_from_db(self):
+        """
+        leaderboard から読み込んで丸ごと差し替える（同期処理）
+
+        読み込みの間もロックは取らず、その間の record / rename / remove は
+        _journal に控えておく。差し替えの直前に、控えたゲームが読み込み結果に
+        どう含まれていたかを同じスナップショットで確かめてから当て直す。
+        """
+        with self._lock:
+            self._journal = {}
+
+        db = SessionLocal()
+        try:
+            # 全クエリを1つのスナップショットで読む（当て直すときの突き合わせに使う）
+            db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+            loaded = _TxSnapshot.parse(
+                db.execute(text("SELECT pg_current_snapshot()::text")).scalar()
+            )
+            boards = self._read_boards(db)
+
+            ranked: Dict[str, Optional[Tuple[int, int]]] = {}
+            while True:
+                with self._lock:
+                    missing = [
+                        game_id for game_id, (kind, _, _) in self._journal.items()
+                        if kind != _RENAME and game_id not in ranked
+                    ]
+                    if not missing:
+                        self._boards = boards
+                        self._loaded = loaded
+                        self._replay(ranked)
+                        self._journal = None
+                        break
+                # 突き合わせのクエリ中に増えた分は次の周回で読む
+                ranked.update(self._read_ranked(db, missing))
+        finally:
+            with self._lock:
+                self._journal = None
+            db.close()
+        logger.info("Rank index loaded: %d games", boards[None].counts.total)
+
+    def _read_boards(self, db) -> Dict[Optional[int], _Board]:
+        """leaderboard からランキングを組み立てる"""
+        boards: Dict[Optional[int], _Board] = {None: _Board(self.capacity)}
+
+        # スコア分布（件数はトリガーで集計済み、ゲーム数に依存しない）
+        counts = db.execute(text("""
+            SELECT total_steps, score, games
+            FROM leaderboard_score_counts
+            WHERE games > 0
+        """))
+        for row in counts:
+            board = boards.get(row.total_steps)
+            if board is None:
+                board = boards[row.total_steps] = _Board(self.capacity)
+            board.counts.add(row.score, row.games)
+            boards[None].counts.add(row.score, row.games)
+
+        # 問題数ごとの上位（インデックス順に capacity 件ずつ）
+        per_steps = db.execute(
+            text("""
+                SELECT s.total_steps, l.game_id, l.score, l.cleared_steps, l.user_name, l.created_at
+                FROM (
+                    SELECT DISTINCT total_steps FROM leaderboard_score_counts WHERE games > 0
+                ) s
+                CROSS JOIN LATERAL (
+                    SELECT game_id, score, cleared_steps, user_name, created_at
+                    FROM leaderboard
+                    WHERE total_steps = s.total_steps
+                    ORDER BY score DESC, created_at DESC
+                    LIMIT :limit
+                ) l
+            """),
+            {"limit": self.capacity}
+        )
+        for row in per_steps:
+            boards[row.total_steps].load_top(_entry_from_row(row))
+
+        overall = db.execute(
+            text("""
+                SELECT game_id, score, cleared_steps, user_name, created_at
+                FROM leaderboard
+                ORDER BY score DESC, created_at DESC
+                LIMIT :limit
+            """),
+            {"limit": self.capacity}
+        )
+        for row in overall:
+            boards[None].load_top(_entry_from_row(row))
+        return boards
+
+    def _read_ranked(self, db, game_ids: List[str]) -> Dict[str, Optional[Tuple[int, int]]]:
+        """
+        読み込みと同じスナップショットでの各ゲームの (total_steps, score)
+
+        Returns:
+            game_id → (total_steps, score)（載っていなければNone）
+        """
+        ranked: Dict[str, Optional[Tuple[int, int]]] = dict.fromkeys(game_ids)
+        rows = db.execute(
+            text("""
+                SELECT game_id, total_steps, score
+                FROM leaderboard
+                WHERE game_id = ANY(CAST(:ids AS uuid[]))
+            """),
+            {"ids": game_ids}
+        )
+        for row in rows:
+            ranked[str(row.game_id)] = (row.total_steps, row.score)
+        return ranked
+
+    def _replay(self, ranked: Dict[str, Optional[Tuple[int, int]]]):
+        """読み込み中に控えた更新を当て直す（ロックを持って呼ぶ）"""
+        for game_id, (kind, total_steps, value) in self._journal.items():
+            if kind == _RENAME:
+                self._board(total_steps).rename(game_id, value)
+                self._board(None).rename(game_id, value)
+                continue
+
+            # 読み込み結果に含まれていた分を外してから最新の状態を入れる
+            snapshot = ranked[game_id]
+            if snapshot is not None:
+                self._board(snapshot[0]).remove(game_id, snapshot[1])
+                self._board(None).remove(game_id, snapshot[1])
+            if kind == _RECORD:
+                self._board(total_steps).record(value, None)
+                self._board(None).record(value, None)
+
+    def record(
+        self,
+        game_id: str,
+        total_steps: int,
+        score: int,
+        cleared_steps: int,
+        user_name: str,
+        created_at: datetime,
+        previous_score: Optional[int] = None,
+        xid: Optional[int] = None
+    ):
+        """
+        結果送信を反映
+
+        Args:
+            previous_score: 既にランキングに載っていた場合の旧スコア（再送信）
+            xid: 結果をコミットしたトランザクションID（読み込み済みなら反映しない）
+        """
+        entry = RankEntry(str(game_id), score, cleared_steps, user_name, created_at)
+        with self._lock:
+            if self._journal is not None:
+                self._journal[entry.game_id] = (_RECORD, total_steps, entry)
+            if self._boards is None or self._is_loaded(xid):
+                return
+            self._board(total_steps).record(entry, previous_score)
+            self._board(None).record(entry, previous_score)
+
+    def rename(self, game_id: str, total_steps: int, user_name: str):
+        """名前変更を反映"""
+        with self._lock:
+            if self._journal is not None:
+                self._journal_rename(str(game_id), total_steps, user_name)
+            if self._boards is None:
+                return
+            self._board(total_steps).rename(str(game_id), user_name)
+            self._board(None).rename(str(game_id), user_name)
+
+    def remove(self, game_id: str, total_steps: int, score: int, xid: Optional[int] = None):
+        """
+        ランキングからの削除を反映
+
+        Args:
+            xid: 削除をコミットしたトランザクションID（読み込み済みなら反映しない）
+        """
+        with self._lock:
+            if self._journal is not None:
+                self._journal[str(game_id)] = (_REMOVE, total_steps, None)
+            if self._boards is None or self._is_loaded(xid):
+                return
+            self._board(total_steps).remove(str(game_id), score)
+            self._board(None).remove(str(game_id), score)
+
+    def _is_loaded(self, xid: Optional[int]) -> bool:
+        """xid の変更が今のランキングの読み込み結果に含まれているか（ロックを持って呼ぶ）"""
+        return xid is not None and self._loaded is not None and self._loaded.contains(xid)
+
+    def _journal_rename(self, game_id: str, total_steps: int, user_name: str):
+        """読み込み中の名前変更を控える（先に控えた結果送信があればその名前を変える）"""
+        change = self._journal.get(game_id)
+        if change is None or change[0] == _RENAME:
+            self._journal[game_id] = (_RENAME, total_steps, user_name)
+        elif change[0] == _RECORD:
+            self._journal[game_id] = (_RECORD, change[1], replace(change[2], user_name=user_name))
+
+    def rank(self, score: int, total_steps: Optional[int] = None) -> Optional[int]:
+        """
+        順位（自分より高いスコアの件数 + 1）
+
+        Returns:
+            順位（未読み込みならNone）
+        """
+        with self._lock:
+            if self._boards is None:
+                return None
+            board = self._boards.get(total_steps)
+            return board.rank(score) if board is not None else 1
+
+    def top(self, limit: int, total_steps: Optional[int] = None) -> Optional[List[RankEntry]]:
+        """
+        上位 limit 件
+
+        Returns:
+            上位のリスト（未読み込み、または保持分が足りない場合はNone）
+        """
+        with self._lock:
+            if self._boards is None:
+                return None
+            board = self._boards.get(total_steps)
+            return board.top(limit) if board is not None else []
+
+    async def _run(self):
+        """定期的に読み直すループ"""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await asyncio.to_thread(self.load_from_db)
+            except Exception:
+                logger.exception("Rank index refresh failed")
+
+    async def start(self):
+        """DBから読み込み、定期読み直しを開始（イベントループ上で呼ぶ）"""
+        try:
+            await asyncio.to_thread(self.load_from_db)
+        except Exception:
+            # 読み込めなくてもランキングはDBから引けるので起動は止めない
+            logger.exception("Rank index load failed")
+        if self.refresh_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """定期読み直しを止めて破棄する"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        with self._lock:
+            self._boards = None
+            self._loaded = None
+
+
+def _entry_from_row(row) -> RankEntry:
+    return RankEntry(str(row.game_id), row.score, row.cleared_steps, row.user_name, row.created_at)
+
+
+# グローバルインスタンス
+_index: Optional[RankIndex] = None
+
+
+def get_rank_index() -> RankIndex:
+    """ランキングインデックスを取得（読み込みは start() で行う）"""
+    global _index
+    if _index is None:
+        _index = RankIndex(
+            capacity=settings.rank_index_capacity,
+            refresh_interval=settings.rank_index_refresh_interval
+        )
+    return _index
@@ -1,9 +1,23 @@
 """
 ルート生成アルゴリズム（キャッシュ版）
 
-ランダムウォーク方式：
-- 行き止まり回避付きランダムウォーク
-- キャッシュからデータ取得（DBアクセスなし）
+探索方式（engine）:
+- walk: 行き止まり回避付きランダムウォーク。詰まったら最初からやり直す
+- backtrack: 深さ優先探索。詰まったら1手戻って別の候補を試す。
+  候補は残余次数（未訪問の隣接数）の少ない順（Warnsdorff 則）に試し、
+  1スタートあたりの展開ノード数に上限を設ける
+どちらもキャッシュからデータ取得（DBアクセスなし）、シード指定で再現可能。
+
+先読み（lookahead_depth = k）:
+候補 c を選んだあと残り r ノードが要るなら、c から未訪問ノードだけを通って
+min(k, r) 個以上の未訪問ノードに届かなければ目標に届かない（必要条件）。
+k = 1 は「次の手で行き止まりにならない」と同じ。k を上げると袋小路に入る手を
+早く避けられる代わりに、候補ごとの判定が少し重くなる。
+
+時間上限（deadline_ms）:
+超えたらその時点の最長ルートで打ち切る（walk はウォーク1回ごと、
+backtrack は展開 DEADLINE_CHECK_INTERVAL 回ごとに確認する）。
+最初のスタートは必ず試すので、スタート地点があれば空のルートにはならない。
 
 難易度別のデータ範囲:
 - Easy: Tier1のみ + easyエッジのみ
@@ -11,10 +25,48 @@
 - Hard: 全Tier + 全エッジ
 """
 
-from typing import List, Optional, Set
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Set
+import logging
 import random
+import time
 
-from app.services.cache import get_cache
+from app.services.bitset_graph import BitsetGraph
+from app.services.cache import DIFFICULTY_FILTERS, CacheSnapshot, get_cache
+
+logger = logging.getLogger(__name__)
+
+# generate_route の探索方式
+ROUTE_ENGINES = ('walk', 'backtrack')
+# backtrack で1スタートあたりに展開するノード数の既定上限
+DEFAULT_MAX_EXPANSIONS = 2000
+# 先読みの既定の深さ（1 = 次の手で行き止まりにならないかだけを見る）
+DEFAULT_LOOKAHEAD_DEPTH = 1
+# backtrack で時間上限を確認する間隔（展開回数）
+DEADLINE_CHECK_INTERVAL = 64
+
+
+@dataclass
+class RouteStats:
+    """
+    generate_route の探索量（stats 引数に渡すと書き込まれる）
+
+    starts・walks・expansions・elapsed_ms は呼び出しごとに加算し、
+    それ以外は最後の呼び出しの結果を表す。
+    """
+    starts: int = 0      # 試したスタート地点の数
+    walks: int = 0       # ランダムウォークの回数（walk）
+    expansions: int = 0  # ルートにノードを追加した回数（両方式の合計）
+    elapsed_ms: float = 0.0  # 生成にかかった時間
+    target_length: int = 0    # 要求された目標長
+    search_length: int = 0    # 実際に探した長さ（どの連結成分にも入らなければ下げる）
+    target_met: bool = False  # 要求された目標長に届いた（下げた場合は届いていない）
+    timed_out: bool = False   # 時間上限で打ち切った
+
+
+def _expired(deadline: Optional[float]) -> bool:
+    """time.perf_counter() 基準の期限を過ぎたか（None は期限なし）"""
+    return deadline is not None and time.perf_counter() >= deadline
 
 
 def get_difficulty_filter(difficulty: str) -> tuple:
@@ -27,19 +79,16 @@ def get_difficulty_filter(difficulty: str) -> tuple:
     Returns:
         (max_tier, allowed_difficulties) のタプル
     """
-    if difficulty == 'easy':
-        return (1, ['easy'])
-    elif difficulty == 'normal':
-        return (2, ['easy', 'normal'])
-    else:  # hard
-        return (3, ['easy', 'normal', 'hard'])
+    max_tier, allowed = DIFFICULTY_FILTERS.get(difficulty, DIFFICULTY_FILTERS['hard'])
+    return (max_tier, list(allowed))
 
 
 def get_unvisited_neighbors(
     term_id: int,
     visited: Set[int],
     max_tier: int = 3,
-    allowed_difficulties: List[str] = None
+    allowed_difficulties: List[str] = None,
+    snapshot: Optional[CacheSnapshot] = None
 ) -> List[int]:
     """
     未訪問の隣接ノードを取得
@@ -49,6 +98,7 @@ def get_unvisited_neighbors(
         visited: 訪問済みノードのセット
         max_tier: 最大Tier (難易度フィルタ用)
         allowed_difficulties: 許可されるエッジ難易度リスト
+        snapshot: 参照するキャッシュの版（省略時は現在の版）
 
     Returns:
         未訪問の隣接ノードIDリスト
@@ -56,7 +106,7 @@ def get_unvisited_neighbors(
     if allowed_difficulties is None:
         allowed_difficulties = ['easy', 'normal', 'hard']
 
-    cache = get_cache()
+    cache = snapshot if snapshot is not None else get_cache().snapshot()
     neighbors = cache.get_neighbors_with_filter(
         term_id, max_tier, allowed_difficulties
     )
@@ -68,7 +118,8 @@ def count_unvisited_neighbors(
     term_id: int,
     visited: Set[int],
     max_tier: int = 3,
-    allowed_difficulties: List[str] = None
+    allowed_difficulties: List[str] = None,
+    snapshot: Optional[CacheSnapshot] = None
 ) -> int:
     """
     未訪問の隣接ノード数をカウント（残余次数）
@@ -78,20 +129,26 @@ def count_unvisited_neighbors(
         visited: 訪問済みノードのセット
         max_tier: 最大Tier
         allowed_difficulties: 許可されるエッジ難易度リスト
+        snapshot: 参照するキャッシュの版（省略時は現在の版）
 
     Returns:
         未訪問の隣接ノード数
     """
-    neighbors = get_unvisited_neighbors(
-        term_id, visited, max_tier, allowed_difficulties
-    )
-    return len(neighbors)
+    if allowed_difficulties is None:
+        allowed_difficulties = ['easy', 'normal', 'hard']
+
+    cache = snapshot if snapshot is not None else get_cache().snapshot()
+    neighbors = cache.get_neighbors_with_filter(term_id, max_tier, allowed_difficulties)
+    # 未訪問の隣接リストは作らずに数える
+    return sum(1 for n in neighbors if n not in visited)
 
 
 def select_random_start(
     difficulty: str = 'hard',
     seed: Optional[int] = None,
-    rng: Optional[random.Random] = None
+    rng: Optional[random.Random] = None,
+    snapshot: Optional[CacheSnapshot] = None,
+    target_length: Optional[int] = None
 ) -> int:
     """
     ランダムにスタート地点を選ぶ
@@ -100,6 +157,8 @@ def select_random_start(
         difficulty: 難易度 ('easy', 'normal', 'hard')
         seed: 乱数シード（オプション）
         rng: 乱数インスタンス（省略時は seed から生成）
+        snapshot: 参照するキャッシュの版（省略時は現在の版）
+        target_length: 指定すると、このノード数のルートが入りうる連結成分からだけ選ぶ
 
     Returns:
         ランダムに選ばれた用語ID
@@ -109,12 +168,17 @@ def select_random_start(
 
     max_tier, _ = get_difficulty_filter(difficulty)
 
-    cache = get_cache()
-    all_ids = cache.get_terms_by_max_tier(max_tier)
+    cache = snapshot if snapshot is not None else get_cache().snapshot()
+    all_ids = cache.get_term_pool(max_tier)
 
     if not all_ids:
         raise ValueError(f"No terms found with tier <= {max_tier}")
 
+    if target_length is not None:
+        starts = cache.get_route_components(difficulty).starts_for(target_length)
+        if starts:
+            return rng.choice(starts)
+
     return rng.choice(all_ids)
 
 
@@ -122,60 +186,72 @@ def _random_walk(
     start_term_id: int,
     target_length: int,
     difficulty: str = 'hard',
-    rng: Optional[random.Random] = None
+    rng: Optional[random.Random] = None,
+    snapshot: Optional[CacheSnapshot] = None,
+    lookahead_depth: int = DEFAULT_LOOKAHEAD_DEPTH,
+    stats: Optional[RouteStats] = None
 ) -> List[int]:
     """
     1回のランダムウォークでルート生成を試みる（内部用）
 
     行き止まり回避付きランダムウォークを使用。
-    候補が複数あるとき、次の手で行き止まりにならない候補を優先する。
+    候補が複数あるとき、先読みで目標に届かないと分かる候補を除く
+    （lookahead_depth = 1 なら次の手で行き止まりになる候補）。
+
+    訪問済みは未訪問ノードのビットマスクで持ち、行き止まりの判定は
+    隣接ビットマスクとの AND だけで行う（BitsetGraph 参照）。
 
     Args:
         start_term_id: スタート用語ID
         target_length: 目標ルート長
         difficulty: 難易度 ('easy', 'normal', 'hard')
         rng: 乱数インスタンス（省略時は新規生成）
+        snapshot: 参照するキャッシュの版（省略時は現在の版）
+        lookahead_depth: 先読みの深さ（1以上）
+        stats: 探索量の書き込み先
 
     Returns:
         用語IDのリスト（ルート）。目標長に届かない可能性あり。
     """
     if rng is None:
         rng = random.Random()
+    if snapshot is None:
+        snapshot = get_cache().snapshot()
 
-    max_tier, allowed_difficulties = get_difficulty_filter(difficulty)
+    graph = snapshot.get_bitset_graph(difficulty)
+    current = graph.index.get(start_term_id)
+    if current is None:
+        # 隣接を持たない用語
+        return [start_term_id]
 
-    route = [start_term_id]
-    visited = {start_term_id}
+    neighbors = graph.neighbors
+    masks = graph.masks
+    unvisited = graph.all_mask & ~(1 << current)
+    route = [current]
 
     while len(route) < target_length:
-        current = route[-1]
-        candidates = get_unvisited_neighbors(
-            current, visited, max_tier, allowed_difficulties
-        )
-
         # 候補がなければ終了（詰まった）
-        if not candidates:
+        if not masks[current] & unvisited:
             break
+        candidates = [n for n in neighbors[current] if unvisited >> n & 1]
 
-        # 行き止まり回避: 次の手で行き止まりにならない候補を優先
+        # 行き止まり回避: 先読みで目標に届かない候補を除く（全部ダメなら除かない）
         if len(candidates) > 1:
-            non_dead = []
-            for c in candidates:
-                future_visited = visited | {c}
-                future_neighbors = count_unvisited_neighbors(
-                    c, future_visited, max_tier, allowed_difficulties
-                )
-                if future_neighbors > 0:
-                    non_dead.append(c)
-
-            if non_dead:
-                candidates = non_dead
-
-        next_term = rng.choice(candidates)
-        route.append(next_term)
-        visited.add(next_term)
+            viable = [
+                c for c in candidates
+                if _can_extend(c, unvisited, target_length - len(route) - 1, graph, lookahead_depth)
+            ]
+            if viable:
+                candidates = viable
+
+        current = rng.choice(candidates)
+        route.append(current)
+        unvisited &= ~(1 << current)
 
-    return route
+    if stats is not None:
+        stats.walks += 1
+        stats.expansions += len(route) - 1
+    return graph.to_term_ids(route)
 
 
 def _try_from_start(
@@ -183,12 +259,17 @@ def _try_from_start(
     target_length: int,
     difficulty: str = 'hard',
     max_retries: int = 10,
-    rng: Optional[random.Random] = None
+    rng: Optional[random.Random] = None,
+    snapshot: Optional[CacheSnapshot] = None,
+    lookahead_depth: int = DEFAULT_LOOKAHEAD_DEPTH,
+    stats: Optional[RouteStats] = None,
+    deadline: Optional[float] = None
 ) -> List[int]:
     """
     同じスタート地点からリトライしてルート生成を試みる（内部用）
 
     要求されたステップ数に達しない場合、同じスタートから再試行する。
+    期限を過ぎたら、それまでの最長ルートを返す（1回目のウォークは必ず行う）。
 
     Args:
         start_term_id: スタート用語ID
@@ -196,6 +277,10 @@ def _try_from_start(
         difficulty: 難易度 ('easy', 'normal', 'hard')
         max_retries: 最大リトライ回数（デフォルト10）
         rng: 乱数インスタンス（省略時は新規生成）
+        snapshot: 参照するキャッシュの版（省略時は現在の版）
+        lookahead_depth: 先読みの深さ（1以上）
+        stats: 探索量の書き込み先
+        deadline: 打ち切る時刻（time.perf_counter() 基準、None で無制限）
 
     Returns:
         用語IDのリスト（ルート）
@@ -206,7 +291,10 @@ def _try_from_start(
     best_route = []
 
     for _ in range(max_retries):
-        route = _random_walk(start_term_id, target_length, difficulty, rng=rng)
+        route = _random_walk(
+            start_term_id, target_length, difficulty, rng=rng, snapshot=snapshot,
+            lookahead_depth=lookahead_depth, stats=stats
+        )
 
         if len(route) >= target_length:
             return route
@@ -214,52 +302,286 @@ def _try_from_start(
         if len(route) > len(best_route):
             best_route = route
 
+        if _expired(deadline):
+            break
+
     return best_route
 
 
+def _can_extend(
+    candidate: int,
+    unvisited: int,
+    after: int,
+    graph: BitsetGraph,
+    depth: int
+) -> bool:
+    """
+    候補の先にまだルートを伸ばせる余地があるか（先読み、内部用）
+
+    after ノードを続けるには、候補から未訪問ノードだけを通って届く範囲に
+    after 個以上の未訪問ノードが要る。その範囲を1手ずつ広げ、
+    min(depth, after) 個見つかった時点で打ち切る（深さ depth までしか見ない）。
+    after = 0（最後の1手）でも1手分は見る（従来の行き止まり回避と同じ）。
+
+    Args:
+        candidate: 候補ノード（密インデックス）
+        unvisited: 未訪問ノードのビットマスク（candidate を含んでよい）
+        after: candidate の後に追加する残りノード数
+        graph: 難易度別のビットマスクグラフ
+        depth: 先読みの深さ（1以上）
+    """
+    masks = graph.masks
+    unvisited &= ~(1 << candidate)
+    frontier = masks[candidate] & unvisited
+    if not frontier:
+        return False
+
+    need = min(depth, after)
+    seen = frontier
+    found = frontier.bit_count()
+    while found < need:
+        expanded = 0
+        while frontier:
+            low = frontier & -frontier
+            expanded |= masks[low.bit_length() - 1]
+            frontier ^= low
+        frontier = expanded & unvisited & ~seen
+        if not frontier:
+            return False
+        seen |= frontier
+        found += frontier.bit_count()
+    return True
+
+
+def _ordered_candidates(
+    current: int,
+    unvisited: int,
+    remaining: int,
+    graph: BitsetGraph,
+    rng: random.Random,
+    lookahead_depth: int = DEFAULT_LOOKAHEAD_DEPTH
+) -> Iterator[int]:
+    """
+    次に試す候補を並べる（backtrack 用、内部用）
+
+    残余次数の少ない順（同数はランダム）。最後の1手以外では、
+    先読みで目標に届かないと分かる候補（lookahead_depth = 1 なら
+    残余次数0の行き止まり）は最後に回す
+    （目標に届かないときに最長ルートを返すためだけに試す）。
+
+    Args:
+        current: 現在のノード（密インデックス）
+        unvisited: 未訪問ノードのビットマスク（current は含まない）
+        remaining: ルートに追加する残りノード数（この候補を含む）
+        graph: 難易度別のビットマスクグラフ
+        rng: 乱数インスタンス
+        lookahead_depth: 先読みの深さ（1以上）
+    """
+    candidates = [n for n in graph.neighbors[current] if unvisited >> n & 1]
+    rng.shuffle(candidates)
+    if remaining <= 1:
+        return iter(candidates)
+
+    masks = graph.masks
+    keys = {
+        c: (
+            not _can_extend(c, unvisited, remaining - 1, graph, lookahead_depth),
+            (masks[c] & unvisited).bit_count(),
+        )
+        for c in candidates
+    }
+    # 安定ソートなので同じキーの順はシャッフルのまま
+    candidates.sort(key=keys.__getitem__)
+    return iter(candidates)
+
+
+def _backtracking_search(
+    start_term_id: int,
+    target_length: int,
+    difficulty: str = 'hard',
+    rng: Optional[random.Random] = None,
+    snapshot: Optional[CacheSnapshot] = None,
+    max_expansions: Optional[int] = DEFAULT_MAX_EXPANSIONS,
+    lookahead_depth: int = DEFAULT_LOOKAHEAD_DEPTH,
+    stats: Optional[RouteStats] = None,
+    deadline: Optional[float] = None
+) -> List[int]:
+    """
+    深さ優先探索でルート生成を試みる（内部用）
+
+    ランダムウォークと違い、行き止まりでは直前の分岐まで戻って別の候補を試すので、
+    それまでの探索が無駄にならない。
+    展開数の上限か期限に達したら、それまでの最長ルートを返す。
+
+    Args:
+        start_term_id: スタート用語ID
+        target_length: 目標ルート長
+        difficulty: 難易度 ('easy', 'normal', 'hard')
+        rng: 乱数インスタンス（省略時は新規生成）
+        snapshot: 参照するキャッシュの版（省略時は現在の版）
+        max_expansions: ルートにノードを追加する回数の上限（None で無制限）
+        lookahead_depth: 先読みの深さ（1以上）
+        stats: 探索量の書き込み先
+        deadline: 打ち切る時刻（time.perf_counter() 基準、None で無制限）
+
+    Returns:
+        用語IDのリスト（ルート）。見つからなければ探索中の最長ルート。
+    """
+    if rng is None:
+        rng = random.Random()
+    if snapshot is None:
+        snapshot = get_cache().snapshot()
+
+    graph = snapshot.get_bitset_graph(difficulty)
+    start = graph.index.get(start_term_id)
+    if start is None or target_length <= 1:
+        return [start_term_id]
+
+    route = [start]
+    unvisited = graph.all_mask & ~(1 << start)
+    best_route = list(route)
+    # stack[i] は route[i] の次に試す候補
+    stack = [_ordered_candidates(start, unvisited, target_length - 1, graph, rng, lookahead_depth)]
+    expansions = 0
+
+    while stack:
+        next_term = next(stack[-1], None)
+        if next_term is None:
+            # 候補を試し尽くしたので1手戻る
+            stack.pop()
+            unvisited |= 1 << route.pop()
+            continue
+
+        if max_expansions is not None and expansions >= max_expansions:
+            break
+        if expansions % DEADLINE_CHECK_INTERVAL == 0 and expansions and _expired(deadline):
+            break
+        expansions += 1
+        if stats is not None:
+            stats.expansions += 1
+
+        route.append(next_term)
+        unvisited &= ~(1 << next_term)
+        if len(route) >= target_length:
+            return graph.to_term_ids(route)
+        if len(route) > len(best_route):
+            best_route = list(route)
+
+        stack.append(_ordered_candidates(
+            next_term, unvisited, target_length - len(route), graph, rng, lookahead_depth
+        ))
+
+    return graph.to_term_ids(best_route)
+
+
 def generate_route(
     target_length: int,
     difficulty: str = 'hard',
     seed: Optional[int] = None,
     max_start_retries: int = 10,
-    max_same_start_retries: int = 10
+    max_same_start_retries: int = 10,
+    snapshot: Optional[CacheSnapshot] = None,
+    engine: str = 'walk',
+    max_expansions: Optional[int] = DEFAULT_MAX_EXPANSIONS,
+    lookahead_depth: int = DEFAULT_LOOKAHEAD_DEPTH,
+    stats: Optional[RouteStats] = None,
+    deadline_ms: Optional[float] = None
 ) -> List[int]:
     """
     ルートを生成する（メインエントリポイント）
 
-    1. ランダムにスタート地点を選ぶ
-    2. 同じスタートで max_same_start_retries 回試す
+    1. ランダムにスタート地点を選ぶ（目標長のルートが入りうる連結成分から）
+    2. そのスタートから探索する
+       - walk: ランダムウォークを max_same_start_retries 回試す
+       - backtrack: 展開 max_expansions 回まで深さ優先探索する
     3. ダメなら別のスタート地点で再試行（最大 max_start_retries 回）
+    deadline_ms を過ぎたらどの段階でも打ち切り、それまでの最長ルートを返す。
 
     Args:
         target_length: 目標ルート長
         difficulty: 難易度 ('easy', 'normal', 'hard')
         seed: 乱数シード（決定性のため）
         max_start_retries: スタート地点を変える最大回数（デフォルト10）
-        max_same_start_retries: 同じスタートでのリトライ回数（デフォルト10）
+        max_same_start_retries: 同じスタートでのリトライ回数（デフォルト10、walk のみ）
+        snapshot: 参照するキャッシュの版（省略時は現在の版を固定して使う）
+        engine: 探索方式（'walk' または 'backtrack'）
+        max_expansions: 1スタートあたりの展開ノード数の上限（backtrack のみ、None で無制限）
+        lookahead_depth: 先読みの深さ（1以上。1 は次の手の行き止まり回避のみ）
+        stats: 渡すと探索量（スタート数・ウォーク数・展開数・時間）を加算し、
+            目標に届いたか・時間切れかを書き込む
+        deadline_ms: 生成の時間上限（ミリ秒、None で無制限）。
+            時間切れのルートはシードを指定しても再現するとは限らない
 
     Returns:
-        用語IDのリスト（ルート）
+        用語IDのリスト（ルート）。どの連結成分にも目標長が入らない場合は
+        入りうる最長を目標にする（目標長より短くなる。ログに残し、
+        stats.target_met は False になる）
+
+    Raises:
+        ValueError: engine・lookahead_depth が不正な場合、スタート地点が見つからない場合
     """
+    if engine not in ROUTE_ENGINES:
+        raise ValueError(f"Unknown route engine: {engine}")
+    if lookahead_depth < 1:
+        raise ValueError(f"lookahead_depth must be >= 1: {lookahead_depth}")
+
+    started_at = time.perf_counter()
+    deadline = started_at + deadline_ms / 1000 if deadline_ms is not None else None
     rng = random.Random(seed)
+    # 生成中に再読み込みが入っても同じ版のグラフを辿るよう、最初に固定する
+    if snapshot is None:
+        snapshot = get_cache().snapshot()
+
+    # どの連結成分にも入らない長さは探索しても届かないので、入りうる最長まで下げる
+    # （事前計算済みの上限を見るだけなので、失敗が確定した探索を繰り返さない）
+    requested_length = target_length
+    max_length = snapshot.get_route_components(difficulty).max_route_length
+    if 0 < max_length < target_length:
+        logger.warning(
+            "Route target %d too long for %s, searching for %d instead",
+            requested_length, difficulty, max_length
+        )
+        target_length = max_length
 
+    # 全て失敗した場合は最長のものを返す
     best_route = []
+    timed_out = False
 
     for _ in range(max_start_retries):
-        # ランダムにスタート地点を選ぶ
-        start_term_id = select_random_start(difficulty, rng=rng)
-
-        # 同じスタートでリトライ
-        route = _try_from_start(
-            start_term_id, target_length, difficulty,
-            max_retries=max_same_start_retries, rng=rng
+        # 目標長が入りうる連結成分からランダムにスタート地点を選ぶ
+        start_term_id = select_random_start(
+            difficulty, rng=rng, snapshot=snapshot, target_length=target_length
         )
-
-        if len(route) >= target_length:
-            return route
+        if stats is not None:
+            stats.starts += 1
+
+        if engine == 'backtrack':
+            route = _backtracking_search(
+                start_term_id, target_length, difficulty,
+                rng=rng, snapshot=snapshot, max_expansions=max_expansions,
+                lookahead_depth=lookahead_depth, stats=stats, deadline=deadline
+            )
+        else:
+            # 同じスタートでリトライ
+            route = _try_from_start(
+                start_term_id, target_length, difficulty,
+                max_retries=max_same_start_retries, rng=rng, snapshot=snapshot,
+                lookahead_depth=lookahead_depth, stats=stats, deadline=deadline
+            )
 
         if len(route) > len(best_route):
             best_route = route
+        if len(best_route) >= target_length:
+            break
+
+        if _expired(deadline):
+            timed_out = True
+            break
 
-    # 全て失敗した場合、最長のものを返す
+    if stats is not None:
+        stats.elapsed_ms += (time.perf_counter() - started_at) * 1000
+        stats.target_length = requested_length
+        stats.search_length = target_length
+        stats.target_met = len(best_route) >= requested_length
+        stats.timed_out = timed_out
     return best_route
@@ -0,0 +1,213 @@
+"""
+ゲームの事前生成プール
+
+(difficulty, ノード数) ごとに生成済みゲーム（ルート + ダミー）を貯めておき、
+/games/start ではキューから1件取り出すだけで済ませる。
+取り出しで減った分はバックグラウンドタスクが watermark まで補充する。
+
+- 補充対象は実際に要求されたキーだけ（要求があった時点で登録）
+- キャッシュの版が変わったら古い生成結果は捨てる（管理画面で編集された場合など）
+- 目標のノード数に届かなかったゲーム（時間上限で打ち切ったものなど）は貯めない。
+  生成に失敗したキーはその補充周期の間は飛ばし、他のキーの補充を先に進める
+- 補充の生成処理は生成ワーカー（generation_executor）で1件ずつ実行する。
+  リクエスト側の生成と同じ同時実行数・待ち行列の上限に含まれ、
+  待ち行列が一杯ならリクエスト側を優先して補充を次の周期に回す
+"""
+
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Set, Tuple
+
+from app.config import settings
+from app.services.cache import CacheSnapshot, get_cache
+from app.services.game_generator import GeneratedGame, generate_game
+from app.services.generation_executor import GenerationOverloadedError, get_generation_executor
+
+logger = logging.getLogger(__name__)
+
+PoolKey = Tuple[str, int]  # (difficulty, node_count)
+
+
+class RoutePool:
+    """生成済みゲームのプール"""
+
+    def __init__(self, watermark: int, refill_interval: float = 1.0):
+        """
+        Args:
+            watermark: キーごとに保持しておく件数（0で無効）
+            refill_interval: 補充ループの最大待機秒数（取り出しがあれば即座に起きる）
+        """
+        self.watermark = watermark
+        self.refill_interval = refill_interval
+        self._queues: Dict[PoolKey, Deque[GeneratedGame]] = {}
+        self._demand: Set[PoolKey] = set()
+        # この補充周期で生成に失敗したキー（周期が終わるまで飛ばす）
+        self._failed: Set[PoolKey] = set()
+        self._lock = threading.Lock()
+        # clear() のたびに進める。補充中に破棄された場合、その補充結果を捨てる
+        self._epoch = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.watermark > 0
+
+    def take(self, difficulty: str, node_count: int, snapshot: CacheSnapshot) -> Optional[GeneratedGame]:
+        """
+        生成済みゲームを1件取り出す
+
+        指定した版と一致するものだけを返し、古い版のものは捨てる。
+        空ならNoneを返し、このキーを補充対象に登録する。
+        """
+        if not self.enabled:
+            return None
+
+        key = (difficulty, node_count)
+        with self._lock:
+            self._demand.add(key)
+            queue = self._queues.get(key)
+            game = None
+            while queue:
+                candidate = queue.popleft()
+                if candidate.version == snapshot.version:
+                    game = candidate
+                    break
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return game
+
+    def size(self, difficulty: str, node_count: int) -> int:
+        """キーごとの保持件数"""
+        with self._lock:
+            return len(self._queues.get((difficulty, node_count), ()))
+
+    def refill(self, limit: Optional[int] = None) -> int:
+        """
+        要求のあった全キーを watermark まで補充する（同期処理、スレッドから呼ぶ）
+
+        生成に失敗したキーは、補充ループが次の周期を始めるまで飛ばす。
+
+        Args:
+            limit: 1回の呼び出しで生成する最大件数（None で無制限）
+
+        Returns:
+            新たに生成した件数
+        """
+        snapshot = get_cache().snapshot()
+        produced = 0
+
+        with self._lock:
+            keys = [key for key in self._demand if key not in self._failed]
+            epoch = self._epoch
+
+        for key in keys:
+            difficulty, node_count = key
+            while True:
+                with self._lock:
+                    if self._epoch != epoch:
+                        return produced
+                    queue = self._queues.setdefault(key, deque())
+                    # 古い版の生成結果を捨てる
+                    while queue and queue[0].version != snapshot.version:
+                        queue.popleft()
+                    if len(queue) >= self.watermark:
+                        break
+
+                try:
+                    game = generate_game(difficulty, node_count, snapshot=snapshot)
+                except ValueError:
+                    # スタート地点がない難易度などは補充をあきらめる（リクエスト側で400になる）
+                    logger.warning("Route pool cannot generate %s", key)
+                    self._skip(key, epoch)
+                    break
+                if len(game.route) < node_count:
+                    # 短いルートを目標長のゲームとして出さない（このキーは次の周期に再挑戦）
+                    logger.info(
+                        "Route pool discarded short route for %s (%d nodes)", key, len(game.route)
+                    )
+                    self._skip(key, epoch)
+                    break
+
+                with self._lock:
+                    if self._epoch != epoch:
+                        return produced
+                    self._queues.setdefault(key, deque()).append(game)
+                produced += 1
+                if limit is not None and produced >= limit:
+                    return produced
+
+        return produced
+
+    def _skip(self, key: PoolKey, epoch: int):
+        """生成に失敗したキーをこの補充周期の残りで飛ばす"""
+        with self._lock:
+            if self._epoch == epoch:
+                self._failed.add(key)
+
+    def start_cycle(self):
+        """新しい補充周期を始める（失敗したキーにもう一度挑戦する）"""
+        with self._lock:
+            self._failed.clear()
+
+    def clear(self):
+        """保持している生成結果と要求キーを全て破棄"""
+        with self._lock:
+            self._queues.clear()
+            self._demand.clear()
+            self._failed.clear()
+            self._epoch += 1
+
+    async def _run(self):
+        """補充ループ（1件ずつ生成ワーカーに投げ、リクエスト側の生成と交互に処理させる）"""
+        while True:
+            self._wakeup.clear()
+            self.start_cycle()
+            try:
+                while await get_generation_executor().run(self.refill, 1):
+                    pass
+            except GenerationOverloadedError:
+                pass  # 混雑中はリクエスト側を優先し、次の周期まで待つ
+            except Exception:
+                logger.exception("Route pool refill failed")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.refill_interval)
+            except TimeoutError:
+                pass
+
+    def start(self):
+        """補充タスクを開始（イベントループ上で呼ぶ）"""
+        if not self.enabled or self._task is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """補充タスクを止めてプールを空にする"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wakeup = None
+        self.clear()
+
+
+# グローバルプールインスタンス
+_pool: Optional[RoutePool] = None
+
+
+def get_route_pool() -> RoutePool:
+    """プールインスタンスを取得"""
+    global _pool
+    if _pool is None:
+        _pool = RoutePool(
+            watermark=settings.route_pool_watermark,
+            refill_interval=settings.route_pool_refill_interval
+        )
+    return _pool
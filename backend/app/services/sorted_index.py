@@ -0,0 +1,110 @@
+"""
+並べ替え済みインデックス（管理画面の一覧用）
+
+キャッシュの用語・エッジを列ごとに (値, id) の昇順で並べておき、
+一覧のページをDBに問い合わせずに切り出す。
+CacheSnapshot.get_derived でキャッシュの版ごとに1回だけ作る。
+
+ページの指定は2通り:
+- offset: 先頭からの件数（ページ番号での移動用。リストの切り出しなので深さに依存しない）
+- cursor: 前のページの最後の行のキー（キーセット方式。間に追加・削除があってもずれない）
+"""
+
+import base64
+import binascii
+import bisect
+import json
+from dataclasses import dataclass
+from typing import Callable, Generic, Iterable, List, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+# (列の値, id)。同じ値はidで並べ、順序を一意にする
+SortKey = Tuple[object, int]
+
+
+def encode_cursor(key: SortKey) -> str:
+    """キーを不透明なカーソル文字列にする"""
+    return base64.urlsafe_b64encode(json.dumps(list(key), ensure_ascii=False).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> SortKey:
+    """
+    カーソル文字列をキーに戻す
+
+    Raises:
+        ValueError: 形式が正しくない場合
+    """
+    try:
+        value, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise ValueError("invalid cursor") from e
+    if not isinstance(item_id, int):
+        raise ValueError("invalid cursor")
+    return value, item_id
+
+
+@dataclass(frozen=True)
+class Page(Generic[T]):
+    """一覧の1ページ"""
+    items: List[T]
+    total: int
+    next_cursor: Optional[str]  # 続きがなければNone
+
+
+class SortedIndex(Generic[T]):
+    """1つの並び順（昇順で保持し、降順は逆から読む）"""
+
+    __slots__ = ('_keys', '_items')
+
+    def __init__(self, items: Iterable[T], key: Callable[[T], SortKey]):
+        pairs = sorted(((key(item), item) for item in items), key=lambda p: p[0])
+        self._keys: List[SortKey] = [k for k, _ in pairs]
+        self._items: List[T] = [item for _, item in pairs]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def page(
+        self,
+        limit: int,
+        offset: int = 0,
+        descending: bool = False,
+        after: Optional[SortKey] = None
+    ) -> Page[T]:
+        """
+        ページを切り出す
+
+        Args:
+            limit: 件数
+            offset: 開始位置（after があればその次からの件数）
+            descending: 降順
+            after: このキーより後ろから（decode_cursor の結果）
+
+        Raises:
+            ValueError: after の値の型が列と合わない場合
+        """
+        keys = self._keys
+        try:
+            if descending:
+                end = bisect.bisect_left(keys, after) if after is not None else len(keys)
+            else:
+                start = bisect.bisect_right(keys, after) if after is not None else 0
+        except TypeError as e:
+            raise ValueError("cursor does not match sort column") from e
+
+        if descending:
+            end = max(end - offset, 0)
+            begin = max(end - limit, 0)
+            items = self._items[begin:end][::-1]
+            last = begin if items else None
+            has_more = begin > 0
+        else:
+            start = min(start + offset, len(keys))
+            stop = min(start + limit, len(keys))
+            items = self._items[start:stop]
+            last = stop - 1 if items else None
+            has_more = stop < len(keys)
+
+        next_cursor = encode_cursor(keys[last]) if has_more and last is not None else None
+        return Page(items=items, total=len(keys), next_cursor=next_cursor)
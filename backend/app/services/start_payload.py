@@ -0,0 +1,205 @@
+"""
+/games/start のレスポンス組み立て
+
+FullRouteStartResponse と同じ形のJSONを、キャッシュに保持した
+用語・エッジのエンコード済み断片（CacheSnapshot.get_term_fragments /
+get_edge_fragment）をつなぎ合わせて直接バイト列で作る。
+50問のゲームでも Pydantic モデルの生成・検証・シリアライズを行わない。
+
+compact モード（CompactRouteStartResponse）では用語・エッジをIDだけで返し、
+名前などはクライアントが辞書（build_dictionary）から引く。
+辞書は内容ハッシュを版とし、版付きURLで長期キャッシュさせる。
+"""
+
+import hashlib
+import logging
+import random
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Sequence
+from uuid import UUID
+
+from app.services.cache import CacheSnapshot, encode_json
+from app.services.precompressed import PrecompressedBody
+
+logger = logging.getLogger(__name__)
+
+# エッジが見つからない場合の値（従来の start_game と同じ）
+_MISSING_EDGE_FRAGMENT = b'"difficulty":"normal","keyword":"","edge_description":""'
+# 最後のステップ（選択肢なし）
+_LAST_STEP_FRAGMENT = b'"correct_next_id":null,"choices":[],"difficulty":"","keyword":"","edge_description":""'
+
+
+def format_datetime(value: datetime) -> str:
+    """Pydantic と同じ形式（UTCは末尾Z）のISO 8601文字列"""
+    text = value.isoformat()
+    if value.utcoffset() is not None and value.utcoffset().total_seconds() == 0:
+        text = text[:-6] + 'Z'
+    return text
+
+
+def build_start_payload(
+    game_id: UUID,
+    difficulty: str,
+    route: Sequence[int],
+    distractors: Sequence[Sequence[int]],
+    created_at: datetime,
+    snapshot: CacheSnapshot
+) -> bytes:
+    """
+    FullRouteStartResponse 形式のJSONを組み立てる
+
+    Args:
+        game_id: ゲームID
+        difficulty: 難易度
+        route: 用語IDのルート
+        distractors: ステップごとのダミー（len(route) - 1 件）
+        created_at: ゲーム作成日時
+        snapshot: 参照するキャッシュの版
+
+    Returns:
+        レスポンスボディ（UTF-8 JSON）
+
+    Raises:
+        LookupError: ルート上の用語がキャッシュにない場合
+    """
+    parts: List[bytes] = [
+        b'{"game_id":"', str(game_id).encode(),
+        b'","difficulty":', encode_json(difficulty),
+        b',"total_steps":', str(len(route)).encode(),
+        b',"steps":[',
+    ]
+
+    last = len(route) - 1
+    for step_no, term_id in enumerate(route):
+        fragments = snapshot.get_term_fragments(term_id)
+        if fragments is None:
+            raise LookupError(f"Term {term_id} not found in cache")
+
+        if step_no:
+            parts.append(b',')
+        parts += [b'{"step_no":', str(step_no).encode(), b',"term":', fragments[0], b',']
+
+        if step_no == last:
+            # 最後のステップは選択肢なし
+            parts += [_LAST_STEP_FRAGMENT, b'}']
+            continue
+
+        correct_next_id = route[step_no + 1]
+
+        # 4択（正解 + 生成済みのダミー）。キャッシュにない用語は除いてシャッフル
+        choices = []
+        for choice_id in [correct_next_id, *distractors[step_no]]:
+            choice_fragments = snapshot.get_term_fragments(choice_id)
+            if choice_fragments is not None:
+                choices.append(choice_fragments[1])
+        random.shuffle(choices)
+
+        edge = snapshot.get_edge(term_id, correct_next_id)
+        if edge is None:
+            logger.warning(
+                "No edge found for term_a=%d, term_b=%d",
+                min(term_id, correct_next_id), max(term_id, correct_next_id)
+            )
+            edge_fragment = _MISSING_EDGE_FRAGMENT
+        else:
+            edge_fragment = snapshot.get_edge_fragment(edge)
+
+        parts += [
+            b'"correct_next_id":', str(correct_next_id).encode(),
+            b',"choices":[', b','.join(choices), b'],',
+            edge_fragment, b'}',
+        ]
+
+    parts += [b'],"created_at":"', format_datetime(created_at).encode(), b'"}']
+    return b''.join(parts)
+
+
+@dataclass(frozen=True)
+class GameDictionary:
+    """用語・エッジ辞書（GameDictionaryResponse 形式、エンコード・圧縮済み）"""
+    version: str  # 内容のハッシュ（用語・エッジが同じなら同じ）
+    payload: PrecompressedBody
+
+
+def build_dictionary(snapshot: CacheSnapshot) -> GameDictionary:
+    """キャッシュの版から辞書を作る"""
+    terms = [
+        {
+            'id': term.id,
+            'name': term.name,
+            'tier': term.tier,
+            'category': term.category,
+            'description': term.description,
+        }
+        for term in sorted(snapshot.terms.values(), key=lambda t: t.id)
+    ]
+    edges = [
+        {
+            'id': edge.id,
+            'term_a': edge.term_a,
+            'term_b': edge.term_b,
+            'difficulty': edge.difficulty,
+            'keyword': edge.keyword,
+            'description': edge.description,
+        }
+        for edge in sorted(snapshot.edges, key=lambda e: e.id)
+    ]
+    version = hashlib.sha256(encode_json([terms, edges])).hexdigest()[:16]
+    return GameDictionary(
+        version=version,
+        payload=PrecompressedBody.encode({'version': version, 'terms': terms, 'edges': edges}),
+    )
+
+
+def get_dictionary(snapshot: CacheSnapshot) -> GameDictionary:
+    """キャッシュの版ごとに1回だけ辞書を作って使い回す"""
+    return snapshot.get_derived('game_dictionary', build_dictionary)
+
+
+def build_compact_start_payload(
+    game_id: UUID,
+    difficulty: str,
+    route: Sequence[int],
+    distractors: Sequence[Sequence[int]],
+    created_at: datetime,
+    snapshot: CacheSnapshot
+) -> bytes:
+    """
+    CompactRouteStartResponse 形式（IDのみ）のJSONを組み立てる
+
+    選択肢・エッジの扱いは build_start_payload と同じ
+    （キャッシュにない用語は選択肢から除き、エッジがなければ null）。
+
+    Raises:
+        LookupError: ルート上の用語がキャッシュにない場合
+    """
+    edges: List[Optional[int]] = []
+    choices: List[List[int]] = []
+    for step_no, term_id in enumerate(route):
+        if term_id not in snapshot.terms:
+            raise LookupError(f"Term {term_id} not found in cache")
+        if step_no == len(route) - 1:
+            break
+
+        correct_next_id = route[step_no + 1]
+        step_choices = [
+            choice_id for choice_id in [correct_next_id, *distractors[step_no]]
+            if choice_id in snapshot.terms
+        ]
+        random.shuffle(step_choices)
+        choices.append(step_choices)
+
+        edge = snapshot.get_edge(term_id, correct_next_id)
+        edges.append(edge.id if edge is not None else None)
+
+    return encode_json({
+        'game_id': str(game_id),
+        'difficulty': difficulty,
+        'total_steps': len(route),
+        'dictionary_version': get_dictionary(snapshot).version,
+        'route': list(route),
+        'edges': edges,
+        'choices': choices,
+        'created_at': format_datetime(created_at),
+    })
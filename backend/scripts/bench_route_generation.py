@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+ルート生成のベンチマーク（先読みの深さごとのリトライ回数・時間、時間上限の効き方）
+
+使用方法（backend ディレクトリで、DATABASE_URL のDBを読み込む）:
+    uv run python -m scripts.bench_route_generation
+    uv run python -m scripts.bench_route_generation --engine walk --depths 1 2 4 8
+    uv run python -m scripts.bench_route_generation --length 30 --runs 500
+    uv run python -m scripts.bench_route_generation --deadline-ms 1
+
+難易度 × 探索方式 × lookahead_depth ごとに、同じシード列で generate_route を
+runs 回呼び、1ルートあたりの平均を表にする:
+    starts      試したスタート地点の数（1 なら最初のスタートで成功）
+    walks       ランダムウォークの回数（walk のみ）
+    expansions  ルートにノードを追加した回数
+    ms          1ルートあたりの時間（max は最悪値）
+    timeouts    --deadline-ms で打ち切った割合
+"""
+
+import argparse
+from typing import Iterable, List, Optional
+
+from app.services.cache import DIFFICULTY_FILTERS, CacheSnapshot, get_cache
+from app.services.game_generator import MAX_SAME_START_RETRIES, MAX_START_RETRIES
+from app.services.route_generator import ROUTE_ENGINES, RouteStats, generate_route
+
+
+def bench(
+    snapshot: CacheSnapshot,
+    difficulty: str,
+    engine: str,
+    depth: int,
+    length: int,
+    runs: int,
+    max_expansions: int,
+    deadline_ms: Optional[float] = None
+) -> dict:
+    """1つの条件で runs 回生成し、1ルートあたりの平均を返す"""
+    stats = RouteStats()
+    reached = 0
+    timeouts = 0
+    worst_ms = 0.0
+    for seed in range(runs):
+        elapsed_ms = stats.elapsed_ms
+        route = generate_route(
+            length, difficulty, seed=seed,
+            max_start_retries=MAX_START_RETRIES,
+            max_same_start_retries=MAX_SAME_START_RETRIES,
+            snapshot=snapshot, engine=engine, max_expansions=max_expansions,
+            lookahead_depth=depth, stats=stats, deadline_ms=deadline_ms
+        )
+        reached += len(route) >= length
+        timeouts += stats.timed_out
+        worst_ms = max(worst_ms, stats.elapsed_ms - elapsed_ms)
+    return {
+        "reached": reached / runs,
+        "starts": stats.starts / runs,
+        "walks": stats.walks / runs,
+        "expansions": stats.expansions / runs,
+        "ms": stats.elapsed_ms / runs,
+        "max_ms": worst_ms,
+        "timeouts": timeouts / runs,
+    }
+
+
+def format_rows(rows: Iterable[tuple]) -> List[str]:
+    lines = [
+        f"{'difficulty':<10} {'engine':<9} {'depth':>5} {'reached':>8} "
+        f"{'starts':>7} {'walks':>7} {'expansions':>10} {'ms':>7} {'max ms':>7} {'timeouts':>8}"
+    ]
+    for difficulty, engine, depth, r in rows:
+        lines.append(
+            f"{difficulty:<10} {engine:<9} {depth:>5} {r['reached']:>8.1%} "
+            f"{r['starts']:>7.2f} {r['walks']:>7.2f} {r['expansions']:>10.1f} {r['ms']:>7.3f} "
+            f"{r['max_ms']:>7.3f} {r['timeouts']:>8.1%}"
+        )
+    return lines
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="ルート生成のベンチマーク")
+    parser.add_argument(
+        "--difficulty", nargs="+", choices=list(DIFFICULTY_FILTERS), default=list(DIFFICULTY_FILTERS),
+    )
+    parser.add_argument("--engine", nargs="+", choices=ROUTE_ENGINES, default=list(ROUTE_ENGINES))
+    parser.add_argument("--depths", nargs="+", type=int, default=[1, 2, 4, 8], help="lookahead_depth")
+    parser.add_argument("--length", type=int, default=31, help="ルートのノード数（既定 31 = 30問）")
+    parser.add_argument("--runs", type=int, default=200, help="条件ごとの生成回数（シード 0..runs-1）")
+    parser.add_argument("--max-expansions", type=int, default=2000, help="backtrack の展開上限")
+    parser.add_argument("--deadline-ms", type=float, default=None, help="1ルートあたりの時間上限（既定なし）")
+    args = parser.parse_args(argv)
+    if min(args.depths) < 1:
+        parser.error("--depths must be at least 1")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+
+    cache = get_cache()
+    cache.load_from_db()
+    snapshot = cache.snapshot()
+
+    rows = []
+    for difficulty in args.difficulty:
+        for engine in args.engine:
+            for depth in args.depths:
+                rows.append((difficulty, engine, depth, bench(
+                    snapshot, difficulty, engine, depth,
+                    args.length, args.runs, args.max_expansions, args.deadline_ms
+                )))
+
+    print(f"length={args.length} runs={args.runs} terms={len(snapshot.get_term_pool(3))}")
+    print("\n".join(format_rows(rows)))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,7 +5,7 @@ from fastapi.testclient import TestClient
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 
-from app.database import Base, get_db
+from app.database import Base, get_async_db, get_db
 from app.main import app
 from app.services.cache import get_cache
 
@@ -48,6 +48,17 @@ def init_cache():
         print(f"[Test Setup] Cache init skipped (DB unavailable): {e}")
 
 
+@pytest.fixture
+def restore_cache():
+    """テスト中に差分更新したキャッシュをDBの内容に戻す
+
+    管理APIのテストはトランザクションをロールバックするため、
+    差分更新されたキャッシュだけが残らないよう終了時に再読み込みする。
+    """
+    yield
+    get_cache().load_from_db()
+
+
 @pytest.fixture(scope="session")
 def db_engine():
     """Create test database engine"""
@@ -68,6 +79,28 @@ def db_session(db_engine):
     connection.close()
 
 
+class AsyncSessionAdapter:
+    """同期セッションを AsyncSession と同じ呼び出し方（await）で使うためのラッパー
+
+    APIは非同期セッションを使うが、テストではテストごとのトランザクション
+    （終了時にロールバック）を共有するため、db_session をこの形で渡す。
+    本物の非同期経路（get_async_db → AsyncSessionLocal → async_engine）は
+    test_database.py の real_db_client を使うテストで確認している。
+    """
+
+    def __init__(self, session):
+        self._session = session
+
+    async def execute(self, *args, **kwargs):
+        return self._session.execute(*args, **kwargs)
+
+    async def commit(self):
+        self._session.commit()
+
+    async def rollback(self):
+        self._session.rollback()
+
+
 @pytest.fixture(scope="function")
 def client(db_session):
     """Create a test client"""
@@ -78,7 +111,24 @@ def client(db_session):
         finally:
             pass
 
+    async def override_get_async_db():
+        yield AsyncSessionAdapter(db_session)
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def real_db_client():
+    """get_async_db を差し替えないクライアント（AsyncSessionLocal → async_engine を通る）
+
+    client フィクスチャはテスト用トランザクションを共有するため同期セッションを
+    AsyncSessionAdapter で包んでいる。こちらは本物の非同期経路を通すので、
+    書き込んだ行はテスト側で消すこと。
+    """
+    assert not app.dependency_overrides
+    with TestClient(app) as test_client:
+        yield test_client
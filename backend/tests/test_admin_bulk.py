@@ -0,0 +1,211 @@
+"""Admin bulk changes API tests
+
+Tests for POST /admin/bulk (batched term/edge creates, updates and deletes).
+"""
+import pytest
+from sqlalchemy import text
+from tests.conftest import requires_db
+
+from app.config import settings
+from app.services.cache import get_cache
+
+ADMIN_SECRET = "test-admin-secret-for-testing"
+AUTH_HEADERS = {"Authorization": f"Bearer {ADMIN_SECRET}"}
+
+pytestmark = pytest.mark.usefixtures("restore_cache")
+
+
+@pytest.fixture(autouse=True)
+def set_admin_secret(monkeypatch):
+    """全テストでADMIN_SECRET環境変数を設定"""
+    monkeypatch.setenv("ADMIN_SECRET", ADMIN_SECRET)
+
+
+def _bulk(client, terms=None, edges=None):
+    return client.post(
+        "/admin/bulk",
+        headers=AUTH_HEADERS,
+        json={"terms": terms or {}, "edges": edges or {}},
+    )
+
+
+def _create_terms(client, *names):
+    response = _bulk(client, terms={
+        "create": [{"name": name, "category": "bulk", "tier": 1, "ref": name} for name in names]
+    })
+    assert response.status_code == 200
+    return response.json()["term_refs"]
+
+
+class TestBulkCreate:
+    """作成"""
+
+    @requires_db
+    def test_create_terms_and_edges_with_refs(self, client, db_session):
+        """同じリクエストで作った用語をrefで参照してエッジを作れる"""
+        existing = _create_terms(client, "BulkExisting")["BulkExisting"]
+
+        response = _bulk(
+            client,
+            terms={"create": [
+                {"name": "BulkA", "category": "bulk", "tier": 1, "ref": "a"},
+                {"name": "BulkB", "category": "bulk", "tier": 5, "ref": "b"},
+            ]},
+            edges={"create": [
+                {"from_term_ref": "a", "to_term_ref": "b", "keyword": "AB", "difficulty": "easy"},
+                {"from_term_ref": "b", "to_term_id": existing, "keyword": "B-X"},
+            ]},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        a, b = data["created_term_ids"]
+        assert data["term_refs"] == {"a": a, "b": b}
+        assert len(data["created_edge_ids"]) == 2
+
+        cache = get_cache()
+        assert cache.get_term(b).tier == 2  # tier は 1-3 に丸める
+        assert cache.get_edge(a, b).keyword == "AB"
+        assert cache.get_edge(existing, b).id == data["created_edge_ids"][1]
+
+        edge = client.get(f"/admin/edges/{data['created_edge_ids'][0]}", headers=AUTH_HEADERS).json()
+        assert {edge["from_term_name"], edge["to_term_name"]} == {"BulkA", "BulkB"}
+
+
+class TestBulkUpdateDelete:
+    """更新・削除"""
+
+    @requires_db
+    def test_update_and_delete(self, client, db_session):
+        refs = _create_terms(client, "U1", "U2", "U3")
+        created = _bulk(client, edges={"create": [
+            {"from_term_id": refs["U1"], "to_term_id": refs["U2"]},
+            {"from_term_id": refs["U2"], "to_term_id": refs["U3"]},
+        ]}).json()["created_edge_ids"]
+
+        response = _bulk(
+            client,
+            terms={
+                "update": [{"id": refs["U1"], "name": "U1-renamed", "category": "bulk", "tier": 2}],
+                "delete": [refs["U3"]],
+            },
+            edges={"update": [{
+                "id": created[0], "from_term_id": refs["U2"], "to_term_id": refs["U1"],
+                "keyword": "updated", "difficulty": "hard",
+            }]},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["updated_terms"] == 1
+        assert data["deleted_terms"] == 1
+        assert data["deleted_edges"] == 1  # U3 と一緒に消えたエッジ
+
+        cache = get_cache()
+        assert cache.get_term(refs["U1"]).name == "U1-renamed"
+        assert cache.get_term(refs["U3"]) is None
+        assert cache.get_edge(refs["U1"], refs["U2"]).keyword == "updated"
+        assert cache.get_edge(refs["U2"], refs["U3"]) is None
+        assert client.get(f"/admin/edges/{created[1]}", headers=AUTH_HEADERS).status_code == 404
+
+    @requires_db
+    def test_delete_and_recreate_same_pair(self, client, db_session):
+        """同じバッチで消したエッジと同じ組は作り直せる"""
+        refs = _create_terms(client, "R1", "R2")
+        edge_id = _bulk(client, edges={"create": [
+            {"from_term_id": refs["R1"], "to_term_id": refs["R2"], "keyword": "old"},
+        ]}).json()["created_edge_ids"][0]
+
+        response = _bulk(client, edges={
+            "delete": [edge_id],
+            "create": [{"from_term_id": refs["R2"], "to_term_id": refs["R1"], "keyword": "new"}],
+        })
+        assert response.status_code == 200
+        assert get_cache().get_edge(refs["R1"], refs["R2"]).keyword == "new"
+
+
+class TestBulkValidation:
+    """検証エラー（1件でもあれば何も書き込まない）"""
+
+    @requires_db
+    def test_per_item_errors_and_nothing_written(self, client, db_session):
+        refs = _create_terms(client, "V1", "V2")
+        _bulk(client, edges={"create": [{"from_term_id": refs["V1"], "to_term_id": refs["V2"]}]})
+        version = get_cache().version
+
+        response = _bulk(
+            client,
+            terms={
+                "create": [{"name": "VNew", "category": "bulk", "ref": "new"}],
+                "update": [{"id": -1, "name": "x", "category": "bulk"}],
+            },
+            edges={
+                "create": [
+                    {"from_term_ref": "new", "to_term_id": refs["V1"]},
+                    {"from_term_id": refs["V2"], "to_term_id": refs["V1"]},
+                    {"from_term_ref": "missing", "to_term_id": refs["V1"]},
+                    {"from_term_id": refs["V1"], "to_term_id": refs["V1"]},
+                ],
+                "delete": [-5],
+            },
+        )
+        assert response.status_code == 422
+        errors = {tuple(e["loc"][1:]): e["msg"] for e in response.json()["detail"]}
+        assert set(errors) == {
+            ("edges", "create", 1),
+            ("edges", "create", 2),
+            ("edges", "create", 3),
+            ("edges", "delete", 0),
+            ("terms", "update", 0),
+        }
+        assert "already exists" in errors[("edges", "create", 1)]
+        assert "Unknown term ref" in errors[("edges", "create", 2)]
+
+        assert get_cache().version == version
+        assert db_session.execute(text("SELECT COUNT(*) FROM terms WHERE name = 'VNew'")).scalar() == 0
+
+    @requires_db
+    def test_duplicate_pair_within_batch(self, client, db_session):
+        refs = _create_terms(client, "D1", "D2")
+        response = _bulk(client, edges={"create": [
+            {"from_term_id": refs["D1"], "to_term_id": refs["D2"]},
+            {"from_term_id": refs["D2"], "to_term_id": refs["D1"]},
+        ]})
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"] == ["body", "edges", "create", 1]
+
+    @requires_db
+    def test_column_limits_reported_per_item(self, client, db_session):
+        """DBの制約に反する値（長すぎる名前・キーワード、不正な難易度）も項目ごとに422"""
+        refs = _create_terms(client, "L1", "L2")
+        version = get_cache().version
+
+        response = _bulk(
+            client,
+            terms={
+                "create": [
+                    {"name": "LOk", "category": "bulk"},
+                    {"name": "x" * 101, "category": "bulk"},
+                ],
+                "update": [{"id": refs["L1"], "name": "L1", "category": "c" * 51}],
+            },
+            edges={"create": [
+                {"from_term_id": refs["L1"], "to_term_id": refs["L2"], "keyword": "k" * 101},
+                {"from_term_id": refs["L1"], "to_term_id": refs["L2"], "difficulty": "extreme"},
+            ]},
+        )
+        assert response.status_code == 422
+        locs = {tuple(e["loc"][1:]) for e in response.json()["detail"]}
+        assert locs == {
+            ("terms", "create", 1, "name"),
+            ("terms", "update", 0, "category"),
+            ("edges", "create", 0, "keyword"),
+            ("edges", "create", 1, "difficulty"),
+        }
+        assert get_cache().version == version
+        created = db_session.execute(text("SELECT COUNT(*) FROM terms WHERE name = 'LOk'")).scalar()
+        assert created == 0
+
+    @requires_db
+    def test_too_many_items(self, client, db_session, monkeypatch):
+        monkeypatch.setattr(settings, "admin_bulk_max_items", 1)
+        response = _bulk(client, edges={"delete": [1, 2]})
+        assert response.status_code == 413
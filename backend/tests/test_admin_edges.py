@@ -5,9 +5,13 @@ Tests for /admin/edges CRUD, pagination, and /admin/games operations.
 import pytest
 from tests.conftest import requires_db
 
+from app.services.cache import Edge, get_cache
+
 ADMIN_SECRET = "test-admin-secret-for-testing"
 AUTH_HEADERS = {"Authorization": f"Bearer {ADMIN_SECRET}"}
 
+pytestmark = pytest.mark.usefixtures("restore_cache")
+
 
 @pytest.fixture(autouse=True)
 def set_admin_secret(monkeypatch):
@@ -228,6 +232,40 @@ class TestEdgesPagination:
         assert "items" in data
         assert "total" in data
 
+    @requires_db
+    def test_list_edges_cursor_walk(self, client, db_session):
+        """cursor で最後までたどると全件を1回ずつ返す（用語名付き）"""
+        seen, cursor = [], None
+        while True:
+            params = {"sort_by": "difficulty", "sort_order": "desc", "limit": 100}
+            if cursor:
+                params["cursor"] = cursor
+            data = client.get("/admin/edges", headers=AUTH_HEADERS, params=params).json()
+            seen += data["items"]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+        assert len(seen) == data["total"] == len({e["id"] for e in seen})
+        keys = [(e["difficulty"], e["id"]) for e in seen]
+        assert keys == sorted(keys, reverse=True)
+        assert all(e["from_term_name"] and e["to_term_name"] for e in seen)
+
+    @requires_db
+    def test_list_edges_with_missing_term(self, client, db_session):
+        """用語がキャッシュにないエッジも500にせず、名前を空で返す"""
+        cache = get_cache()
+        known = next(iter(cache.terms))
+        cache.upsert_edge(Edge(
+            id=-9001, term_a=-424242, term_b=known,
+            difficulty="easy", keyword="orphan", description="",
+        ))
+        response = client.get("/admin/edges?sort_by=id&limit=1", headers=AUTH_HEADERS)
+        assert response.status_code == 200
+        edge = response.json()["items"][0]
+        assert edge["id"] == -9001
+        assert edge["from_term_name"] == ""
+        assert edge["to_term_name"] == cache.get_term(known).name
+
     @requires_db
     def test_list_edges_invalid_sort_field(self, client, db_session):
         """無効なソートフィールドで400"""
@@ -3,11 +3,16 @@
 Tests for /admin/terms CRUD, pagination, and auth operations.
 """
 import pytest
+from sqlalchemy import text
 from tests.conftest import requires_db
 
+from app.services.cache import get_cache
+
 ADMIN_SECRET = "test-admin-secret-for-testing"
 AUTH_HEADERS = {"Authorization": f"Bearer {ADMIN_SECRET}"}
 
+pytestmark = pytest.mark.usefixtures("restore_cache")
+
 
 @pytest.fixture(autouse=True)
 def set_admin_secret(monkeypatch):
@@ -214,6 +219,68 @@ class TestTermsPagination:
         )
         assert response.status_code == 200
 
+    @requires_db
+    def test_list_terms_sorted_from_cache(self, client, db_session):
+        """キャッシュから並べ替えて返す（同じ値はid順）"""
+        response = client.get(
+            "/admin/terms?sort_by=tier&sort_order=desc&limit=100",
+            headers=AUTH_HEADERS,
+        )
+        data = response.json()
+        assert data["total"] == len(get_cache().terms)
+        keys = [(t["tier"], t["id"]) for t in data["items"]]
+        assert keys == sorted(keys, reverse=True)
+
+    @requires_db
+    def test_list_terms_cursor_matches_offset(self, client, db_session):
+        """cursor でたどった結果が skip でのページと一致する"""
+        params = {"sort_by": "name", "limit": 7}
+        first = client.get("/admin/terms", headers=AUTH_HEADERS, params=params).json()
+        by_cursor = client.get(
+            "/admin/terms", headers=AUTH_HEADERS,
+            params={**params, "cursor": first["next_cursor"]},
+        ).json()
+        by_offset = client.get(
+            "/admin/terms", headers=AUTH_HEADERS, params={**params, "skip": 7},
+        ).json()
+        assert by_cursor["items"] == by_offset["items"]
+        names = [t["name"] for t in first["items"] + by_cursor["items"]]
+        assert names == sorted(names)
+
+    @requires_db
+    def test_list_terms_name_order_matches_db(self, client, db_session):
+        """name 順はコードポイント順で、DB（C照合順序）の ORDER BY と一致する"""
+        names = ["ord-b", "ord-B", "ord-a", "ord-é", "ord-Z", "ord-日本", "ord-ｶ", "ord-a"]
+        for name in names:
+            response = client.post(
+                "/admin/terms", headers=AUTH_HEADERS,
+                json={"name": name, "category": "order", "tier": 1},
+            )
+            assert response.status_code in (200, 201)
+
+        items, cursor = [], None
+        while True:
+            params = {"sort_by": "name", "limit": 100}
+            if cursor:
+                params["cursor"] = cursor
+            data = client.get("/admin/terms", headers=AUTH_HEADERS, params=params).json()
+            items += data["items"]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        ours = [t["name"] for t in items if t["name"].startswith("ord-")]
+        assert ours == ["ord-B", "ord-Z", "ord-a", "ord-a", "ord-b", "ord-é", "ord-日本", "ord-ｶ"]
+        expected = [row[0] for row in db_session.execute(text("SELECT id FROM terms ORDER BY name, id"))]
+        assert [t["id"] for t in items] == expected
+
+    @requires_db
+    def test_list_terms_invalid_cursor(self, client, db_session):
+        response = client.get(
+            "/admin/terms?cursor=invalid", headers=AUTH_HEADERS,
+        )
+        assert response.status_code == 400
+
     @requires_db
     def test_list_terms_invalid_sort_field(self, client, db_session):
         """無効なソートフィールドで400"""
@@ -231,6 +298,43 @@ class TestTermsPagination:
         data = response.json()
         assert isinstance(data, list)
 
+    @requires_db
+    def test_list_all_terms_etag(self, client, db_session):
+        """/terms/all は ETag を返し、一致すれば304、内容が変われば新しいETag"""
+        first = client.get("/admin/terms/all", headers=AUTH_HEADERS)
+        etag = first.headers["etag"]
+
+        not_modified = client.get(
+            "/admin/terms/all", headers={**AUTH_HEADERS, "If-None-Match": etag}
+        )
+        assert not_modified.status_code == 304
+        assert not_modified.content == b""
+        assert not_modified.headers["etag"] == etag
+
+        client.post(
+            "/admin/terms", headers=AUTH_HEADERS,
+            json={"name": "ETagTerm", "category": "cat", "tier": 1},
+        )
+        changed = client.get(
+            "/admin/terms/all", headers={**AUTH_HEADERS, "If-None-Match": etag}
+        )
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+        assert "ETagTerm" in [t["name"] for t in changed.json()]
+
+    @requires_db
+    def test_list_all_terms_gzip(self, client, db_session):
+        """gzip を受け付けるクライアントには圧縮済みボディ、そうでなければ非圧縮"""
+        gzipped = client.get(
+            "/admin/terms/all", headers={**AUTH_HEADERS, "Accept-Encoding": "gzip"}
+        )
+        assert gzipped.headers["content-encoding"] == "gzip"
+        plain = client.get(
+            "/admin/terms/all", headers={**AUTH_HEADERS, "Accept-Encoding": "identity"}
+        )
+        assert "content-encoding" not in plain.headers
+        assert plain.json() == gzipped.json()
+
 
 class TestTermEdges:
     """Term関連Edge取得テスト"""
@@ -0,0 +1,68 @@
+"""ビットマスクグラフ（ルート探索用）のテスト
+
+難易度別の隣接と同じ関係を持ち、ランダムウォークが set 版と同じルートを返すことを確認する。
+"""
+import random
+
+import pytest
+
+from app.services.bitset_graph import build_bitset_graph
+from app.services.cache import DIFFICULTY_FILTERS, get_cache
+from app.services.route_generator import _random_walk
+
+
+def _reference_walk(start, target_length, adjacency, rng):
+    """set で訪問済みを持つ素朴な実装（行き止まり回避付き）"""
+    route, visited = [start], {start}
+    while len(route) < target_length:
+        candidates = [n for n in adjacency.get(route[-1], ()) if n not in visited]
+        if not candidates:
+            break
+        if len(candidates) > 1:
+            non_dead = [c for c in candidates if any(n not in visited for n in adjacency.get(c, ()))]
+            if non_dead:
+                candidates = non_dead
+        next_term = rng.choice(candidates)
+        route.append(next_term)
+        visited.add(next_term)
+    return route
+
+
+class TestBitsetGraph:
+
+    @pytest.mark.parametrize("difficulty", list(DIFFICULTY_FILTERS))
+    def test_masks_match_adjacency(self, difficulty):
+        snapshot = get_cache().snapshot()
+        adjacency = snapshot.get_adjacency(difficulty)
+        graph = snapshot.get_bitset_graph(difficulty)
+        for term_id, neighbors in adjacency.items():
+            i = graph.index[term_id]
+            assert graph.to_term_ids(graph.neighbors[i]) == list(neighbors)
+            assert graph.residual_degree(i, graph.all_mask) == len(neighbors)
+
+    def test_residual_degree_excludes_visited(self):
+        graph = build_bitset_graph({1: (2, 3), 2: (1,), 3: (1,)})
+        one, two = graph.index[1], graph.index[2]
+        unvisited = graph.all_mask & ~(1 << one) & ~(1 << two)
+        assert graph.residual_degree(one, unvisited) == 1
+        assert graph.residual_degree(two, unvisited) == 0
+
+    def test_built_once_per_version(self):
+        snapshot = get_cache().snapshot()
+        assert snapshot.get_bitset_graph("easy") is snapshot.get_bitset_graph("easy")
+        assert snapshot.get_bitset_graph("unknown") is snapshot.get_bitset_graph("hard")
+
+    @pytest.mark.parametrize("difficulty", list(DIFFICULTY_FILTERS))
+    def test_random_walk_matches_set_version(self, difficulty):
+        """同じシードなら set 版と同じルート（乱数の消費順が変わらない）"""
+        snapshot = get_cache().snapshot()
+        adjacency = snapshot.get_adjacency(difficulty)
+        pool = snapshot.get_term_pool(DIFFICULTY_FILTERS[difficulty][0])
+        for seed in range(30):
+            start = pool[seed % len(pool)]
+            expected = _reference_walk(start, 31, adjacency, random.Random(seed))
+            assert _random_walk(start, 31, difficulty, rng=random.Random(seed), snapshot=snapshot) == expected
+
+    def test_random_walk_without_edges(self):
+        """隣接のない用語はそのまま1ノードのルート"""
+        assert _random_walk(-12345, 5, "hard", snapshot=get_cache().snapshot()) == [-12345]
@@ -1,6 +1,8 @@
 """キャッシュサービスのテスト"""
 import pytest
-from app.services.cache import get_cache, reset_cache, DataCache
+from app.services.cache import (
+    get_cache, reset_cache, CacheSnapshot, DataCache, Term, Edge, DIFFICULTY_FILTERS
+)
 
 
 class TestDataCache:
@@ -105,6 +107,269 @@ class TestDataCache:
             assert isinstance(neighbors, list)
 
 
+class TestRecords:
+    """Term/Edgeレコードのテスト"""
+
+    def test_records_are_slotted_and_frozen(self):
+        """__dict__を持たず、変更できない"""
+        cache = get_cache()
+        term = next(iter(cache.terms.values()))
+        edge = cache.edges[0]
+        assert not hasattr(term, '__dict__')
+        assert not hasattr(edge, '__dict__')
+        with pytest.raises(AttributeError):
+            term.tier = 99
+
+    def test_vocabularies_are_interned(self):
+        """同じcategory/difficultyは同一の文字列オブジェクトを共有する"""
+        cache = get_cache()
+        by_category = {}
+        for term in cache.terms.values():
+            assert by_category.setdefault(term.category, term.category) is term.category
+        by_difficulty = {}
+        for edge in cache.edges:
+            assert by_difficulty.setdefault(edge.difficulty, edge.difficulty) is edge.difficulty
+
+        built = Term(id=-1, name="x", tier=1, category="".join(["縄文", "時代"]), description="")
+        assert built.category is Term(id=-2, name="y", tier=1, category="縄文時代", description="").category
+
+
+class TestFilteredNeighbors:
+    """難易度別の事前計算済み隣接のテスト"""
+
+    @staticmethod
+    def _scan(cache, term_id, max_tier, allowed):
+        """エッジを走査して絞り込む（事前計算と比較する基準）"""
+        result = []
+        for edge in cache.get_edges_for_term(term_id):
+            if edge.difficulty not in allowed:
+                continue
+            other = edge.term_b if edge.term_a == term_id else edge.term_a
+            term = cache.get_term(other)
+            if term and term.tier <= max_tier:
+                result.append(other)
+        return result
+
+    @pytest.mark.parametrize("difficulty", list(DIFFICULTY_FILTERS))
+    def test_matches_edge_scan(self, difficulty):
+        """事前計算結果がエッジ走査と順序まで一致する"""
+        cache = get_cache()
+        max_tier, allowed = DIFFICULTY_FILTERS[difficulty]
+        for term_id in cache.terms:
+            expected = self._scan(cache, term_id, max_tier, allowed)
+            assert list(cache.get_filtered_neighbors(term_id, difficulty)) == expected
+
+    def test_non_level_filter_falls_back_to_scan(self):
+        """難易度定義にない組み合わせはエッジ走査で絞り込む"""
+        cache = get_cache()
+        edge = cache.edges[0]
+        result = cache.get_neighbors_with_filter(edge.term_a, 3, ['hard'])
+        assert result == self._scan(cache, edge.term_a, 3, ['hard'])
+
+    @pytest.mark.usefixtures("restore_cache")
+    def test_tier_change_refreshes_neighbors(self):
+        """Tier変更が隣接ノード側の事前計算にも反映される"""
+        cache = get_cache()
+        cache.apply_changes(upsert_terms=[
+            Term(id=-5001, name="隣A", tier=1, category="test", description=""),
+            Term(id=-5002, name="隣B", tier=1, category="test", description=""),
+        ], upsert_edges=[
+            Edge(id=-6001, term_a=-5002, term_b=-5001, difficulty="easy", keyword="", description=""),
+        ])
+        assert cache.get_filtered_neighbors(-5001, 'easy') == (-5002,)
+
+        cache.upsert_term(Term(id=-5002, name="隣B", tier=2, category="test", description=""))
+        assert cache.get_filtered_neighbors(-5001, 'easy') == ()
+        assert cache.get_filtered_neighbors(-5001, 'normal') == (-5002,)
+
+        cache.delete_term(-5002)
+        assert cache.get_filtered_neighbors(-5001, 'hard') == ()
+
+
+class TestIncrementalUpdate:
+    """差分更新APIのテスト（upsert/delete）"""
+
+    pytestmark = pytest.mark.usefixtures("restore_cache")
+
+    NEW_A = -1001
+    NEW_B = -1002
+
+    def _add_pair(self, cache, difficulty='easy'):
+        cache.upsert_term(Term(id=self.NEW_A, name="差分A", tier=1, category="test", description=""))
+        cache.upsert_term(Term(id=self.NEW_B, name="差分B", tier=1, category="test", description=""))
+        edge = Edge(id=-2001, term_a=self.NEW_B, term_b=self.NEW_A,
+                    difficulty=difficulty, keyword="kw", description="")
+        cache.upsert_edge(edge)
+        return edge
+
+    def test_load_from_db_does_not_duplicate_edges(self):
+        """再読み込みしてもエッジが重複しない"""
+        cache = get_cache()
+        edge_count = len(cache.edges)
+        cache.load_from_db()
+        assert len(cache.edges) == edge_count
+
+    def test_upsert_term_adds_term(self):
+        """新規用語が追加されTier索引にも載る"""
+        cache = get_cache()
+        self._add_pair(cache)
+        assert cache.get_term(self.NEW_A).name == "差分A"
+        assert self.NEW_A in cache.get_terms_by_max_tier(1)
+
+    def test_upsert_term_moves_tier(self):
+        """Tier変更で索引が付け替わる"""
+        cache = get_cache()
+        self._add_pair(cache)
+        cache.upsert_term(Term(id=self.NEW_A, name="差分A", tier=3, category="test", description=""))
+        assert self.NEW_A not in cache.get_terms_by_max_tier(2)
+        assert self.NEW_A in cache.get_terms_by_max_tier(3)
+
+    def test_upsert_edge_updates_indexes(self):
+        """エッジ追加で隣接・エッジ索引が更新される"""
+        cache = get_cache()
+        edge = self._add_pair(cache)
+        assert cache.get_neighbors(self.NEW_A) == {self.NEW_B}
+        assert cache.get_edge(self.NEW_A, self.NEW_B) is edge
+        assert cache.get_edges_for_term(self.NEW_B) == [edge]
+        assert cache.get_neighbors_with_filter(self.NEW_A, 1, ['easy']) == [self.NEW_B]
+
+    def test_upsert_edge_replaces_existing(self):
+        """同じIDのエッジは置き換えられ重複しない"""
+        cache = get_cache()
+        edge = self._add_pair(cache)
+        edge_count = len(cache.edges)
+        updated = Edge(id=edge.id, term_a=edge.term_a, term_b=edge.term_b,
+                       difficulty='hard', keyword="new", description="")
+        cache.upsert_edge(updated)
+        assert len(cache.edges) == edge_count
+        assert cache.get_edge(self.NEW_A, self.NEW_B).keyword == "new"
+        assert cache.get_edges_for_term(self.NEW_A) == [updated]
+        assert cache.get_neighbors_with_filter(self.NEW_A, 1, ['easy']) == []
+
+    def test_delete_edge(self):
+        """エッジ削除で索引から消える"""
+        cache = get_cache()
+        edge = self._add_pair(cache)
+        cache.delete_edge(edge.id)
+        assert cache.get_edge(self.NEW_A, self.NEW_B) is None
+        assert cache.get_neighbors(self.NEW_A) == set()
+        assert cache.get_edges_for_term(self.NEW_B) == []
+
+    def test_delete_term_removes_edges(self):
+        """用語削除で接続エッジも消える"""
+        cache = get_cache()
+        edge = self._add_pair(cache)
+        cache.delete_term(self.NEW_A)
+        assert cache.get_term(self.NEW_A) is None
+        assert self.NEW_A not in cache.get_terms_by_max_tier(3)
+        assert all(e.id != edge.id for e in cache.edges)
+        assert cache.get_neighbors(self.NEW_B) == set()
+
+
+class TestSnapshot:
+    """スナップショット差し替えのテスト"""
+
+    pytestmark = pytest.mark.usefixtures("restore_cache")
+
+    def test_pinned_snapshot_unaffected_by_delta(self):
+        """固定したスナップショットは後続の差分更新で変化しない"""
+        cache = get_cache()
+        pinned = cache.snapshot()
+        term_count = len(pinned.terms)
+        tier1 = pinned.get_terms_by_max_tier(1)
+        edge = pinned.edges[0]
+        neighbors = set(pinned.get_neighbors(edge.term_a))
+
+        cache.upsert_term(Term(id=-3001, name="版テスト", tier=1, category="test", description=""))
+        cache.delete_edge(edge.id)
+
+        assert len(pinned.terms) == term_count
+        assert pinned.get_terms_by_max_tier(1) == tier1
+        assert pinned.get_edge(edge.term_a, edge.term_b) is edge
+        assert pinned.get_neighbors(edge.term_a) == neighbors
+        assert cache.get_edge(edge.term_a, edge.term_b) is None
+        assert cache.get_term(-3001) is not None
+
+    def test_term_pool_reused_and_invalidated(self):
+        """Tier別の用語タプルは版ごとに使い回し、Tierが変わった版では作り直す"""
+        cache = get_cache()
+        pinned = cache.snapshot()
+        pool = pinned.get_term_pool(2)
+        assert pinned.get_term_pool(2) is pool
+        assert list(pool) == pinned.get_terms_by_max_tier(2)
+
+        cache.upsert_term(Term(id=-3002, name="プールテスト", tier=1, category="test", description=""))
+        assert -3002 in cache.get_term_pool(2)
+        assert -3002 not in pinned.get_term_pool(2)
+
+    def test_version_increments_on_publish(self):
+        """再読み込み・差分更新のたびに新しい版が公開される"""
+        cache = get_cache()
+        before = cache.snapshot()
+        cache.load_from_db()
+        reloaded = cache.snapshot()
+        assert reloaded is not before
+        assert reloaded.version > before.version
+
+        cache.apply_changes(delete_edges=[reloaded.edges[0].id])
+        assert cache.version > reloaded.version
+
+    def test_apply_changes_publishes_once(self):
+        """複数の差分をまとめると版は1つだけ進む"""
+        cache = get_cache()
+        version = cache.version
+        cache.apply_changes(upsert_terms=[
+            Term(id=-3002, name="一括A", tier=2, category="test", description=""),
+            Term(id=-3003, name="一括B", tier=2, category="test", description=""),
+        ], upsert_edges=[
+            Edge(id=-4001, term_a=-3003, term_b=-3002, difficulty="normal", keyword="", description=""),
+        ])
+        assert cache.version == version + 1
+        assert cache.get_neighbors(-3002) == {-3003}
+
+
+class TestRouteComponents:
+    """難易度別の連結成分とルート長の上限"""
+
+    # 1-2-3（道: 上限3）、10を中心に11,12,13（星: 葉3つで上限3）、
+    # 30-31-32の三角形 + 33（上限4）、20は孤立（上限1）、40はTier2（easyの対象外）
+    PAIRS = [(1, 2), (2, 3), (10, 11), (10, 12), (10, 13), (30, 31), (31, 32), (30, 32), (32, 33)]
+
+    def _snapshot(self) -> CacheSnapshot:
+        ids = sorted({i for pair in self.PAIRS for i in pair} | {20})
+        terms = {i: Term(id=i, name=str(i), tier=1, category="t", description="") for i in ids}
+        terms[40] = Term(id=40, name="40", tier=2, category="t", description="")
+        pairs = [*self.PAIRS, (3, 40)]
+        edges = {
+            n: Edge(id=n, term_a=min(a, b), term_b=max(a, b), difficulty="easy", keyword="", description="")
+            for n, (a, b) in enumerate(pairs, start=1)
+        }
+        return CacheSnapshot(terms, edges)
+
+    def test_bounds(self):
+        components = self._snapshot().get_route_components("easy")
+        bounds = {term_id: components.max_path[components.component_of[term_id]] for term_id in (1, 10, 20, 30)}
+        assert bounds == {1: 3, 10: 3, 20: 1, 30: 4}
+        assert components.max_route_length == 4
+        assert 40 not in components.component_of
+
+    def test_starts_for(self):
+        components = self._snapshot().get_route_components("easy")
+        assert components.starts_for(4) == (30, 31, 32, 33)
+        assert 20 not in components.starts_for(2)
+        assert components.starts_for(5) == ()
+
+    def test_tier_changes_components(self):
+        """normal では Tier2 の 40 も含めて数える"""
+        components = self._snapshot().get_route_components("normal")
+        assert components.max_path[components.component_of[1]] == 4
+
+    def test_built_once_per_version(self):
+        snapshot = self._snapshot()
+        assert snapshot.get_route_components("easy") is snapshot.get_route_components("easy")
+        assert snapshot.copy(version=1).get_route_components("easy") is not snapshot.get_route_components("easy")
+
+
 class TestResetCache:
     """reset_cache関数のテスト"""
 
@@ -61,6 +61,20 @@ class TestSettings:
         s = Settings()
         assert "http://localhost:5173" in s.cors_origins
 
+    def test_default_cache_graph_backend(self):
+        """Test default cache_graph_backend"""
+        from app.config import Settings
+        s = Settings()
+        assert s.cache_graph_backend == "dict"
+
+    def test_invalid_cache_graph_backend(self):
+        """Test unknown cache_graph_backend is rejected"""
+        from pydantic import ValidationError
+        from app.config import Settings
+        with patch.dict(os.environ, {"CACHE_GRAPH_BACKEND": "numpy"}):
+            with pytest.raises(ValidationError):
+                Settings()
+
     def test_settings_singleton(self):
         """Test settings is the same instance"""
         from app.config import settings as s1
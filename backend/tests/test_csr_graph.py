@@ -0,0 +1,154 @@
+"""CSRグラフ（cache_graph_backend="csr"）のテスト
+
+dict版のスナップショットと同じ結果を返すことを、実データで比較する。
+"""
+import pytest
+
+from app.services.cache import CacheSnapshot, DIFFICULTY_FILTERS, Edge, Term, get_cache
+
+
+@pytest.fixture
+def snapshots():
+    """同じデータから dict版 / csr版 のスナップショットを作る"""
+    base = get_cache().snapshot()
+    edges = {edge.id: edge for edge in base.edges}
+    dict_snapshot = CacheSnapshot(dict(base.terms), dict(edges), backend='dict')
+    csr_snapshot = CacheSnapshot(dict(base.terms), dict(edges), backend='csr')
+    return dict_snapshot, csr_snapshot
+
+
+class TestCsrBackend:
+    """CSR版の読み取りAPIのテスト"""
+
+    def test_get_neighbors_matches_dict(self, snapshots):
+        """隣接ノードがdict版と一致する"""
+        dict_snapshot, csr_snapshot = snapshots
+        for term_id in dict_snapshot.terms:
+            assert csr_snapshot.get_neighbors(term_id) == dict_snapshot.get_neighbors(term_id)
+
+    def test_get_edge_matches_dict(self, snapshots):
+        """エッジ取得（両方向）がdict版と一致する"""
+        dict_snapshot, csr_snapshot = snapshots
+        for edge in dict_snapshot.edges:
+            assert csr_snapshot.get_edge(edge.term_a, edge.term_b) is edge
+            assert csr_snapshot.get_edge(edge.term_b, edge.term_a) is edge
+        assert csr_snapshot.get_edge(-1, -2) is None
+
+    def test_get_edges_for_term_matches_dict(self, snapshots):
+        """用語のエッジ一覧が順序までdict版と一致する"""
+        dict_snapshot, csr_snapshot = snapshots
+        for term_id in dict_snapshot.terms:
+            assert csr_snapshot.get_edges_for_term(term_id) == dict_snapshot.get_edges_for_term(term_id)
+        assert csr_snapshot.get_edges_for_term(-99999) == []
+
+    @pytest.mark.parametrize("difficulty", list(DIFFICULTY_FILTERS))
+    def test_filtered_neighbors_match_dict(self, snapshots, difficulty):
+        """難易度別の隣接がdict版と順序まで一致する"""
+        dict_snapshot, csr_snapshot = snapshots
+        max_tier, allowed = DIFFICULTY_FILTERS[difficulty]
+        for term_id in dict_snapshot.terms:
+            expected = dict_snapshot.get_filtered_neighbors(term_id, difficulty)
+            assert csr_snapshot.get_filtered_neighbors(term_id, difficulty) == expected
+            assert csr_snapshot.get_neighbors_with_filter(term_id, max_tier, list(allowed)) == list(expected)
+
+    @pytest.mark.parametrize("max_tier, allowed", [
+        (2, ["hard"]),
+        (1, ["normal", "hard"]),
+        (3, ["easy", "hard"]),
+    ])
+    def test_non_standard_filter_matches_dict(self, snapshots, max_tier, allowed):
+        """難易度定義にない条件（エッジを走査する経路）もdict版と順序まで一致する"""
+        dict_snapshot, csr_snapshot = snapshots
+        found = 0
+        for term_id in dict_snapshot.terms:
+            expected = dict_snapshot.get_neighbors_with_filter(term_id, max_tier, allowed)
+            assert csr_snapshot.get_neighbors_with_filter(term_id, max_tier, allowed) == expected
+            found += len(expected)
+        assert found > 0
+
+    def test_adjacency_view(self, snapshots):
+        """難易度別の隣接ビューはdictと同じように引ける"""
+        _, csr_snapshot = snapshots
+        adjacency = csr_snapshot.get_adjacency('hard')
+        assert len(adjacency) >= len(csr_snapshot.terms)
+        assert tuple(adjacency.get(-99999, ())) == ()
+
+    def test_incremental_update_rebuilds_graph(self, snapshots):
+        """差分更新後もCSR版の隣接が正しい"""
+        _, csr_snapshot = snapshots
+        updated = csr_snapshot.copy(version=csr_snapshot.version + 1)
+        updated._upsert_term(Term(id=-7001, name="CSR-A", tier=1, category="test", description=""))
+        updated._upsert_term(Term(id=-7002, name="CSR-B", tier=1, category="test", description=""))
+        updated._upsert_edge(Edge(id=-8001, term_a=-7002, term_b=-7001,
+                                  difficulty="easy", keyword="", description=""))
+        updated.finish_changes()
+
+        assert updated.get_filtered_neighbors(-7001, 'easy') == (-7002,)
+        assert updated.get_edge(-7001, -7002).id == -8001
+        # 元のスナップショットは変化しない
+        assert csr_snapshot.get_term(-7001) is None
+
+        updated._delete_terms([-7002])
+        updated.finish_changes()
+        assert updated.get_neighbors(-7001) == set()
+
+    def test_delete_terms_in_one_publish(self, snapshots):
+        """複数の用語削除をまとめて反映しても、接続エッジごとdict版と一致する"""
+        dict_snapshot, csr_snapshot = snapshots
+        term_ids = [
+            term_id for term_id in dict_snapshot.terms if dict_snapshot.get_neighbors(term_id)
+        ][:5]
+        results = []
+        for snapshot in (dict_snapshot, csr_snapshot):
+            updated = snapshot.copy(version=snapshot.version + 1)
+            updated._delete_terms(term_ids)
+            updated.finish_changes()
+            results.append(updated)
+
+        dict_updated, csr_updated = results
+        assert [e.id for e in csr_updated.edges] == [e.id for e in dict_updated.edges]
+        assert not any(
+            e.term_a in term_ids or e.term_b in term_ids for e in csr_updated.edges
+        )
+        for term_id in dict_updated.terms:
+            assert csr_updated.get_neighbors(term_id) == dict_updated.get_neighbors(term_id)
+
+    def test_duplicate_pair_same_edge_wins(self):
+        """同じ組のエッジが複数あっても両backendで同じエッジを返す（IDが最大のもの）"""
+        terms = {
+            term_id: Term(id=term_id, name=f"T{term_id}", tier=1, category="test", description="")
+            for term_id in (1, 2, 3)
+        }
+
+        def edge(edge_id, term_a, term_b):
+            return Edge(id=edge_id, term_a=term_a, term_b=term_b,
+                        difficulty="easy", keyword="", description="")
+
+        # 読み込み順とIDの大小が逆のものを混ぜる
+        edges = [edge(20, 1, 2), edge(10, 2, 1), edge(30, 1, 3)]
+        snapshots = [
+            CacheSnapshot(dict(terms), {e.id: e for e in edges}, backend=backend)
+            for backend in ('dict', 'csr')
+        ]
+        for snapshot in snapshots:
+            assert snapshot.get_edge(1, 2).id == 20
+            assert snapshot.get_edge(2, 1).id == 20
+
+        for snapshot in snapshots:
+            updated = snapshot.copy(version=snapshot.version + 1)
+            updated._upsert_edge(edge(15, 1, 2))
+            updated.finish_changes()
+            assert updated.get_edge(2, 1).id == 20
+
+            updated._delete_edge(20)
+            updated.finish_changes()
+            assert updated.get_edge(1, 2).id == 15
+
+            updated._delete_edge(15)
+            updated.finish_changes()
+            assert updated.get_edge(1, 2).id == 10
+
+    def test_unknown_backend_rejected(self):
+        """未知のbackendはエラー"""
+        with pytest.raises(ValueError):
+            CacheSnapshot(backend='numpy')
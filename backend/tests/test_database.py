@@ -70,3 +70,126 @@ def test_get_db():
         next(db_gen)
     except StopIteration:
         pass  # 正常終了
+
+
+async def test_async_session_round_trip():
+    """非同期エンジン経由でクエリを実行できる"""
+    from app.database import async_engine, get_async_db
+
+    try:
+        async for db in get_async_db():
+            result = await db.execute(text("SELECT COUNT(*) FROM terms"))
+            assert result.scalar() > 0
+    finally:
+        await async_engine.dispose()
+
+
+def test_async_database_url_uses_psycopg():
+    """非同期用URLはpsycopg(v3)ドライバに書き換える"""
+    from app.database import async_database_url
+
+    url = async_database_url("postgresql://user:pw@db.example.com:5432/histlink?sslmode=require")
+    assert url.drivername == "postgresql+psycopg"
+    assert url.host == "db.example.com"
+    assert url.query["sslmode"] == "require"
+
+
+def test_pool_settings_applied():
+    """プール設定がエンジンに反映されている"""
+    from app.config import settings
+    from app.database import TimedAsyncAdaptedQueuePool, TimedQueuePool, async_engine, engine
+
+    assert isinstance(engine.pool, TimedQueuePool)
+    assert isinstance(async_engine.pool, TimedAsyncAdaptedQueuePool)
+    for pool in (engine.pool, async_engine.pool):
+        assert pool.size() == settings.db_pool_size
+        assert pool.timeout() == settings.db_pool_timeout
+        assert pool._recycle == settings.db_pool_recycle
+        assert pool._pre_ping == settings.db_pool_pre_ping
+
+
+def test_pool_status_counts_checkouts():
+    """チェックアウト数・使用中の接続数を取得できる"""
+    from app.database import engine, pool_status
+
+    before = pool_status(engine.pool)["checkouts"]
+    with engine.connect() as conn:
+        status = pool_status(engine.pool)
+        assert status["checked_out"] >= 1
+        conn.execute(text("SELECT 1"))
+    after = pool_status(engine.pool)
+    assert after["checkouts"] == before + 1
+    assert after["max_wait_ms"] >= after["avg_wait_ms"] >= 0
+
+
+def test_pool_timeout_is_recorded():
+    """空き接続がないまま timeout を過ぎたら TimeoutError になり、回数が記録される"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+    from app.config import settings
+    from app.database import TimedQueuePool, pool_status
+
+    small = create_engine(
+        settings.database_url, poolclass=TimedQueuePool,
+        pool_size=1, max_overflow=0, pool_timeout=0.05
+    )
+    try:
+        with small.connect():
+            with pytest.raises(PoolTimeoutError):
+                small.connect()
+        status = pool_status(small.pool)
+        assert status["timeouts"] == 1
+        assert status["checkouts"] == 1
+    finally:
+        small.dispose()
+
+
+def test_db_pool_metrics_endpoint(client, monkeypatch):
+    """GET /admin/metrics/db-pool で両エンジンのプール状態を取得できる"""
+    monkeypatch.setenv("ADMIN_SECRET", "metrics-secret")
+    response = client.get(
+        "/admin/metrics/db-pool",
+        headers={"Authorization": "Bearer metrics-secret"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    for engine_name in ("async", "sync"):
+        for key in ("size", "checked_out", "idle", "overflow", "timeouts", "avg_wait_ms"):
+            assert key in data[engine_name]
+
+
+def test_health_uses_async_engine(real_db_client):
+    """/health が psycopg(v3) の非同期エンジンでDBに届く"""
+    from app.database import async_engine, pool_status
+
+    before = pool_status(async_engine.pool)["checkouts"]
+    response = real_db_client.get("/health")
+    assert response.status_code == 200
+    assert response.json()["database"] == "connected"
+    assert async_engine.url.drivername == "postgresql+psycopg"
+    assert pool_status(async_engine.pool)["checkouts"] > before
+
+
+def test_start_game_commits_through_async_session(real_db_client, db_engine, monkeypatch):
+    """ゲーム開始の INSERT + commit が非同期セッション経由でDBに残り、管理APIから読める"""
+    monkeypatch.setenv("ADMIN_SECRET", "async-secret")
+    response = real_db_client.post(
+        "/api/v1/games/start", json={"difficulty": "easy", "target_length": 5}
+    )
+    assert response.status_code == 200
+    game_id = response.json()["game_id"]
+    try:
+        with db_engine.connect() as conn:
+            terms = conn.execute(
+                text("SELECT terms FROM games WHERE id = :id"), {"id": game_id}
+            ).scalar_one()
+        assert len(terms) == 6
+
+        detail = real_db_client.get(
+            f"/admin/games/{game_id}", headers={"Authorization": "Bearer async-secret"}
+        )
+        assert detail.status_code == 200
+    finally:
+        with db_engine.begin() as conn:
+            conn.execute(text("DELETE FROM games WHERE id = :id"), {"id": game_id})
@@ -183,3 +183,68 @@ class TestEdgeCases:
 
         # 同じ結果が得られる
         assert result1 == result2
+
+    def test_fallback_returns_all_remaining_candidates(self, db_session):
+        """棄却サンプリングで引き当てられないほど候補が少なくても、残りの候補を全て返す"""
+        cache = get_cache()
+        correct_id = 1
+        neighbors = cache.get_neighbors(correct_id)
+        remaining = [
+            term_id for term_id in cache.get_terms_by_max_tier(3)
+            if term_id != correct_id and term_id not in neighbors
+        ][:2]
+        visited = set(cache.terms) - set(remaining) - {correct_id}
+
+        distractors = generate_distractors(
+            correct_id=correct_id,
+            current_id=2,
+            visited=visited,
+            difficulty='hard',
+            count=3,
+            seed=7
+        )
+        assert sorted(distractors) == sorted(remaining)
+
+
+class TestRouteDistractors:
+    """generate_route_distractors（ルート全体を一括生成）のテスト"""
+
+    def _route(self, difficulty):
+        from app.services.route_generator import generate_route
+        return generate_route(target_length=11, difficulty=difficulty, seed=3)
+
+    @pytest.mark.parametrize("difficulty", ['easy', 'normal', 'hard'])
+    def test_per_step_constraints(self, difficulty, db_session):
+        """各ステップで訪問済み・正解・正解の1hopを除外する"""
+        from app.services.distractor_generator import generate_route_distractors
+
+        cache = get_cache()
+        route = self._route(difficulty)
+        distractors = generate_route_distractors(route, difficulty, count=3, seed=1)
+
+        assert len(distractors) == len(route) - 1
+        for step_no, step_distractors in enumerate(distractors):
+            visited = set(route[:step_no + 1])
+            correct_id = route[step_no + 1]
+            neighbors = cache.get_neighbors(correct_id)
+            assert len(step_distractors) == len(set(step_distractors))
+            for d in step_distractors:
+                assert d not in visited
+                assert d != correct_id
+                assert d not in neighbors
+
+    def test_deterministic_with_seed(self, db_session):
+        """同じseedなら同じ結果"""
+        from app.services.distractor_generator import generate_route_distractors
+
+        route = self._route('hard')
+        first = generate_route_distractors(route, 'hard', count=3, seed=42)
+        second = generate_route_distractors(route, 'hard', count=3, seed=42)
+        assert first == second
+
+    def test_short_route(self, db_session):
+        """1ノード以下のルートはダミーなし"""
+        from app.services.distractor_generator import generate_route_distractors
+
+        assert generate_route_distractors([1], 'hard', count=3) == []
+        assert generate_route_distractors([], 'hard', count=3) == []
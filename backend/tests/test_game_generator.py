@@ -0,0 +1,50 @@
+"""ゲーム生成（ルート + ダミー）のテスト"""
+import logging
+
+import pytest
+
+from app.config import settings
+from app.services.cache import get_cache
+from app.services.game_generator import DISTRACTOR_COUNT, generate_game
+
+
+class TestGenerateGame:
+    """generate_game のテスト"""
+
+    @pytest.mark.parametrize("difficulty", ["easy", "normal", "hard"])
+    def test_distractors_per_step(self, difficulty):
+        """最後以外の各ステップにダミーが付く"""
+        game = generate_game(difficulty, 11)
+        assert len(game.route) > 0
+        assert len(game.distractors) == len(game.route) - 1
+        for distractors in game.distractors:
+            assert len(distractors) <= DISTRACTOR_COUNT
+
+    def test_distractor_rules(self):
+        """ダミーは正解・訪問済み・正解の隣接を含まない"""
+        cache = get_cache().snapshot()
+        game = generate_game('hard', 21, snapshot=cache)
+        for step_no, distractors in enumerate(game.distractors):
+            correct_id = game.route[step_no + 1]
+            visited = set(game.route[:step_no + 1])
+            neighbors = cache.get_neighbors(correct_id)
+            for term_id in distractors:
+                assert term_id != correct_id
+                assert term_id not in visited
+                assert term_id not in neighbors
+
+    def test_records_snapshot_version(self):
+        """生成に使った版が記録される"""
+        cache = get_cache().snapshot()
+        game = generate_game('normal', 6, snapshot=cache)
+        assert game.version == cache.version
+
+    def test_route_deadline(self, monkeypatch, caplog):
+        """時間上限で打ち切ったら短いルートでゲームを作り、ログに残す"""
+        monkeypatch.setattr(settings, "route_deadline_ms", 1e-6)
+        monkeypatch.setattr(settings, "route_engine", "walk")
+        with caplog.at_level(logging.WARNING, logger="app.services.game_generator"):
+            game = generate_game('hard', 500)
+        assert 0 < len(game.route) < 500
+        assert len(game.distractors) == len(game.route) - 1
+        assert "timed out" in caplog.text
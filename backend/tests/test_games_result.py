@@ -294,3 +294,245 @@ class TestOverallRanking:
 
         assert data["my_rank"] >= 1
         assert isinstance(data["my_rank"], int)
+
+
+class TestLeaderboard:
+    """leaderboard テーブルへの反映と順位計算のテスト"""
+
+    def _play(self, client, base_score, user_name, target_length=5):
+        start_response = client.post(
+            "/api/v1/games/start",
+            json={"difficulty": "normal", "target_length": target_length}
+        )
+        game_id = start_response.json()["game_id"]
+        response = client.post(
+            f"/api/v1/games/{game_id}/result",
+            json={
+                "base_score": base_score,
+                "final_lives": 0,
+                "cleared_steps": target_length,
+                "user_name": user_name
+            }
+        )
+        assert response.status_code == 200
+        return game_id, response.json()
+
+    def _count(self, db_session, total_steps, score):
+        from sqlalchemy import text
+        return db_session.execute(
+            text("""
+                SELECT COALESCE(SUM(games), 0) FROM leaderboard_score_counts
+                WHERE total_steps = :total_steps AND score = :score
+            """),
+            {"total_steps": total_steps, "score": score}
+        ).scalar()
+
+    def test_unsubmitted_game_not_ranked(self, client, db_session):
+        """開始しただけのゲームはランキングに載らない"""
+        from sqlalchemy import text
+        start_response = client.post(
+            "/api/v1/games/start",
+            json={"difficulty": "normal", "target_length": 5}
+        )
+        game_id = start_response.json()["game_id"]
+        row = db_session.execute(
+            text("SELECT 1 FROM leaderboard WHERE game_id = :id"), {"id": game_id}
+        ).fetchone()
+        assert row is None
+
+    def test_result_is_recorded(self, client, db_session):
+        """結果送信で leaderboard とスコア分布に反映される"""
+        from sqlalchemy import text
+        before = self._count(db_session, 7, 321)
+        game_id, _ = self._play(client, 321, "Recorded", target_length=7)
+
+        row = db_session.execute(
+            text("SELECT total_steps, score, user_name FROM leaderboard WHERE game_id = :id"),
+            {"id": game_id}
+        ).fetchone()
+        assert (row.total_steps, row.score, row.user_name) == (7, 321, "Recorded")
+        assert self._count(db_session, 7, 321) == before + 1
+
+    def test_rank_counts_higher_scores(self, client, db_session):
+        """順位は同じ問題数で自分より高いスコアの件数 + 1"""
+        _, first = self._play(client, 900, "High", target_length=6)
+        _, second = self._play(client, 100, "Low", target_length=6)
+        assert second["my_rank"] == first["my_rank"] + 1
+        names = [r["user_name"] for r in second["rankings"]]
+        assert names.index("High") < names.index("Low")
+
+    def test_resubmit_moves_score(self, client, db_session):
+        """同じゲームを再送信すると旧スコアの件数が減る"""
+        game_id, _ = self._play(client, 400, "Again", target_length=5)
+        before_old = self._count(db_session, 5, 400)
+        client.post(
+            f"/api/v1/games/{game_id}/result",
+            json={"base_score": 600, "final_lives": 0, "cleared_steps": 5, "user_name": "Again"}
+        )
+        assert self._count(db_session, 5, 400) == before_old - 1
+        assert self._count(db_session, 5, 600) >= 1
+
+    def test_rename_updates_leaderboard(self, client, db_session):
+        """名前変更が leaderboard にも反映される"""
+        from sqlalchemy import text
+        game_id, _ = self._play(client, 500, "Before", target_length=5)
+        client.patch(f"/api/v1/games/{game_id}", json={"user_name": "After"})
+        name = db_session.execute(
+            text("SELECT user_name FROM leaderboard WHERE game_id = :id"), {"id": game_id}
+        ).scalar()
+        assert name == "After"
+
+    def test_delete_game_removes_entry(self, client, db_session):
+        """ゲーム削除で leaderboard の行と件数も消える"""
+        from sqlalchemy import text
+        game_id, _ = self._play(client, 777, "Deleted", target_length=8)
+        before = self._count(db_session, 8, 777)
+        db_session.execute(text("DELETE FROM games WHERE id = :id"), {"id": game_id})
+        assert self._count(db_session, 8, 777) == before - 1
+        row = db_session.execute(
+            text("SELECT 1 FROM leaderboard WHERE game_id = :id"), {"id": game_id}
+        ).fetchone()
+        assert row is None
+
+
+class TestPeriodRanking:
+    """GET /games/rankings/{period} エンドポイントのテスト"""
+
+    def _play(self, client, base_score, user_name, target_length=5):
+        start_response = client.post(
+            "/api/v1/games/start",
+            json={"difficulty": "normal", "target_length": target_length}
+        )
+        game_id = start_response.json()["game_id"]
+        client.post(
+            f"/api/v1/games/{game_id}/result",
+            json={
+                "base_score": base_score,
+                "final_lives": 0,
+                "cleared_steps": target_length,
+                "user_name": user_name
+            }
+        )
+        return game_id
+
+    @pytest.mark.parametrize("period", ["daily", "weekly", "monthly"])
+    def test_current_period_includes_new_result(self, client, db_session, period):
+        """今プレイした結果は全期間のランキングに載る"""
+        self._play(client, 700, "Periodic")
+        response = client.get(
+            f"/api/v1/games/rankings/{period}",
+            params={"my_score": 0}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["period"] == period
+        names = [r["user_name"] for r in data["rankings"]]
+        assert "Periodic" in names
+        assert data["my_rank"] >= 2
+
+    def test_total_steps_filter(self, client, db_session):
+        """問題数で絞り込める"""
+        self._play(client, 500, "Steps6", target_length=6)
+        self._play(client, 500, "Steps7", target_length=7)
+        response = client.get(
+            "/api/v1/games/rankings/daily",
+            params={"total_steps": 7}
+        )
+        names = [r["user_name"] for r in response.json()["rankings"]]
+        assert "Steps7" in names
+        assert "Steps6" not in names
+
+    def test_old_games_excluded(self, client, db_session):
+        """前の期間のゲームは今期のランキングに含まれない"""
+        from sqlalchemy import text
+        game_id = self._play(client, 900, "LongAgo")
+        db_session.execute(
+            text("""
+                UPDATE leaderboard_periods
+                SET period_start = period_start - 400
+                WHERE game_id = :id
+            """),
+            {"id": game_id}
+        )
+        response = client.get("/api/v1/games/rankings/monthly")
+        names = [r["user_name"] for r in response.json()["rankings"]]
+        assert "LongAgo" not in names
+
+    def test_rename_and_delete_follow(self, client, db_session):
+        """名前変更・削除が期間別ランキングにも反映される"""
+        from sqlalchemy import text
+        game_id = self._play(client, 650, "OldName")
+        client.patch(f"/api/v1/games/{game_id}", json={"user_name": "NewName"})
+        names = [
+            r["user_name"]
+            for r in client.get("/api/v1/games/rankings/weekly").json()["rankings"]
+        ]
+        assert "NewName" in names
+        assert "OldName" not in names
+
+        db_session.execute(text("DELETE FROM games WHERE id = :id"), {"id": game_id})
+        remaining = db_session.execute(
+            text("SELECT COUNT(*) FROM leaderboard_periods WHERE game_id = :id"),
+            {"id": game_id}
+        ).scalar()
+        assert remaining == 0
+
+    def _period_count_rows(self, db_session, game_id):
+        """ゲームの期間別スコア件数の行（ctid は行が書き換わると変わる）"""
+        from sqlalchemy import text
+        return db_session.execute(
+            text("""
+                SELECT c.period, c.score, c.games, c.ctid::text
+                FROM leaderboard_period_score_counts c
+                JOIN leaderboard_periods p USING (period, period_start, total_steps, score)
+                WHERE p.game_id = :id
+                ORDER BY c.period
+            """),
+            {"id": game_id}
+        ).fetchall()
+
+    def test_rename_keeps_period_counts(self, client, db_session):
+        """名前変更では期間別の件数を書き換えず、スコア変更では付け替える"""
+        game_id = self._play(client, 640, "Before")
+        before = self._period_count_rows(db_session, game_id)
+        assert len(before) == 3
+
+        client.patch(f"/api/v1/games/{game_id}", json={"user_name": "After"})
+        assert self._period_count_rows(db_session, game_id) == before
+
+        client.post(
+            f"/api/v1/games/{game_id}/result",
+            json={"base_score": 660, "final_lives": 0, "cleared_steps": 5, "user_name": "After"}
+        )
+        after = self._period_count_rows(db_session, game_id)
+        assert [row.score for row in after] == [660] * 3
+
+    def test_invalid_period(self, client, db_session):
+        """未知の期間は422"""
+        response = client.get("/api/v1/games/rankings/yearly")
+        assert response.status_code == 422
+
+    def test_period_start(self):
+        """期間の開始日は日本時間で区切る（週は月曜始まり）"""
+        from datetime import date, datetime, timezone
+        from app.routes.games import get_period_start
+
+        # 2025-03-05 (水) 16:00 UTC = 2025-03-06 (木) 01:00 JST
+        now = datetime(2025, 3, 5, 16, 0, tzinfo=timezone.utc)
+        assert get_period_start("daily", now) == date(2025, 3, 6)
+        assert get_period_start("weekly", now) == date(2025, 3, 3)
+        assert get_period_start("monthly", now) == date(2025, 3, 1)
+
+    @pytest.mark.parametrize("period", ["daily", "weekly", "monthly"])
+    def test_period_start_matches_db(self, db_session, period):
+        """アプリ側の区切りがDBの leaderboard_period_start() と一致する"""
+        from datetime import datetime, timezone
+        from sqlalchemy import text
+        from app.routes.games import get_period_start
+
+        now = datetime(2025, 12, 31, 15, 30, tzinfo=timezone.utc)
+        db_start = db_session.execute(
+            text("SELECT leaderboard_period_start(:period, :now)"),
+            {"period": period, "now": now}
+        ).scalar()
+        assert db_start == get_period_start(period, now)
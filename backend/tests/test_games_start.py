@@ -166,11 +166,11 @@ class TestGameStart:
 
     def test_game_start_no_terms_error(self, client, db_session, monkeypatch):
         """termがない場合は400エラー"""
-        def mock_generate_route(target_length, difficulty='hard', seed=None, max_start_retries=10, max_same_start_retries=10):
+        def mock_generate_route(target_length, difficulty='hard', seed=None, max_start_retries=10, max_same_start_retries=10, **kwargs):
             raise ValueError("No terms found with tier <= 1")
 
-        import app.routes.games
-        monkeypatch.setattr(app.routes.games, "generate_route", mock_generate_route)
+        import app.services.game_generator
+        monkeypatch.setattr(app.services.game_generator, "generate_route", mock_generate_route)
 
         response = client.post(
             "/api/v1/games/start",
@@ -179,3 +179,24 @@ class TestGameStart:
 
         assert response.status_code == 400
         assert "No terms found" in response.json()["detail"]
+
+    def test_game_start_target_length_too_long(self, client, db_session, monkeypatch):
+        """グラフ上作れない長さは生成を試さずに400"""
+        from app.services.cache import CacheSnapshot, RouteComponents
+
+        def fail_generate(*args, **kwargs):
+            raise AssertionError("generation should not run")
+
+        import app.services.game_generator
+        monkeypatch.setattr(app.services.game_generator, "generate_route", fail_generate)
+        monkeypatch.setattr(
+            CacheSnapshot, "get_route_components",
+            lambda self, difficulty: RouteComponents(component_of={}, max_path=(6,), pool=())
+        )
+
+        response = client.post(
+            "/api/v1/games/start",
+            json={"difficulty": "easy", "target_length": 10}
+        )
+        assert response.status_code == 400
+        assert "max 5" in response.json()["detail"]
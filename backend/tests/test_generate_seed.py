@@ -0,0 +1,151 @@
+"""seed.sql 生成スクリプト（database/scripts/generate_seed.py）のテスト
+
+- JSON配列の逐次読み込み（チャンク境界で値が切れても正しく読めるか）
+- 実データで json.load と同じ結果になるか
+- copy / batch 出力のエスケープ（DBに実際に流して元の値に戻るか）
+"""
+import importlib.util
+import io
+import json
+from pathlib import Path
+
+import pytest
+from sqlalchemy import text
+from tests.conftest import requires_db
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DATA_DIR = REPO_ROOT / "data"
+
+_spec = importlib.util.spec_from_file_location(
+    "generate_seed", REPO_ROOT / "database" / "scripts" / "generate_seed.py"
+)
+generate_seed = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(generate_seed)
+
+# 文字列・エスケープ・数値・入れ子・空白がチャンク境界をまたぐように選んだ値
+TRICKY_ITEMS = [
+    {"id": 1, "name": "縄文\t時代", "description": "line1\nline2 \\ back \"quoted\" é😀"},
+    {"id": 123456789, "tier": -2.5e-3, "flag": True, "none": None, "nested": {"a": [1, [2, {}]]}},
+    {"id": 3, "name": "", "description": "\\u0041 は A ではなく文字列"},
+]
+
+
+def _write(tmp_path, content: str) -> Path:
+    path = tmp_path / "data.json"
+    path.write_text(content, encoding="utf-8")
+    return path
+
+
+class TestJsonStream:
+    """JSON配列の逐次読み込み"""
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 7, 64])
+    def test_values_split_across_chunks(self, tmp_path, chunk_size):
+        content = json.dumps(
+            {"meta": {"skip": ["me", 1.5]}, "items": TRICKY_ITEMS, "after": 1},
+            ensure_ascii=False, indent=2,
+        )
+        path = _write(tmp_path, content)
+        items = list(generate_seed.iter_json_array(path, "items", chunk_size=chunk_size))
+        assert items == TRICKY_ITEMS
+
+    @pytest.mark.parametrize("chunk_size", [1, 4])
+    def test_number_at_chunk_end_is_not_truncated(self, chunk_size):
+        """バッファ末尾で切れた数値（12 | 345）を 12 と読まない"""
+        stream = generate_seed._JsonStream(io.StringIO("12345 , 6"), chunk_size)
+        assert stream.value() == 12345
+        stream.expect(",")
+        assert stream.value() == 6
+
+    @pytest.mark.parametrize("content", ['{"items": []}', '{ "items" : [ ] }', '{"other": [1], "items": []}'])
+    def test_empty_array(self, tmp_path, content):
+        path = _write(tmp_path, content)
+        assert list(generate_seed.iter_json_array(path, "items", chunk_size=3)) == []
+
+    @pytest.mark.parametrize("name", ["terms", "edges"])
+    @pytest.mark.parametrize("chunk_size", [97, generate_seed.READ_CHUNK_SIZE])
+    def test_matches_json_load_on_real_data(self, name, chunk_size):
+        path = DATA_DIR / f"{name}.json"
+        with open(path, encoding="utf-8") as f:
+            expected = json.load(f)[name]
+        assert list(generate_seed.iter_json_array(path, name, chunk_size=chunk_size)) == expected
+
+    def test_missing_key(self, tmp_path):
+        path = _write(tmp_path, '{"other": [1, 2]}')
+        with pytest.raises(KeyError):
+            list(generate_seed.iter_json_array(path, "items"))
+
+    @pytest.mark.parametrize("content", [
+        '{"items": [1, 2}',   # ] がない
+        '{"items": [1, 2',    # 途中で終わる
+        '["items"]',          # { がない
+        '{"items" [1]}',      # : がない
+    ])
+    def test_malformed(self, tmp_path, content):
+        path = _write(tmp_path, content)
+        with pytest.raises(ValueError):
+            list(generate_seed.iter_json_array(path, "items", chunk_size=2))
+
+
+TERMS = [
+    {"id": 1, "name": "Tab\there", "tier": 1, "category": "a\\b", "description": "line1\nline2"},
+    {"id": 2, "name": "It's", "tier": 2, "category": "c", "description": "cr\rend"},
+]
+EDGES = [
+    # term_a > term_b は入れ替える
+    {"id": 10, "term_a": 2, "term_b": 1, "difficulty": "easy", "keyword": "k\tw", "description": "back\\slash"},
+]
+
+
+class TestOutputFormats:
+    """copy / batch 出力"""
+
+    def test_copy_rows(self):
+        lines = list(generate_seed.generate_terms_copy(TERMS)) + list(generate_seed.generate_edges_copy(EDGES))
+        assert "1\tTab\\there\t1\ta\\\\b\tline1\\nline2" in lines
+        assert "2\tIt's\t2\tc\tcr\\rend" in lines
+        assert "10\t1\t2\teasy\tk\\tw\tback\\\\slash" in lines
+        assert lines.count("\\.") == 2
+
+    def test_batch_statements(self):
+        lines = list(generate_seed.generate_terms_batch_sql(TERMS, batch_size=1))
+        assert lines.count(f"INSERT INTO terms ({generate_seed.TERM_COLUMNS}) VALUES") == 2
+        assert "(2, 'It''s', 2, 'c', 'cr\rend');" in lines
+
+    @pytest.mark.parametrize("output_format", ["copy", "batch"])
+    def test_wrapped_in_transaction(self, output_format):
+        lines = list(generate_seed.generate_seed_lines(TERMS, EDGES, output_format))
+        assert lines[lines.index("BEGIN;"):].count("COMMIT;") == 1
+        assert "BEGIN;" not in generate_seed.generate_seed_lines(TERMS, EDGES, "insert")
+
+    @requires_db
+    @pytest.mark.parametrize("output_format", ["copy", "batch"])
+    def test_round_trip_through_postgres(self, db_session, output_format):
+        """出力をDBに流すと元の値（タブ・改行・バックスラッシュ・引用符を含む）に戻る"""
+        term_lines = list(generate_seed.generate_terms_copy(TERMS) if output_format == "copy"
+                          else generate_seed.generate_terms_batch_sql(TERMS, 1))
+        edge_lines = list(generate_seed.generate_edges_copy(EDGES) if output_format == "copy"
+                          else generate_seed.generate_edges_batch_sql(EDGES, 1))
+        db_session.execute(text("CREATE TEMP TABLE seed_terms (LIKE terms)"))
+        db_session.execute(text("CREATE TEMP TABLE seed_edges (LIKE edges)"))
+
+        cursor = db_session.connection().connection.cursor()
+        for table, lines in (("terms", term_lines), ("edges", edge_lines)):
+            sql = "\n".join(lines[2:])  # 見出しコメントを除く
+            if output_format == "copy":
+                header, rows = sql.split("\n", 1)
+                header = header.replace(f"COPY {table} ", f"COPY seed_{table} ")
+                cursor.copy_expert(header, io.StringIO(rows.rsplit("\\.", 1)[0]))
+            else:
+                cursor.execute(sql.replace(f"INSERT INTO {table} ", f"INSERT INTO seed_{table} "))
+
+        terms = db_session.execute(
+            text("SELECT id, name, tier, category, description FROM seed_terms ORDER BY id")
+        ).fetchall()
+        assert [tuple(row) for row in terms] == [
+            (t["id"], t["name"], t["tier"], t["category"], t["description"]) for t in TERMS
+        ]
+        edge = db_session.execute(
+            text("SELECT term_a, term_b, keyword, description FROM seed_edges")
+        ).one()
+        assert tuple(edge) == (1, 2, "k\tw", "back\\slash")
@@ -0,0 +1,103 @@
+"""生成ワーカープールのテスト"""
+import asyncio
+import threading
+
+import pytest
+
+from app.services.generation_executor import GenerationExecutor, GenerationOverloadedError
+from tests.conftest import requires_db
+
+
+class TestGenerationExecutor:
+    """GenerationExecutor のテスト"""
+
+    async def test_run_returns_result(self):
+        """ワーカースレッドで実行した結果を返す"""
+        executor = GenerationExecutor(max_workers=2, max_pending=4)
+        try:
+            caller = threading.get_ident()
+            result = await executor.run(lambda x, y=0: (x + y, threading.get_ident()), 1, y=2)
+            assert result[0] == 3
+            assert result[1] != caller
+            metrics = executor.metrics()
+            assert metrics["submitted"] == 1
+            assert metrics["completed"] == 1
+            assert metrics["running"] == 0
+            assert metrics["queued"] == 0
+        finally:
+            executor.shutdown()
+
+    async def test_exception_propagates(self):
+        """例外は呼び出し側に伝わり、失敗として数えられる"""
+        executor = GenerationExecutor(max_workers=1, max_pending=4)
+
+        def fail():
+            raise ValueError("boom")
+
+        try:
+            with pytest.raises(ValueError):
+                await executor.run(fail)
+            assert executor.metrics()["failed"] == 1
+        finally:
+            executor.shutdown()
+
+    async def test_rejects_when_queue_full(self):
+        """実行中 + 待機中が上限に達したら受け付けない"""
+        executor = GenerationExecutor(max_workers=1, max_pending=2)
+        release = threading.Event()
+        try:
+            running = asyncio.ensure_future(executor.run(release.wait, 5))
+            queued = asyncio.ensure_future(executor.run(release.wait, 5))
+            await asyncio.sleep(0.05)
+
+            metrics = executor.metrics()
+            assert metrics["running"] == 1
+            assert metrics["queued"] == 1
+
+            with pytest.raises(GenerationOverloadedError):
+                await executor.run(release.wait, 5)
+            assert executor.metrics()["rejected"] == 1
+
+            release.set()
+            await asyncio.gather(running, queued)
+            metrics = executor.metrics()
+            assert metrics["completed"] == 2
+            assert metrics["max_wait_ms"] > 0
+        finally:
+            release.set()
+            executor.shutdown()
+
+
+class TestGenerationMetricsEndpoint:
+    """GET /admin/metrics/generation のテスト"""
+
+    @requires_db
+    def test_metrics_endpoint(self, client, db_session, monkeypatch):
+        """管理者トークンでメトリクスを取得できる"""
+        monkeypatch.setenv("ADMIN_SECRET", "metrics-secret")
+        response = client.get(
+            "/admin/metrics/generation",
+            headers={"Authorization": "Bearer metrics-secret"},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        for key in ("running", "queued", "rejected", "avg_wait_ms", "max_workers"):
+            assert key in data
+
+    @requires_db
+    def test_start_game_busy_returns_503(self, client, db_session, monkeypatch):
+        """生成待ちが混雑していれば503"""
+        import app.routes.games
+
+        class BusyExecutor:
+            async def run(self, fn, *args, **kwargs):
+                raise GenerationOverloadedError("full")
+
+        class EmptyPool:
+            def take(self, difficulty, node_count, snapshot):
+                return None
+
+        monkeypatch.setattr(app.routes.games, "get_generation_executor", lambda: BusyExecutor())
+        monkeypatch.setattr(app.routes.games, "get_route_pool", lambda: EmptyPool())
+        response = client.post("/api/v1/games/start", json={"difficulty": "hard", "target_length": 5})
+        assert response.status_code == 503
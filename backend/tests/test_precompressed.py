@@ -0,0 +1,63 @@
+"""エンコード・圧縮済みレスポンスボディのテスト"""
+import gzip
+import json
+
+from app.services.precompressed import (
+    PrecompressedBody,
+    accepts_gzip,
+    etag_matches,
+    precompressed_response,
+)
+
+
+class TestPrecompressedBody:
+    """PrecompressedBody のテスト"""
+
+    def test_encode(self):
+        payload = PrecompressedBody.encode([{"name": "縄文時代"}])
+        assert json.loads(payload.body) == [{"name": "縄文時代"}]
+        assert gzip.decompress(payload.gzipped) == payload.body
+
+    def test_etag_depends_on_content_only(self):
+        """同じ内容なら同じETag（再読み込みやワーカーが違っても一致）"""
+        assert PrecompressedBody.encode([1, 2]).etag == PrecompressedBody.encode([1, 2]).etag
+        assert PrecompressedBody.encode([1, 2]).etag != PrecompressedBody.encode([2, 1]).etag
+
+    def test_etag_per_encoding(self):
+        """gzip 版と無圧縮版はバイト列が違うので別のETag"""
+        payload = PrecompressedBody.encode([1, 2])
+        plain = precompressed_response(payload, None, None)
+        gzipped = precompressed_response(payload, None, "gzip")
+        assert plain.headers["etag"] == payload.etag
+        assert gzipped.headers["etag"] == payload.gzip_etag != payload.etag
+        assert gzipped.headers["content-encoding"] == "gzip"
+        assert gzipped.headers["vary"] == "Accept-Encoding"
+
+        assert precompressed_response(payload, payload.gzip_etag, "gzip").status_code == 304
+        assert precompressed_response(payload, payload.etag, None).status_code == 304
+        # 別の表現のタグでは304にしない
+        assert precompressed_response(payload, payload.etag, "gzip").status_code == 200
+        assert precompressed_response(payload, payload.gzip_etag, None).status_code == 200
+
+
+class TestHeaders:
+    """条件付きGET・Accept-Encoding の解釈"""
+
+    def test_etag_matches(self):
+        etag = '"abc"'
+        assert etag_matches('"abc"', etag)
+        assert etag_matches('W/"abc"', etag)
+        assert etag_matches('"x", "abc"', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"x"', etag)
+        assert not etag_matches(None, etag)
+
+    def test_accepts_gzip(self):
+        assert accepts_gzip("gzip, deflate, br")
+        assert accepts_gzip("br;q=1.0, gzip;q=0.8")
+        assert not accepts_gzip("gzip;q=0")
+        # 不正な q 値は受け付けない扱い（500 にしない）
+        assert not accepts_gzip("gzip;q=abc")
+        assert not accepts_gzip("*;q=1e")
+        assert not accepts_gzip("identity")
+        assert not accepts_gzip(None)
@@ -0,0 +1,452 @@
+"""ランキングのメモリ内インデックスのテスト"""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+import app.services.rank_index
+from app.database import SessionLocal
+from app.services.rank_index import RankEntry, RankIndex, _Board, _ScoreCounts, _TxSnapshot
+from tests.conftest import requires_db
+
+BASE_TIME = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _loaded_index(capacity=3) -> RankIndex:
+    """DBを読まずに空の状態で使えるインデックス"""
+    index = RankIndex(capacity=capacity)
+    index._boards = {}
+    index._board(None)
+    return index
+
+
+def _record(index, game_id, score, total_steps=10, minutes=0, previous_score=None):
+    index.record(
+        game_id,
+        total_steps=total_steps,
+        score=score,
+        cleared_steps=total_steps,
+        user_name=f"P{game_id}",
+        created_at=BASE_TIME + timedelta(minutes=minutes),
+        previous_score=previous_score
+    )
+
+
+class TestScoreCounts:
+    """Fenwick 木のテスト"""
+
+    def test_count_greater(self):
+        counts = _ScoreCounts(capacity=16)
+        for score in (0, 5, 5, 9, 15):
+            counts.add(score)
+        assert counts.count_greater(5) == 2
+        assert counts.count_greater(-1) == 5
+        assert counts.count_greater(15) == 0
+        assert counts.count_at(5) == 2
+
+    def test_grows_beyond_capacity(self):
+        """上限を超えるスコアも数えられる（既存の件数は保たれる）"""
+        counts = _ScoreCounts(capacity=8)
+        counts.add(3)
+        counts.add(100)
+        assert counts.count_at(3) == 1
+        assert counts.count_greater(50) == 1
+        assert counts.total == 2
+
+
+class TestRankIndex:
+    """RankIndex のテスト"""
+
+    def test_not_loaded(self):
+        """読み込み前はNone（呼び出し側でDBから取得）"""
+        index = RankIndex(capacity=3)
+        assert index.rank(100) is None
+        assert index.top(3) is None
+        _record(index, "a", 100)  # 読み込み前の更新は無視される
+        assert not index.ready
+
+    def test_rank_and_top(self):
+        index = _loaded_index()
+        _record(index, "a", 300)
+        _record(index, "b", 500)
+        _record(index, "c", 100, total_steps=5)
+
+        assert index.rank(400, total_steps=10) == 2
+        assert index.rank(400) == 2
+        assert index.rank(50, total_steps=5) == 2
+        assert index.rank(999, total_steps=20) == 1
+        assert [e.game_id for e in index.top(10, total_steps=10)] == ["b", "a"]
+        assert [e.game_id for e in index.top(10)] == ["b", "a", "c"]
+        assert index.top(10, total_steps=20) == []
+
+    def test_ties_newest_first(self):
+        """同点は新しい順（DBの ORDER BY score DESC, created_at DESC と同じ）"""
+        index = _loaded_index()
+        _record(index, "old", 200, minutes=0)
+        _record(index, "new", 200, minutes=5)
+        assert [e.game_id for e in index.top(2)] == ["new", "old"]
+
+    def test_resubmit_moves_score(self):
+        index = _loaded_index()
+        _record(index, "a", 300)
+        _record(index, "b", 200)
+        _record(index, "b", 400, previous_score=200)
+        assert index.rank(300) == 2
+        assert [e.score for e in index.top(3)] == [400, 300]
+
+    def test_rename(self):
+        index = _loaded_index()
+        _record(index, "a", 300)
+        index.rename("a", 10, "Renamed")
+        assert index.top(1)[0].user_name == "Renamed"
+        assert index.top(1, total_steps=10)[0].user_name == "Renamed"
+
+    def test_window_exhausted_returns_none(self):
+        """上位から外れていた行が保持分を下回ったら top は None"""
+        index = _loaded_index(capacity=2)
+        for i, score in enumerate((500, 400, 300)):
+            _record(index, str(i), score)
+        assert [e.score for e in index.top(2)] == [500, 400]
+
+        index.remove("0", 10, 500)
+        # 400 の次（300）は保持していないので2件目がわからない
+        assert index.top(2) is None
+        assert [e.score for e in index.top(1)] == [400]
+        assert index.rank(350) == 2
+
+    def test_record_same_game_twice_counts_once(self):
+        """上位に保持しているゲームは previous_score がなくても置き換える"""
+        index = _loaded_index()
+        _record(index, "a", 300)
+        _record(index, "a", 400)
+        assert [(e.game_id, e.score) for e in index.top(3)] == [("a", 400)]
+        assert index.rank(0) == 2
+        assert index.rank(350) == 2
+
+    def test_low_score_outside_window_not_held(self):
+        """保持分の外にある低いスコアは上位に入れず件数だけ数える"""
+        index = _loaded_index(capacity=1)
+        _record(index, "a", 500)
+        _record(index, "b", 100)
+        _record(index, "c", 50)
+        index.remove("a", 10, 500)
+        assert index.top(1) is None
+        assert index.rank(75) == 2
+
+
+class TestTxSnapshot:
+    """トランザクションIDがスナップショットから見えるか"""
+
+    def test_contains(self):
+        snapshot = _TxSnapshot.parse("100:105:102,104")
+        assert snapshot.contains(99)
+        assert snapshot.contains(101)
+        assert not snapshot.contains(102)
+        assert not snapshot.contains(104)
+        assert not snapshot.contains(105)
+
+    def test_no_in_progress(self):
+        snapshot = _TxSnapshot.parse("100:100:")
+        assert snapshot.xip == frozenset()
+        assert snapshot.contains(99)
+        assert not snapshot.contains(100)
+
+
+class _FakeSession:
+    """load_from_db が読み込み以外に使うメソッドだけ持つセッション"""
+
+    # pg_current_snapshot(): xid 100 未満と 100..104 のうち 102 以外がコミット済み
+    snapshot = "100:105:102"
+
+    def connection(self, **kwargs):
+        pass
+
+    def execute(self, statement):
+        return self
+
+    def scalar(self):
+        return self.snapshot
+
+    def close(self):
+        pass
+
+
+def _snapshot_boards(index, *entries):
+    """entries（total_steps=10）を読み込んだ結果のランキング"""
+    boards = {None: _Board(index.capacity), 10: _Board(index.capacity)}
+    for entry in entries:
+        for board in boards.values():
+            board.counts.add(entry.score)
+            board.load_top(entry)
+    return boards
+
+
+class TestReloadDuringUpdates:
+    """読み直しの最中に届いた更新を失わず、二重にも数えない"""
+
+    def _reload(self, monkeypatch, index, boards, ranked, during_read):
+        """DBを読んでいる途中で during_read を呼んでから差し替える"""
+        monkeypatch.setattr(app.services.rank_index, "SessionLocal", _FakeSession)
+
+        def read_boards(db):
+            during_read()
+            return boards
+
+        index._read_boards = read_boards
+        index._read_ranked = lambda db, game_ids: {g: ranked.get(g) for g in game_ids}
+        index.load_from_db()
+
+    def test_record_after_snapshot_is_kept(self, monkeypatch):
+        """読み込み結果に含まれない結果送信は差し替え後も残る"""
+        index = _loaded_index()
+        _record(index, "a", 300)
+        boards = _snapshot_boards(index, RankEntry("a", 300, 10, "Pa", BASE_TIME))
+
+        self._reload(monkeypatch, index, boards, {}, lambda: _record(index, "b", 500))
+
+        assert [e.game_id for e in index.top(3)] == ["b", "a"]
+        assert index.rank(400, total_steps=10) == 2
+        assert index._journal is None
+
+    def test_record_already_in_snapshot_not_doubled(self, monkeypatch):
+        """読み込み結果に既に含まれていた結果送信は1件として数える"""
+        index = _loaded_index()
+        entry = RankEntry("a", 300, 10, "Pa", BASE_TIME)
+        boards = _snapshot_boards(index, entry)
+
+        self._reload(
+            monkeypatch, index, boards, {"a": (10, 300)}, lambda: _record(index, "a", 300)
+        )
+
+        assert [e.game_id for e in index.top(3)] == ["a"]
+        assert index.rank(0) == 2
+
+    def test_resubmit_replaces_snapshot_score(self, monkeypatch):
+        """読み込み結果の旧スコアは新しいスコアに置き換わる"""
+        index = _loaded_index()
+        _record(index, "a", 300)
+        _record(index, "b", 200)
+        boards = _snapshot_boards(
+            index,
+            RankEntry("a", 300, 10, "Pa", BASE_TIME),
+            RankEntry("b", 200, 10, "Pb", BASE_TIME),
+        )
+
+        self._reload(
+            monkeypatch, index, boards, {"b": (10, 200)},
+            lambda: _record(index, "b", 400, previous_score=200)
+        )
+
+        assert [e.score for e in index.top(3)] == [400, 300]
+        assert index.rank(250) == 3
+        assert index.rank(0) == 3
+
+    def test_remove_and_rename(self, monkeypatch):
+        """削除・名前変更も差し替え後に反映される"""
+        index = _loaded_index()
+        _record(index, "a", 300)
+        _record(index, "b", 200)
+        boards = _snapshot_boards(
+            index,
+            RankEntry("a", 300, 10, "Pa", BASE_TIME),
+            RankEntry("b", 200, 10, "Pb", BASE_TIME),
+        )
+
+        def during_read():
+            index.remove("a", 10, 300)
+            index.rename("b", 10, "Renamed")
+
+        self._reload(monkeypatch, index, boards, {"a": (10, 300)}, during_read)
+
+        assert [(e.game_id, e.user_name) for e in index.top(3)] == [("b", "Renamed")]
+        assert index.rank(0) == 2
+
+    def test_rename_after_record_keeps_new_name(self, monkeypatch):
+        """読み込み中に送信してから名前を変えた場合は変更後の名前"""
+        index = _loaded_index()
+        boards = _snapshot_boards(index)
+
+        def during_read():
+            _record(index, "a", 300)
+            index.rename("a", 10, "Renamed")
+
+        self._reload(monkeypatch, index, boards, {}, during_read)
+
+        assert index.top(1)[0].user_name == "Renamed"
+        assert index.top(1, total_steps=10)[0].user_name == "Renamed"
+
+    def test_record_after_swap_already_loaded(self, monkeypatch):
+        """読み込む前にコミットされ、差し替えた後に届いた結果送信は二重に数えない"""
+        index = _loaded_index()
+        entry = RankEntry("a", 300, 10, "Pa", BASE_TIME)
+        self._reload(monkeypatch, index, _snapshot_boards(index, entry), {}, lambda: None)
+
+        index.record("a", 10, 300, 10, "Pa", BASE_TIME, xid=101)
+        index.remove("a", 10, 300, xid=103)
+
+        assert [e.game_id for e in index.top(3)] == ["a"]
+        assert index.rank(0) == 2
+
+    def test_record_after_swap_not_loaded(self, monkeypatch):
+        """読み込んだ後（または読み込み時に未コミット）の結果送信は反映する"""
+        index = _loaded_index()
+        entry = RankEntry("a", 300, 10, "Pa", BASE_TIME)
+        self._reload(monkeypatch, index, _snapshot_boards(index, entry), {}, lambda: None)
+
+        index.record("b", 10, 500, 10, "Pb", BASE_TIME, xid=102)
+        index.record("c", 10, 400, 10, "Pc", BASE_TIME, xid=105)
+        index.remove("a", 10, 300, xid=106)
+
+        assert [e.game_id for e in index.top(3)] == ["b", "c"]
+        assert index.rank(0) == 3
+
+    def test_failed_reload_stops_journal(self, monkeypatch):
+        """読み込みに失敗しても控えは残らず、今のランキングはそのまま"""
+        index = _loaded_index()
+        _record(index, "a", 300)
+
+        def during_read():
+            raise RuntimeError("db down")
+
+        with pytest.raises(RuntimeError):
+            self._reload(monkeypatch, index, None, {}, during_read)
+
+        assert index._journal is None
+        _record(index, "b", 500)
+        assert [e.game_id for e in index.top(3)] == ["b", "a"]
+
+
+class TestRankIndexLoad:
+    """DBからの読み込み"""
+
+    @requires_db
+    def test_load_from_db(self):
+        """コミット済みの leaderboard を読み込める"""
+        index = RankIndex(capacity=5)
+        index.load_from_db()
+        assert index.ready
+        assert index.rank(0) >= 1
+        assert index.top(5) is not None
+
+    @requires_db
+    def test_record_during_load_from_db(self):
+        """DBを読んでいる間に届いた結果送信は差し替え後も残る"""
+        index = RankIndex(capacity=5)
+        game_id = str(uuid.uuid4())
+        read_boards = index._read_boards
+
+        def read_then_record(db):
+            boards = read_boards(db)
+            index.record(
+                game_id, total_steps=7, score=10 ** 6, cleared_steps=7,
+                user_name="DuringLoad", created_at=BASE_TIME
+            )
+            return boards
+
+        index._read_boards = read_then_record
+        index.load_from_db()
+
+        assert index.top(1)[0].game_id == game_id
+        assert index.top(1, total_steps=7)[0].game_id == game_id
+        assert index.rank(10 ** 6 - 1, total_steps=7) == 2
+
+
+class TestRankingsEndpointFallback:
+    """インデックスが使えない場合はDBから取得する"""
+
+    def test_overall_ranking_without_index(self, client, db_session, monkeypatch):
+        import app.routes.games
+
+        monkeypatch.setattr(app.routes.games, "get_rank_index", lambda: RankIndex(capacity=3))
+        start_response = client.post(
+            "/api/v1/games/start",
+            json={"difficulty": "normal", "target_length": 5}
+        )
+        game_id = start_response.json()["game_id"]
+        client.post(
+            f"/api/v1/games/{game_id}/result",
+            json={"base_score": 800, "final_lives": 3, "cleared_steps": 5, "user_name": "FromDB"}
+        )
+
+        response = client.get("/api/v1/games/rankings/overall", params={"my_score": 0})
+        assert response.status_code == 200
+        names = [r["user_name"] for r in response.json()["rankings"]]
+        assert "FromDB" in names
+
+
+ADMIN_SECRET = "test-admin-secret-for-testing"
+
+
+class _ReloadFirst(RankIndex):
+    """結果送信・削除のコミット後、反映する前にDBから読み直すインデックス"""
+
+    def record(self, *args, **kwargs):
+        self.load_from_db()
+        super().record(*args, **kwargs)
+
+    def remove(self, *args, **kwargs):
+        self.load_from_db()
+        super().remove(*args, **kwargs)
+
+
+def _leaderboard_games(total_steps: int) -> int:
+    db = SessionLocal()
+    try:
+        return db.execute(
+            text("SELECT count(*) FROM leaderboard WHERE total_steps = :steps"),
+            {"steps": total_steps}
+        ).scalar()
+    finally:
+        db.close()
+
+
+@requires_db
+class TestReloadBetweenCommitAndRecord:
+    """コミットと record() / remove() の間に読み直しが入っても二重に反映しない"""
+
+    def test_submit_resubmit_and_delete(self, real_db_client, monkeypatch):
+        import app.routes.admin
+        import app.routes.games
+
+        index = _ReloadFirst(capacity=10_000)
+        index.load_from_db()
+        monkeypatch.setattr(app.routes.games, "get_rank_index", lambda: index)
+        monkeypatch.setattr(app.routes.admin, "get_rank_index", lambda: index)
+        monkeypatch.setenv("ADMIN_SECRET", ADMIN_SECRET)
+
+        start = real_db_client.post(
+            "/api/v1/games/start", json={"difficulty": "normal", "target_length": 5}
+        )
+        game_id = start.json()["game_id"]
+        try:
+            for base_score in (500, 800):
+                response = real_db_client.post(
+                    f"/api/v1/games/{game_id}/result",
+                    json={
+                        "base_score": base_score, "final_lives": 3,
+                        "cleared_steps": 4, "user_name": "Reloaded"
+                    }
+                )
+                assert response.status_code == 200
+                total_steps = response.json()["total_steps"]
+
+                games = _leaderboard_games(total_steps)
+                assert index.rank(-1, total_steps=total_steps) == games + 1
+                top_ids = [e.game_id for e in index.top(games, total_steps=total_steps)]
+                assert top_ids.count(game_id) == 1
+
+            response = real_db_client.delete(
+                f"/admin/games/{game_id}",
+                headers={"Authorization": f"Bearer {ADMIN_SECRET}"}
+            )
+            assert response.status_code == 200
+            games = _leaderboard_games(total_steps)
+            assert index.rank(-1, total_steps=total_steps) == games + 1
+        finally:
+            db = SessionLocal()
+            try:
+                db.execute(text("DELETE FROM games WHERE id = :id"), {"id": game_id})
+                db.commit()
+            finally:
+                db.close()
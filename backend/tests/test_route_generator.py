@@ -11,17 +11,34 @@
 - キャッシュからデータ取得
 """
 
+import logging
+import random
+
 import pytest
 from hypothesis import given, strategies as st, settings, HealthCheck
 from app.services.route_generator import (
+    DEADLINE_CHECK_INTERVAL,
+    RouteStats,
     generate_route,
+    _backtracking_search,
     _random_walk,
     _try_from_start,
     count_unvisited_neighbors,
     select_random_start,
     get_difficulty_filter,
 )
-from app.services.cache import get_cache
+from app.services.cache import CacheSnapshot, Edge, Term, get_cache
+
+
+def _easy_snapshot(pairs) -> CacheSnapshot:
+    """Tier1 + easyエッジだけの小さなグラフ"""
+    ids = sorted({i for pair in pairs for i in pair})
+    terms = {i: Term(id=i, name=str(i), tier=1, category="test", description="") for i in ids}
+    edges = {
+        n: Edge(id=n, term_a=min(a, b), term_b=max(a, b), difficulty="easy", keyword="", description="")
+        for n, (a, b) in enumerate(pairs, start=1)
+    }
+    return CacheSnapshot(terms, edges)
 
 
 class TestDifficultyFilter:
@@ -209,3 +226,197 @@ class TestMultipleStarts:
         assert len(route) > 0
         assert route[0] == start_id
         assert len(route) == len(set(route))  # 重複なし
+
+
+class TestBacktrackingSearch:
+    """深さ優先探索（engine='backtrack'）のテスト"""
+
+    # 1 から 2→4→5→6→7 と続く道と、3→8→9 で行き止まる枝
+    DECOY_GRAPH = [(1, 2), (1, 3), (2, 4), (4, 5), (5, 6), (6, 7), (3, 8), (8, 9)]
+
+    def test_backtracks_out_of_decoy_branch(self):
+        """行き止まりの枝に入っても戻って目標長のルートを見つける"""
+        snapshot = _easy_snapshot(self.DECOY_GRAPH)
+        for seed in range(20):
+            route = _backtracking_search(
+                1, 6, 'easy', rng=random.Random(seed), snapshot=snapshot
+            )
+            assert route == [1, 2, 4, 5, 6, 7]
+
+    def test_returns_longest_when_impossible(self):
+        snapshot = _easy_snapshot(self.DECOY_GRAPH)
+        route = _backtracking_search(1, 20, 'easy', rng=random.Random(0), snapshot=snapshot)
+        assert route == [1, 2, 4, 5, 6, 7]
+
+    def test_expansion_budget(self):
+        """展開の上限に達したらそこまでの最長ルートを返す"""
+        snapshot = _easy_snapshot(self.DECOY_GRAPH)
+        assert _backtracking_search(1, 6, 'easy', snapshot=snapshot, max_expansions=0) == [1]
+        route = _backtracking_search(1, 6, 'easy', snapshot=snapshot, max_expansions=2)
+        assert len(route) == 3
+
+    @pytest.mark.parametrize("difficulty", ["easy", "normal", "hard"])
+    def test_generate_route_backtrack(self, difficulty, db_session):
+        """実データで目標長の単純パスを返し、シードで再現できる"""
+        first = generate_route(31, difficulty, seed=7, engine='backtrack')
+        assert len(first) == 31
+        assert len(set(first)) == 31
+        cache = get_cache()
+        assert all(cache.get_edge(a, b) is not None for a, b in zip(first, first[1:]))
+        assert generate_route(31, difficulty, seed=7, engine='backtrack') == first
+
+    def test_unknown_engine(self):
+        with pytest.raises(ValueError):
+            generate_route(5, 'hard', engine='unknown')
+
+
+class TestFeasibility:
+    """連結成分による目標長の判定"""
+
+    # 1-2 と 10-11-12-13（道）
+    GRAPH = [(1, 2), (10, 11), (11, 12), (12, 13)]
+
+    @pytest.mark.parametrize("engine", ["walk", "backtrack"])
+    def test_starts_only_where_target_fits(self, engine):
+        snapshot = _easy_snapshot(self.GRAPH)
+        for seed in range(20):
+            route = generate_route(3, 'easy', seed=seed, snapshot=snapshot, engine=engine)
+            assert len(route) == 3
+            assert set(route) <= {10, 11, 12, 13}
+
+    def test_downgrades_impossible_target(self):
+        """どの成分にも入らない長さは入りうる最長に下げる"""
+        snapshot = _easy_snapshot(self.GRAPH)
+        route = generate_route(50, 'easy', seed=1, snapshot=snapshot, engine='backtrack')
+        assert route in ([10, 11, 12, 13], [13, 12, 11, 10])
+
+    def test_downgrade_is_not_reported_as_met(self, caplog):
+        """下げた長さに届いても、要求された長さには届いていないと報告する"""
+        snapshot = _easy_snapshot(self.GRAPH)
+        stats = RouteStats()
+        with caplog.at_level(logging.WARNING, logger="app.services.route_generator"):
+            route = generate_route(50, 'easy', seed=1, snapshot=snapshot, stats=stats)
+        assert len(route) == 4
+        assert stats.target_length == 50
+        assert stats.search_length == 4
+        assert not stats.target_met
+        assert "too long" in caplog.text
+
+        generate_route(3, 'easy', seed=1, snapshot=snapshot, stats=stats)
+        assert (stats.target_length, stats.search_length, stats.target_met) == (3, 3, True)
+
+
+class TestLookahead:
+    """先読み（lookahead_depth）のテスト"""
+
+    # 1 から 2→3 で行き止まる袋小路と、4→5→6→7→8 と続く道
+    POCKET_GRAPH = [(1, 2), (2, 3), (1, 4), (4, 5), (5, 6), (6, 7), (7, 8)]
+
+    def test_depth_one_enters_pocket(self):
+        """1手先だけでは袋小路の入口（行き止まりではない）を避けられない"""
+        snapshot = _easy_snapshot(self.POCKET_GRAPH)
+        routes = [
+            _random_walk(1, 6, 'easy', rng=random.Random(seed), snapshot=snapshot)
+            for seed in range(20)
+        ]
+        assert [1, 2, 3] in routes
+
+    @pytest.mark.parametrize("depth", [2, 3, 8])
+    def test_deeper_lookahead_avoids_pocket(self, depth):
+        snapshot = _easy_snapshot(self.POCKET_GRAPH)
+        for seed in range(20):
+            route = _random_walk(
+                1, 6, 'easy', rng=random.Random(seed), snapshot=snapshot, lookahead_depth=depth
+            )
+            assert route == [1, 4, 5, 6, 7, 8]
+
+    def test_pocket_tried_last_in_backtrack(self):
+        """backtrack では袋小路を後回しにするので展開は目標までの5回で済む"""
+        snapshot = _easy_snapshot(self.POCKET_GRAPH)
+        for seed in range(20):
+            stats = RouteStats()
+            route = _backtracking_search(
+                1, 6, 'easy', rng=random.Random(seed), snapshot=snapshot,
+                lookahead_depth=2, stats=stats
+            )
+            assert route == [1, 4, 5, 6, 7, 8]
+            assert stats.expansions == 5
+
+    @pytest.mark.parametrize("engine", ["walk", "backtrack"])
+    def test_default_depth_unchanged(self, engine, db_session):
+        """lookahead_depth=1 は省略時と同じルート"""
+        for seed in range(5):
+            assert generate_route(31, 'normal', seed=seed, engine=engine, lookahead_depth=1) == \
+                generate_route(31, 'normal', seed=seed, engine=engine)
+
+    @pytest.mark.parametrize("difficulty", ["easy", "normal", "hard"])
+    def test_fewer_walks_with_deeper_lookahead(self, difficulty, db_session):
+        """実データで、深い先読みはウォークのやり直しを減らす"""
+        walks = {}
+        for depth in (1, 4):
+            stats = RouteStats()
+            for seed in range(30):
+                route = generate_route(
+                    31, difficulty, seed=seed, max_same_start_retries=50,
+                    lookahead_depth=depth, stats=stats
+                )
+                assert len(route) == 31
+            assert stats.starts >= 30
+            assert stats.expansions >= 30 * 30
+            walks[depth] = stats.walks
+        assert walks[4] < walks[1]
+
+    def test_invalid_depth(self):
+        with pytest.raises(ValueError):
+            generate_route(5, 'hard', lookahead_depth=0)
+
+
+class TestDeadline:
+    """時間上限（deadline_ms）のテスト"""
+
+    # 0 を共有する3つの三角形。連結成分の上限は7だが、最長の単純パスは5
+    TRIANGLES = [(0, 1), (1, 2), (2, 0), (0, 3), (3, 4), (4, 0), (0, 5), (5, 6), (6, 0)]
+
+    def test_stats_when_target_met(self, db_session):
+        stats = RouteStats()
+        route = generate_route(11, 'normal', seed=3, stats=stats, deadline_ms=10_000)
+        assert len(route) == 11
+        assert stats.target_met
+        assert not stats.timed_out
+        assert stats.elapsed_ms > 0
+
+    def test_exhausts_retries_without_deadline(self):
+        snapshot = _easy_snapshot(self.TRIANGLES)
+        stats = RouteStats()
+        route = generate_route(7, 'easy', seed=0, snapshot=snapshot, stats=stats)
+        assert len(route) == 5
+        assert stats.starts == 10
+        assert not stats.target_met
+        assert not stats.timed_out
+
+    @pytest.mark.parametrize("engine", ["walk", "backtrack"])
+    def test_expired_deadline_returns_best_effort(self, engine):
+        """期限切れでも最初のスタートは試し、それまでの最長ルートを返す"""
+        snapshot = _easy_snapshot(self.TRIANGLES)
+        stats = RouteStats()
+        route = generate_route(
+            7, 'easy', seed=0, snapshot=snapshot, engine=engine,
+            max_same_start_retries=50, stats=stats, deadline_ms=0
+        )
+        assert 2 <= len(route) <= 5
+        assert stats.starts == 1
+        assert stats.walks == (1 if engine == 'walk' else 0)
+        assert stats.timed_out
+        assert not stats.target_met
+
+    def test_backtrack_checks_deadline_periodically(self, db_session):
+        """backtrack は展開 DEADLINE_CHECK_INTERVAL 回ごとに期限を見る"""
+        snapshot = get_cache().snapshot()
+        start = select_random_start('hard', seed=0, snapshot=snapshot)
+        stats = RouteStats()
+        route = _backtracking_search(
+            start, 10 ** 6, 'hard', rng=random.Random(0), snapshot=snapshot,
+            max_expansions=None, stats=stats, deadline=0.0
+        )
+        assert stats.expansions == DEADLINE_CHECK_INTERVAL
+        assert 1 < len(route) <= DEADLINE_CHECK_INTERVAL + 1
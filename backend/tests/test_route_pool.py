@@ -0,0 +1,190 @@
+"""ゲーム事前生成プールのテスト"""
+import asyncio
+
+import pytest
+
+import app.services.route_pool as route_pool
+from app.services.cache import Term, get_cache
+from app.services.game_generator import GeneratedGame
+from app.services.generation_executor import GenerationExecutor, GenerationOverloadedError
+from app.services.route_pool import RoutePool
+
+
+class TestRoutePool:
+    """RoutePool のテスト"""
+
+    def test_take_empty_registers_demand(self):
+        """空のプールはNoneを返し、要求キーを補充対象に登録する"""
+        pool = RoutePool(watermark=2)
+        cache = get_cache().snapshot()
+        assert pool.take('normal', 11, cache) is None
+
+        produced = pool.refill()
+        assert produced == 2
+        assert pool.size('normal', 11) == 2
+
+    def test_take_returns_generated_game(self):
+        """補充済みのゲームを取り出せ、取り出すと減る"""
+        pool = RoutePool(watermark=2)
+        cache = get_cache().snapshot()
+        pool.take('hard', 6, cache)
+        pool.refill()
+
+        game = pool.take('hard', 6, cache)
+        assert game is not None
+        assert len(game.route) == 6
+        assert len(game.distractors) == 5
+        assert pool.size('hard', 6) == 1
+
+    def test_refill_only_up_to_watermark(self):
+        """watermarkを超えて生成しない"""
+        pool = RoutePool(watermark=3)
+        pool.take('easy', 6, get_cache().snapshot())
+        pool.refill()
+        assert pool.refill() == 0
+        assert pool.size('easy', 6) == 3
+
+    @pytest.mark.usefixtures("restore_cache")
+    def test_stale_version_discarded(self):
+        """キャッシュの版が変わると古い生成結果は使わない"""
+        pool = RoutePool(watermark=2)
+        pool.take('normal', 6, get_cache().snapshot())
+        pool.refill()
+
+        get_cache().upsert_term(Term(id=-9001, name="版変更", tier=1, category="test", description=""))
+        new_snapshot = get_cache().snapshot()
+        assert pool.take('normal', 6, new_snapshot) is None
+
+        pool.refill()
+        game = pool.take('normal', 6, new_snapshot)
+        assert game is not None
+        assert game.version == new_snapshot.version
+
+    def test_disabled_pool(self):
+        """watermark=0なら何も貯めない"""
+        pool = RoutePool(watermark=0)
+        assert pool.take('normal', 11, get_cache().snapshot()) is None
+        assert pool.refill() == 0
+
+    def test_refill_limit(self):
+        """limit 件生成したら戻る（生成ワーカーに1件ずつ投げるため）"""
+        pool = RoutePool(watermark=3)
+        pool.take('easy', 6, get_cache().snapshot())
+        assert pool.refill(limit=1) == 1
+        assert pool.size('easy', 6) == 1
+
+    def test_short_routes_not_pooled(self, monkeypatch):
+        """目標長に届かなかったゲーム（時間切れなど）は貯めない"""
+        snapshot = get_cache().snapshot()
+        short = GeneratedGame(version=snapshot.version, route=[1, 2], distractors=[[]])
+        monkeypatch.setattr(route_pool, "generate_game", lambda *args, **kwargs: short)
+
+        pool = RoutePool(watermark=2)
+        pool.take('normal', 6, snapshot)
+        assert pool.refill() == 0
+        assert pool.size('normal', 6) == 0
+        assert pool.take('normal', 6, snapshot) is None
+
+    def test_failed_key_skipped_for_cycle(self, monkeypatch):
+        """生成に失敗したキーはその周期の間は飛ばし、他のキーの補充を先に進める"""
+        snapshot = get_cache().snapshot()
+        attempts = []
+
+        def fake_generate(difficulty, node_count, snapshot):
+            attempts.append(difficulty)
+            if difficulty == 'hard':
+                return GeneratedGame(version=snapshot.version, route=[1, 2], distractors=[[]])
+            return GeneratedGame(
+                version=snapshot.version, route=list(range(node_count)), distractors=[]
+            )
+
+        monkeypatch.setattr(route_pool, "generate_game", fake_generate)
+        pool = RoutePool(watermark=2)
+        pool.take('hard', 6, snapshot)
+        pool.take('easy', 6, snapshot)
+
+        # 補充ループと同じく1件ずつ呼ぶ
+        while pool.refill(limit=1):
+            pass
+        assert pool.size('easy', 6) == 2
+        assert pool.refill() == 0
+        assert attempts.count('hard') == 1
+
+        pool.start_cycle()
+        assert pool.refill() == 0
+        assert attempts.count('hard') == 2
+
+    def test_clear(self):
+        """clearで保持分と要求キーを破棄する"""
+        pool = RoutePool(watermark=1)
+        pool.take('normal', 6, get_cache().snapshot())
+        pool.refill()
+        pool.clear()
+        assert pool.size('normal', 6) == 0
+        assert pool.refill() == 0
+
+
+class TestRefillLoop:
+    """補充ループは生成ワーカー経由で動く"""
+
+    async def _fill(self, pool) -> int:
+        """補充ループを少し回し、止める前の保持件数を返す（stop は保持分を破棄する）"""
+        pool.start()
+        pool.take('easy', 6, get_cache().snapshot())
+        await asyncio.sleep(0.3)
+        size = pool.size('easy', 6)
+        await pool.stop()
+        return size
+
+    async def test_refill_runs_on_generation_executor(self, monkeypatch):
+        executor = GenerationExecutor(max_workers=1, max_pending=4)
+        calls = []
+        original_run = executor.run
+
+        async def run(fn, *args, **kwargs):
+            calls.append(args)
+            return await original_run(fn, *args, **kwargs)
+
+        monkeypatch.setattr(executor, "run", run)
+        monkeypatch.setattr(route_pool, "get_generation_executor", lambda: executor)
+        try:
+            assert await self._fill(RoutePool(watermark=2, refill_interval=0.05)) == 2
+        finally:
+            executor.shutdown()
+        # 1件ずつ投げ、ワーカーの実行数に数えられている
+        assert len(calls) > 2
+        assert all(args == (1,) for args in calls)
+        assert executor.metrics()["completed"] == len(calls)
+
+    async def test_refill_yields_when_overloaded(self, monkeypatch):
+        """待ち行列が一杯なら補充しない（例外にもしない）"""
+        class BusyExecutor:
+            async def run(self, fn, *args, **kwargs):
+                raise GenerationOverloadedError("full")
+
+        monkeypatch.setattr(route_pool, "get_generation_executor", lambda: BusyExecutor())
+        assert await self._fill(RoutePool(watermark=2, refill_interval=0.05)) == 0
+
+
+class TestStartGameUsesPool:
+    """/games/start がプールを使うことのテスト"""
+
+    def test_start_game_serves_pooled_route(self, client, db_session, monkeypatch):
+        """プールにゲームがあればそのルートを返す"""
+        from app.services.game_generator import generate_game
+        import app.routes.games
+
+        cache = get_cache().snapshot()
+        pooled = generate_game('normal', 6, snapshot=cache)
+
+        class FakePool:
+            def take(self, difficulty, node_count, snapshot):
+                assert (difficulty, node_count) == ('normal', 6)
+                return pooled
+
+        monkeypatch.setattr(app.routes.games, "get_route_pool", lambda: FakePool())
+
+        response = client.post("/api/v1/games/start", json={"difficulty": "normal", "target_length": 5})
+        assert response.status_code == 200
+        route = [step["term"]["id"] for step in response.json()["steps"]]
+        assert route == pooled.route
@@ -0,0 +1,63 @@
+"""並べ替え済みインデックスのテスト"""
+import pytest
+
+from app.services.sorted_index import SortedIndex, decode_cursor, encode_cursor
+
+ITEMS = [(1, "b"), (2, "a"), (3, "c"), (4, "a"), (5, "b")]
+
+
+def _index() -> SortedIndex:
+    return SortedIndex(ITEMS, key=lambda item: (item[1], item[0]))
+
+
+def _walk(index, limit, descending=False):
+    """カーソルで最後までたどる"""
+    ids, cursor = [], None
+    while True:
+        after = decode_cursor(cursor) if cursor else None
+        page = index.page(limit, descending=descending, after=after)
+        ids += [item[0] for item in page.items]
+        cursor = page.next_cursor
+        if cursor is None:
+            return ids
+
+
+class TestSortedIndex:
+
+    def test_offset_pages(self):
+        index = _index()
+        assert [i[0] for i in index.page(2).items] == [2, 4]
+        assert [i[0] for i in index.page(2, offset=2).items] == [1, 5]
+        assert [i[0] for i in index.page(2, descending=True).items] == [3, 5]
+        assert index.page(2, offset=10).items == []
+        assert index.page(2).total == 5
+
+    @pytest.mark.parametrize("limit", [1, 2, 5, 10])
+    def test_cursor_walk_matches_full_order(self, limit):
+        index = _index()
+        assert _walk(index, limit) == [2, 4, 1, 5, 3]
+        assert _walk(index, limit, descending=True) == [3, 5, 1, 4, 2]
+
+    def test_last_page_has_no_cursor(self):
+        page = _index().page(5)
+        assert len(page.items) == 5
+        assert page.next_cursor is None
+
+    def test_cursor_survives_insert(self):
+        """カーソル位置より前に行が増えても続きからになる"""
+        cursor = _index().page(2).next_cursor
+        index = SortedIndex([*ITEMS, (0, "a")], key=lambda item: (item[1], item[0]))
+        assert [i[0] for i in index.page(2, after=decode_cursor(cursor)).items] == [1, 5]
+
+    def test_cursor_round_trip(self):
+        assert decode_cursor(encode_cursor(("日本語", 3))) == ("日本語", 3)
+
+    @pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor(("a", "x"))[:-2], "W10="])
+    def test_invalid_cursor(self, cursor):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor)
+
+    def test_cursor_of_other_column(self):
+        """列の型が合わないカーソルは ValueError"""
+        with pytest.raises(ValueError):
+            _index().page(2, after=(10, 1))
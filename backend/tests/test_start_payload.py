@@ -0,0 +1,218 @@
+"""/games/start レスポンス組み立て（エンコード済み断片）のテスト"""
+import json
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+
+from app.schemas import (
+    ChoiceResponse,
+    CompactRouteStartResponse,
+    FullRouteStartResponse,
+    GameDictionaryResponse,
+    RouteStepWithChoices,
+    TermResponse,
+)
+from app.services.cache import Term, get_cache
+from app.services.game_generator import generate_game
+from app.services.start_payload import (
+    build_compact_start_payload,
+    build_start_payload,
+    format_datetime,
+    get_dictionary,
+)
+
+
+def _model_payload(game_id, difficulty, route, distractors, created_at, cache) -> dict:
+    """Pydantic モデルで組み立てた場合のレスポンス（比較用）"""
+    steps = []
+    for step_no, term_id in enumerate(route):
+        term = cache.get_term(term_id)
+        term_response = TermResponse(
+            id=term.id, name=term.name, tier=term.tier,
+            category=term.category, description=term.description
+        )
+        if step_no == len(route) - 1:
+            steps.append(RouteStepWithChoices(
+                step_no=step_no, term=term_response, correct_next_id=None, choices=[],
+                difficulty="", keyword="", edge_description=""
+            ))
+            continue
+        correct_next_id = route[step_no + 1]
+        edge = cache.get_edge(term_id, correct_next_id)
+        choices = [
+            ChoiceResponse(term_id=c.id, name=c.name, tier=c.tier)
+            for c in (cache.get_term(i) for i in [correct_next_id, *distractors[step_no]])
+        ]
+        steps.append(RouteStepWithChoices(
+            step_no=step_no, term=term_response, correct_next_id=correct_next_id,
+            choices=choices, difficulty=edge.difficulty or "normal",
+            keyword=edge.keyword or "", edge_description=edge.description or ""
+        ))
+    response = FullRouteStartResponse(
+        game_id=game_id, difficulty=difficulty, total_steps=len(route),
+        steps=steps, created_at=created_at
+    )
+    return json.loads(response.model_dump_json())
+
+
+def _sort_choices(payload: dict) -> dict:
+    for step in payload["steps"]:
+        step["choices"].sort(key=lambda c: c["term_id"])
+    return payload
+
+
+class TestBuildStartPayload:
+    """build_start_payload のテスト"""
+
+    @pytest.mark.parametrize("difficulty", ["easy", "normal", "hard"])
+    def test_matches_model_serialization(self, difficulty):
+        """Pydantic モデル経由と同じJSONになる（選択肢の順序はシャッフルされる）"""
+        cache = get_cache().snapshot()
+        game = generate_game(difficulty, 11, snapshot=cache)
+        game_id = uuid4()
+        created_at = datetime.now(timezone.utc)
+
+        body = build_start_payload(
+            game_id, difficulty, game.route, game.distractors, created_at, cache
+        )
+
+        FullRouteStartResponse.model_validate_json(body)
+        expected = _model_payload(
+            game_id, difficulty, game.route, game.distractors, created_at, cache
+        )
+        assert _sort_choices(json.loads(body)) == _sort_choices(expected)
+
+    def test_missing_term_raises(self):
+        """キャッシュにない用語がルートにあれば LookupError"""
+        cache = get_cache().snapshot()
+        with pytest.raises(LookupError):
+            build_start_payload(
+                uuid4(), "hard", [-999999], [], datetime.now(timezone.utc), cache
+            )
+
+    def test_format_datetime_matches_pydantic(self):
+        """日時の書式が Pydantic の出力と一致する"""
+        for value in (
+            datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+            datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        ):
+            response = FullRouteStartResponse(
+                game_id=uuid4(), difficulty="easy", total_steps=0, steps=[], created_at=value
+            )
+            assert format_datetime(value) == json.loads(response.model_dump_json())["created_at"]
+
+
+class TestFragments:
+    """用語・エッジ断片のキャッシュ"""
+
+    pytestmark = pytest.mark.usefixtures("restore_cache")
+
+    def test_term_fragment_reused_until_term_changes(self):
+        """同じ用語オブジェクトの間は使い回し、更新されたら作り直す"""
+        cache = get_cache()
+        term_id = next(iter(cache.terms))
+        first = cache.snapshot().get_term_fragments(term_id)
+        assert cache.snapshot().get_term_fragments(term_id)[0] is first[0]
+        assert json.loads(first[0])["id"] == term_id
+        assert json.loads(first[1])["term_id"] == term_id
+
+        old = cache.get_term(term_id)
+        cache.upsert_term(Term(
+            id=term_id, name="断片テスト", tier=old.tier,
+            category=old.category, description=old.description
+        ))
+        updated = cache.snapshot().get_term_fragments(term_id)
+        assert json.loads(updated[0])["name"] == "断片テスト"
+        assert "断片テスト".encode() in updated[1]
+
+
+class TestCompactStartPayload:
+    """build_compact_start_payload と辞書のテスト"""
+
+    def test_matches_full_payload(self):
+        """IDだけで同じゲームを表す（辞書から引けば通常形式と一致する）"""
+        cache = get_cache().snapshot()
+        game = generate_game("normal", 11, snapshot=cache)
+        game_id = uuid4()
+        created_at = datetime.now(timezone.utc)
+
+        compact = CompactRouteStartResponse.model_validate_json(build_compact_start_payload(
+            game_id, "normal", game.route, game.distractors, created_at, cache
+        ))
+        full = json.loads(build_start_payload(
+            game_id, "normal", game.route, game.distractors, created_at, cache
+        ))
+
+        dictionary = GameDictionaryResponse.model_validate_json(get_dictionary(cache).payload.body)
+        assert compact.dictionary_version == dictionary.version
+        terms = {t.id: t for t in dictionary.terms}
+        edges = {e.id: e for e in dictionary.edges}
+
+        assert compact.route == [step["term"]["id"] for step in full["steps"]]
+        for step_no, step in enumerate(full["steps"][:-1]):
+            assert sorted(compact.choices[step_no]) == sorted(c["term_id"] for c in step["choices"])
+            assert all(term_id in terms for term_id in compact.choices[step_no])
+            edge = edges[compact.edges[step_no]]
+            assert {edge.term_a, edge.term_b} == {step["term"]["id"], step["correct_next_id"]}
+            assert edge.keyword == step["keyword"]
+
+    def test_missing_term_raises(self):
+        cache = get_cache().snapshot()
+        with pytest.raises(LookupError):
+            build_compact_start_payload(
+                uuid4(), "hard", [-999999], [], datetime.now(timezone.utc), cache
+            )
+
+    def test_dictionary_built_once_per_snapshot(self):
+        cache = get_cache().snapshot()
+        assert get_dictionary(cache) is get_dictionary(cache)
+
+    @pytest.mark.usefixtures("restore_cache")
+    def test_dictionary_version_follows_content(self):
+        """内容が変わったら版が変わり、同じ内容なら同じ版"""
+        cache = get_cache()
+        before = get_dictionary(cache.snapshot()).version
+        assert get_dictionary(cache.snapshot().copy(version=0)).version == before
+
+        term_id = next(iter(cache.terms))
+        old = cache.get_term(term_id)
+        cache.upsert_term(Term(
+            id=term_id, name="辞書テスト", tier=old.tier,
+            category=old.category, description=old.description
+        ))
+        assert get_dictionary(cache.snapshot()).version != before
+
+
+class TestDictionaryEndpoints:
+    """GET /games/dictionary のテスト"""
+
+    def test_compact_start_and_dictionary(self, client, db_session):
+        """compact=True の開始レスポンスの版で辞書を取得できる"""
+        response = client.post(
+            "/api/v1/games/start",
+            json={"difficulty": "normal", "target_length": 5, "compact": True}
+        )
+        assert response.status_code == 200
+        data = CompactRouteStartResponse.model_validate(response.json())
+        assert data.total_steps == len(data.route) == 6
+        assert len(data.choices) == len(data.edges) == 5
+
+        current = client.get("/api/v1/games/dictionary")
+        assert current.status_code == 200
+        assert current.json()["version"] == data.dictionary_version
+        assert current.headers["cache-control"] == "public, no-cache"
+
+        versioned = client.get(f"/api/v1/games/dictionary/{data.dictionary_version}")
+        assert versioned.status_code == 200
+        assert "immutable" in versioned.headers["cache-control"]
+        assert versioned.content == current.content
+
+    def test_dictionary_not_modified(self, client):
+        etag = client.get("/api/v1/games/dictionary").headers["etag"]
+        response = client.get("/api/v1/games/dictionary", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    def test_unknown_version_404(self, client):
+        response = client.get("/api/v1/games/dictionary/0000000000000000")
+        assert response.status_code == 404
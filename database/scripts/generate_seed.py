@@ -3,21 +3,40 @@
 JSONファイルからseed.sqlを生成するスクリプト
 
 使用方法:
-    python generate_seed.py
+    python generate_seed.py                      # 1行1INSERT（従来どおり、../seed.sql）
+    python generate_seed.py --format copy        # COPY ... FROM stdin（最速。psql で適用）
+    python generate_seed.py --format batch       # 複数行INSERT（psql 以外のクライアント向け）
+    python generate_seed.py --format copy -o - | psql -d histlink
 
 入力:
     ../../data/terms.json
     ../../data/edges.json
 
 出力:
-    ../seed.sql
+    ../seed.sql（-o で変更、- で標準出力）
+
+入力JSONは配列を1件ずつ読み進め、出力も1件ずつ書き出すため、
+10万件以上のデータでもメモリに全件を載せない。
+copy / batch は全体を1トランザクションで適用する。
 
 注意: generate_seed.js は削除済み。このPythonスクリプトのみを使用すること。
 """
 
+import argparse
 import json
 import sys
+from collections.abc import Iterable, Iterator
+from itertools import islice
 from pathlib import Path
+from typing import TextIO
+
+# 入力ファイルを読み進める単位（文字数）
+READ_CHUNK_SIZE = 1 << 16
+# --format batch の既定の1文あたりの行数
+DEFAULT_BATCH_SIZE = 1000
+
+TERM_COLUMNS = "id, name, tier, category, description"
+EDGE_COLUMNS = "id, term_a, term_b, difficulty, keyword, description"
 
 
 def escape_sql(value: str | None) -> str:
@@ -27,8 +46,102 @@ def escape_sql(value: str | None) -> str:
     return value.replace("'", "''")
 
 
-def load_data(data_dir: Path) -> tuple[list[dict], list[dict]]:
-    """terms.json と edges.json を読み込む"""
+def escape_copy(value: str | None) -> str:
+    """COPY テキスト形式用にエスケープ（None は空文字、従来のINSERTと同じ）"""
+    if value is None:
+        return ""
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+# ========== 入力（JSON配列の逐次読み込み） ==========
+
+
+class _JsonStream:
+    """ファイルを少しずつ読みながら JSON の値を1つずつ取り出す"""
+
+    def __init__(self, f: TextIO, chunk_size: int = READ_CHUNK_SIZE):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """続きを読み込む（もう無ければ False）"""
+        if self._eof:
+            return False
+        chunk = self._f.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """空白を読み飛ばし、次の1文字を返す（終端なら空文字）"""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos].isspace():
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"invalid JSON: expected {char!r}, found {found!r}")
+        self._pos += 1
+
+    def value(self):
+        """次の値を1つデコードする（途中で切れていれば読み足す）"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # 数値などはバッファの末尾で切れていても読めてしまうので、続きがあるか確かめる
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+
+def iter_json_array(path: Path, key: str, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[dict]:
+    """{"<key>": [...]} 形式のファイルから配列の要素を1件ずつ返す"""
+    with open(path, "r", encoding="utf-8") as f:
+        stream = _JsonStream(f, chunk_size)
+        stream.expect("{")
+        while stream.peek() != "}":
+            name = stream.value()
+            stream.expect(":")
+            if name != key:
+                stream.value()  # 対象外のキーは読み捨てる
+            else:
+                stream.expect("[")
+                while stream.peek() != "]":
+                    yield stream.value()
+                    if stream.peek() == ",":
+                        stream.expect(",")
+                stream.expect("]")
+                return
+            if stream.peek() == ",":
+                stream.expect(",")
+    raise KeyError(key)
+
+
+def load_data(data_dir: Path) -> tuple[Iterator[dict], Iterator[dict]]:
+    """terms.json と edges.json を逐次読み込むイテレータを返す"""
     terms_path = data_dir / "terms.json"
     edges_path = data_dir / "edges.json"
 
@@ -37,42 +150,108 @@ def load_data(data_dir: Path) -> tuple[list[dict], list[dict]]:
     if not edges_path.exists():
         raise FileNotFoundError(f"edges.json not found: {edges_path}")
 
-    with open(terms_path, "r", encoding="utf-8") as f:
-        terms_data = json.load(f)
-    with open(edges_path, "r", encoding="utf-8") as f:
-        edges_data = json.load(f)
+    return iter_json_array(terms_path, "terms"), iter_json_array(edges_path, "edges")
+
+
+# ========== 出力 ==========
+
+
+def _term_values(term: dict) -> str:
+    name = escape_sql(term["name"])
+    category = escape_sql(term["category"])
+    description = escape_sql(term.get("description", ""))
+    return f"({term['id']}, '{name}', {term['tier']}, '{category}', '{description}')"
+
+
+def _edge_values(edge: dict) -> str:
+    keyword = escape_sql(edge.get("keyword", ""))
+    description = escape_sql(edge.get("description", ""))
+    # term_a < term_b を保証
+    term_a = min(edge["term_a"], edge["term_b"])
+    term_b = max(edge["term_a"], edge["term_b"])
+    return f"({edge['id']}, {term_a}, {term_b}, '{edge['difficulty']}', '{keyword}', '{description}')"
+
+
+def _term_copy_row(term: dict) -> str:
+    return "\t".join((
+        str(term["id"]),
+        escape_copy(term["name"]),
+        str(term["tier"]),
+        escape_copy(term["category"]),
+        escape_copy(term.get("description", "")),
+    ))
+
 
-    return terms_data["terms"], edges_data["edges"]
+def _edge_copy_row(edge: dict) -> str:
+    return "\t".join((
+        str(edge["id"]),
+        str(min(edge["term_a"], edge["term_b"])),
+        str(max(edge["term_a"], edge["term_b"])),
+        escape_copy(edge["difficulty"]),
+        escape_copy(edge.get("keyword", "")),
+        escape_copy(edge.get("description", "")),
+    ))
 
 
-def generate_terms_sql(terms: list[dict]) -> list[str]:
-    """termsのINSERT文リストを生成"""
-    lines: list[str] = ["-- terms データ", ""]
+class _Counter:
+    """通過した件数を数える"""
+
+    def __init__(self, items: Iterable[dict]):
+        self._items = items
+        self.count = 0
+
+    def __iter__(self) -> Iterator[dict]:
+        for item in self._items:
+            self.count += 1
+            yield item
+
+
+def generate_terms_sql(terms: Iterable[dict]) -> Iterator[str]:
+    """termsのINSERT文を1件ずつ生成"""
+    yield from ("-- terms データ", "")
     for term in terms:
-        name = escape_sql(term["name"])
-        category = escape_sql(term["category"])
-        description = escape_sql(term.get("description", ""))
-        lines.append(
-            f"INSERT INTO terms (id, name, tier, category, description) "
-            f"VALUES ({term['id']}, '{name}', {term['tier']}, '{category}', '{description}');"
-        )
-    return lines
-
-
-def generate_edges_sql(edges: list[dict]) -> list[str]:
-    """edgesのINSERT文リストを生成"""
-    lines: list[str] = ["-- edges データ", ""]
+        yield f"INSERT INTO terms ({TERM_COLUMNS}) VALUES {_term_values(term)};"
+
+
+def generate_edges_sql(edges: Iterable[dict]) -> Iterator[str]:
+    """edgesのINSERT文を1件ずつ生成"""
+    yield from ("-- edges データ", "")
     for edge in edges:
-        keyword = escape_sql(edge.get("keyword", ""))
-        description = escape_sql(edge.get("description", ""))
-        # term_a < term_b を保証
-        term_a = min(edge["term_a"], edge["term_b"])
-        term_b = max(edge["term_a"], edge["term_b"])
-        lines.append(
-            f"INSERT INTO edges (id, term_a, term_b, difficulty, keyword, description) "
-            f"VALUES ({edge['id']}, {term_a}, {term_b}, '{edge['difficulty']}', '{keyword}', '{description}');"
-        )
-    return lines
+        yield f"INSERT INTO edges ({EDGE_COLUMNS}) VALUES {_edge_values(edge)};"
+
+
+def _batched_insert(table: str, columns: str, rows: Iterable[str], batch_size: int) -> Iterator[str]:
+    """batch_size 件ずつの複数行INSERTを生成"""
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        yield f"INSERT INTO {table} ({columns}) VALUES"
+        yield ",\n".join(batch) + ";"
+
+
+def generate_terms_batch_sql(terms: Iterable[dict], batch_size: int) -> Iterator[str]:
+    """termsの複数行INSERT文を生成"""
+    yield from ("-- terms データ", "")
+    yield from _batched_insert("terms", TERM_COLUMNS, map(_term_values, terms), batch_size)
+
+
+def generate_edges_batch_sql(edges: Iterable[dict], batch_size: int) -> Iterator[str]:
+    """edgesの複数行INSERT文を生成"""
+    yield from ("-- edges データ", "")
+    yield from _batched_insert("edges", EDGE_COLUMNS, map(_edge_values, edges), batch_size)
+
+
+def generate_terms_copy(terms: Iterable[dict]) -> Iterator[str]:
+    """termsのCOPYブロックを生成"""
+    yield from ("-- terms データ", "", f"COPY terms ({TERM_COLUMNS}) FROM stdin;")
+    yield from map(_term_copy_row, terms)
+    yield "\\."
+
+
+def generate_edges_copy(edges: Iterable[dict]) -> Iterator[str]:
+    """edgesのCOPYブロックを生成"""
+    yield from ("-- edges データ", "", f"COPY edges ({EDGE_COLUMNS}) FROM stdin;")
+    yield from map(_edge_copy_row, edges)
+    yield "\\."
 
 
 def generate_sequence_reset_sql() -> list[str]:
@@ -85,32 +264,93 @@ def generate_sequence_reset_sql() -> list[str]:
     ]
 
 
-def generate_seed() -> None:
-    """seed.sqlを生成するメイン関数"""
+def generate_seed_lines(
+    terms: Iterable[dict],
+    edges: Iterable[dict],
+    output_format: str = "insert",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[str]:
+    """seed.sql の行を先頭から順に生成"""
+    # copy / batch は1トランザクションにまとめる（行ごとのコミットを避ける）
+    in_transaction = output_format != "insert"
+
+    yield from ("-- HistLink Seed Data", "-- Generated from JSON files", "")
+    if in_transaction:
+        yield from ("BEGIN;", "")
+    if output_format == "copy":
+        yield from generate_terms_copy(terms)
+        yield ""
+        yield from generate_edges_copy(edges)
+    elif output_format == "batch":
+        yield from generate_terms_batch_sql(terms, batch_size)
+        yield ""
+        yield from generate_edges_batch_sql(edges, batch_size)
+    else:
+        yield from generate_terms_sql(terms)
+        yield ""
+        yield from generate_edges_sql(edges)
+    yield ""
+    yield from generate_sequence_reset_sql()
+    if in_transaction:
+        yield from ("", "COMMIT;")
+    yield ""  # 末尾改行
+
+
+def write_lines(f: TextIO, lines: Iterable[str]) -> None:
+    """"\n".join(lines) と同じ内容を、全体を組み立てずに書き出す"""
+    lines = iter(lines)
+    f.write(next(lines, ""))
+    for line in lines:
+        f.write("\n")
+        f.write(line)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     script_dir = Path(__file__).parent
-    data_dir = script_dir.parent.parent / "data"
-    output_path = script_dir.parent / "seed.sql"
+    parser = argparse.ArgumentParser(description="JSONファイルからseed.sqlを生成する")
+    parser.add_argument(
+        "--format",
+        choices=("insert", "batch", "copy"),
+        default="insert",
+        help="insert: 1行1INSERT（既定） / batch: 複数行INSERT / copy: COPY FROM stdin（psql用）",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+        help=f"batch のとき1文あたりの行数（既定 {DEFAULT_BATCH_SIZE}）",
+    )
+    parser.add_argument(
+        "--data-dir", type=Path, default=script_dir.parent.parent / "data",
+        help="terms.json / edges.json のあるディレクトリ",
+    )
+    parser.add_argument(
+        "-o", "--output", default=str(script_dir.parent / "seed.sql"),
+        help="出力先（- で標準出力）",
+    )
+    args = parser.parse_args(argv)
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    return args
 
-    terms, edges = load_data(data_dir)
 
-    lines: list[str] = [
-        "-- HistLink Seed Data",
-        "-- Generated from JSON files",
-        "",
-    ]
-    lines.extend(generate_terms_sql(terms))
-    lines.append("")
-    lines.extend(generate_edges_sql(edges))
-    lines.append("")
-    lines.extend(generate_sequence_reset_sql())
-    lines.append("")  # 末尾改行
+def generate_seed(argv: list[str] | None = None) -> None:
+    """seed.sqlを生成するメイン関数"""
+    args = parse_args(argv)
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
+    terms, edges = load_data(args.data_dir)
+    terms, edges = _Counter(terms), _Counter(edges)
+    lines = generate_seed_lines(terms, edges, args.format, args.batch_size)
 
-    print(f"Generated {output_path}")
-    print(f"  Terms: {len(terms)} records")
-    print(f"  Edges: {len(edges)} records")
+    if args.output == "-":
+        write_lines(sys.stdout, lines)
+        report = sys.stderr  # 標準出力はSQLなので件数は標準エラーへ
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            write_lines(f, lines)
+        report = sys.stdout
+
+    print(f"Generated {args.output}", file=report)
+    print(f"  Terms: {terms.count} records", file=report)
+    print(f"  Edges: {edges.count} records", file=report)
 
 
 if __name__ == "__main__":
@@ -122,3 +362,6 @@ if __name__ == "__main__":
     except KeyError as e:
         print(f"Error: missing key in JSON data: {e}", file=sys.stderr)
         sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
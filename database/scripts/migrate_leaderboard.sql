@@ -0,0 +1,64 @@
+-- =======================================
+-- leaderboard テーブル追加のマイグレーション（既存DB用）
+-- =======================================
+-- 新規構築では schema.sql に含まれるので不要。
+-- 実行方法:
+--   psql -h localhost -U histlink -d histlink -f database/scripts/migrate_leaderboard.sql
+--
+-- テーブル・トリガーを作成し、既存の games から一括で取り込む
+-- （結果送信済みかどうかは区別できないため、既存分は全件をランキング対象とする）
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS leaderboard (
+    game_id uuid PRIMARY KEY REFERENCES games(id) ON DELETE CASCADE,
+    total_steps integer NOT NULL,
+    score integer NOT NULL,
+    cleared_steps integer NOT NULL,
+    user_name varchar(20) NOT NULL,
+    created_at timestamptz NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_leaderboard_steps_score ON leaderboard(total_steps, score DESC, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_score ON leaderboard(score DESC, created_at DESC);
+
+CREATE TABLE IF NOT EXISTS leaderboard_score_counts (
+    total_steps integer NOT NULL,
+    score integer NOT NULL,
+    games integer NOT NULL DEFAULT 0,
+    PRIMARY KEY (total_steps, score)
+);
+
+CREATE INDEX IF NOT EXISTS idx_leaderboard_score_counts_score ON leaderboard_score_counts(score);
+
+CREATE OR REPLACE FUNCTION update_leaderboard_score_counts()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE leaderboard_score_counts
+        SET games = games - 1
+        WHERE total_steps = OLD.total_steps AND score = OLD.score;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO leaderboard_score_counts (total_steps, score, games)
+        VALUES (NEW.total_steps, NEW.score, 1)
+        ON CONFLICT (total_steps, score)
+        DO UPDATE SET games = leaderboard_score_counts.games + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS leaderboard_score_counts_sync ON leaderboard;
+CREATE TRIGGER leaderboard_score_counts_sync
+    AFTER INSERT OR DELETE OR UPDATE OF total_steps, score ON leaderboard
+    FOR EACH ROW
+    EXECUTE FUNCTION update_leaderboard_score_counts();
+
+-- 既存ゲームの取り込み（件数はトリガーで集計される）
+INSERT INTO leaderboard (game_id, total_steps, score, cleared_steps, user_name, created_at)
+SELECT id, COALESCE(array_length(terms, 1) - 1, 0), score, cleared_steps, user_name, created_at
+FROM games
+ON CONFLICT (game_id) DO NOTHING;
+
+COMMIT;
@@ -0,0 +1,127 @@
+-- =======================================
+-- 期間別ランキング（日間・週間・月間）追加のマイグレーション（既存DB用）
+-- =======================================
+-- 新規構築では schema.sql に含まれるので不要。migrate_leaderboard.sql の適用後に実行する。
+-- 実行方法:
+--   psql -h localhost -U histlink -d histlink -f database/scripts/migrate_leaderboard_periods.sql
+
+BEGIN;
+
+-- leaderboard_periods: 期間別ランキング（日間・週間・月間）
+-- leaderboard の行ごとに (期間, 期間の開始日) の行をトリガーで作る。
+-- 期間の開始日をキーに含めるので、境界を過ぎると自然に新しい期間に切り替わる。
+-- (period, period_start, ...) から始まるインデックスで引くため、履歴が増えても速度は変わらない
+CREATE TABLE IF NOT EXISTS leaderboard_periods (
+    period varchar(10) NOT NULL,
+    period_start date NOT NULL,
+    game_id uuid NOT NULL REFERENCES leaderboard(game_id) ON DELETE CASCADE,
+    total_steps integer NOT NULL,
+    score integer NOT NULL,
+    cleared_steps integer NOT NULL,
+    user_name varchar(20) NOT NULL,
+    created_at timestamptz NOT NULL,
+    PRIMARY KEY (period, period_start, game_id),
+    CONSTRAINT leaderboard_periods_period_check CHECK (period IN ('daily', 'weekly', 'monthly'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_leaderboard_periods_steps_score
+    ON leaderboard_periods(period, period_start, total_steps, score DESC, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_periods_score
+    ON leaderboard_periods(period, period_start, score DESC, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_leaderboard_periods_game ON leaderboard_periods(game_id);
+
+COMMENT ON TABLE leaderboard_periods IS '期間別ランキング（トリガーで自動更新）';
+COMMENT ON COLUMN leaderboard_periods.period_start IS '期間の開始日（Asia/Tokyo）';
+
+-- leaderboard_period_score_counts: 期間ごとのスコア分布（順位計算用）
+CREATE TABLE IF NOT EXISTS leaderboard_period_score_counts (
+    period varchar(10) NOT NULL,
+    period_start date NOT NULL,
+    total_steps integer NOT NULL,
+    score integer NOT NULL,
+    games integer NOT NULL DEFAULT 0,
+    PRIMARY KEY (period, period_start, total_steps, score)
+);
+
+COMMENT ON TABLE leaderboard_period_score_counts IS '期間別ランキングのスコア分布（トリガーで自動更新）';
+
+-- 期間の開始日（ゲーム開始日時を日本時間で区切る。週は月曜始まり）
+CREATE OR REPLACE FUNCTION leaderboard_period_start(period text, ts timestamptz)
+RETURNS date AS $$
+    SELECT date_trunc(
+        CASE period WHEN 'daily' THEN 'day' WHEN 'weekly' THEN 'week' ELSE 'month' END,
+        ts AT TIME ZONE 'Asia/Tokyo'
+    )::date;
+$$ LANGUAGE sql STABLE;
+
+-- leaderboard の追加・更新を期間別ランキングに反映（削除は外部キーで連動）
+-- スコアが変わらない更新（名前変更など）では total_steps / score を SET しない。
+-- SET するだけで件数トリガー（UPDATE OF total_steps, score）が動いてしまうため
+CREATE OR REPLACE FUNCTION sync_leaderboard_periods()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO leaderboard_periods
+            (period, period_start, game_id, total_steps, score, cleared_steps, user_name, created_at)
+        SELECT p.period, leaderboard_period_start(p.period, NEW.created_at), NEW.game_id,
+               NEW.total_steps, NEW.score, NEW.cleared_steps, NEW.user_name, NEW.created_at
+        FROM (VALUES ('daily'), ('weekly'), ('monthly')) AS p(period);
+    ELSIF (NEW.total_steps, NEW.score) IS DISTINCT FROM (OLD.total_steps, OLD.score) THEN
+        UPDATE leaderboard_periods
+        SET total_steps = NEW.total_steps,
+            score = NEW.score,
+            cleared_steps = NEW.cleared_steps,
+            user_name = NEW.user_name
+        WHERE game_id = NEW.game_id;
+    ELSIF (NEW.cleared_steps, NEW.user_name) IS DISTINCT FROM (OLD.cleared_steps, OLD.user_name) THEN
+        UPDATE leaderboard_periods
+        SET cleared_steps = NEW.cleared_steps,
+            user_name = NEW.user_name
+        WHERE game_id = NEW.game_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS leaderboard_periods_sync ON leaderboard;
+CREATE TRIGGER leaderboard_periods_sync
+    AFTER INSERT OR UPDATE OF total_steps, score, cleared_steps, user_name ON leaderboard
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_leaderboard_periods();
+
+-- leaderboard_periods の追加・削除・スコア変更を件数に反映
+CREATE OR REPLACE FUNCTION update_leaderboard_period_score_counts()
+RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE leaderboard_period_score_counts
+        SET games = games - 1
+        WHERE period = OLD.period AND period_start = OLD.period_start
+          AND total_steps = OLD.total_steps AND score = OLD.score;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO leaderboard_period_score_counts (period, period_start, total_steps, score, games)
+        VALUES (NEW.period, NEW.period_start, NEW.total_steps, NEW.score, 1)
+        ON CONFLICT (period, period_start, total_steps, score)
+        DO UPDATE SET games = leaderboard_period_score_counts.games + 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS leaderboard_period_score_counts_sync ON leaderboard_periods;
+CREATE TRIGGER leaderboard_period_score_counts_sync
+    AFTER INSERT OR DELETE OR UPDATE OF total_steps, score ON leaderboard_periods
+    FOR EACH ROW
+    EXECUTE FUNCTION update_leaderboard_period_score_counts();
+
+-- 既存のランキングを取り込む（件数はトリガーで集計される）
+INSERT INTO leaderboard_periods
+    (period, period_start, game_id, total_steps, score, cleared_steps, user_name, created_at)
+SELECT p.period, leaderboard_period_start(p.period, l.created_at), l.game_id,
+       l.total_steps, l.score, l.cleared_steps, l.user_name, l.created_at
+FROM leaderboard l
+CROSS JOIN (VALUES ('daily'), ('weekly'), ('monthly')) AS p(period)
+ON CONFLICT DO NOTHING;
+
+COMMIT;